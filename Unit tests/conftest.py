@@ -0,0 +1,45 @@
+# tests/conftest.py
+import pytest
+import sys
+import os
+from contextlib import contextmanager
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from models.database import Producto, Categoria
+from database.category_cache import categoria_cache
+
+
+@pytest.fixture
+def sqlite_factory():
+    """sessionmaker sobre una BD en memoria con las tablas categorias y productos"""
+    # BD en memoria propia del test, nunca la de DATABASE_URL
+    engine = create_engine("sqlite://", poolclass=StaticPool, connect_args={"check_same_thread": False})
+    Categoria.__table__.create(engine)
+    Producto.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+    # El cache global de categorías no debe quedar con esta BD
+    categoria_cache.invalidate()
+
+
+@pytest.fixture
+def sqlite_db(sqlite_factory):
+    session = sqlite_factory()
+    yield session
+    session.close()
+
+
+@pytest.fixture
+def sqlite_scope(sqlite_factory):
+    """Reemplazo de session_scope que abre sesiones sobre la BD del test"""
+    @contextmanager
+    def scope():
+        session = sqlite_factory()
+        try:
+            yield session
+        finally:
+            session.close()
+    return scope
@@ -0,0 +1,173 @@
+# tests/test_batching.py
+import asyncio
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlu.batching import NLUBatchScheduler
+
+
+class TestNLUBatchScheduler:
+    def test_coalesces_concurrent_messages(self):
+        calls = []
+
+        def process_batch(texts):
+            calls.append(list(texts))
+            return [{"intent": t.upper()} for t in texts]
+
+        async def run():
+            scheduler = NLUBatchScheduler(process_batch, max_batch_size=8, max_wait_ms=20)
+            results = await asyncio.gather(*(scheduler.process(t) for t in ["a", "b", "c"]))
+            await scheduler.close()
+            return results
+
+        results = asyncio.run(run())
+
+        assert [r["intent"] for r in results] == ["A", "B", "C"]
+        assert calls == [["a", "b", "c"]]
+
+    def test_respects_max_batch_size(self):
+        calls = []
+
+        async def process_batch(texts):
+            calls.append(len(texts))
+            return [{"intent": t} for t in texts]
+
+        async def run():
+            scheduler = NLUBatchScheduler(process_batch, max_batch_size=2, max_wait_ms=20)
+            results = await asyncio.gather(*(scheduler.process(str(i)) for i in range(5)))
+            await scheduler.close()
+            return results
+
+        results = asyncio.run(run())
+
+        assert [r["intent"] for r in results] == ["0", "1", "2", "3", "4"]
+        assert max(calls) <= 2
+
+    def test_propagates_errors_to_callers(self):
+        def process_batch(texts):
+            raise RuntimeError("modelo no disponible")
+
+        async def run():
+            scheduler = NLUBatchScheduler(process_batch, max_wait_ms=1)
+            try:
+                await scheduler.process("hola")
+            finally:
+                await scheduler.close()
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(run())
+
+    def test_batches_run_concurrently_up_to_max_concurrency(self):
+        activos = [0, 0]  # en vuelo, pico
+
+        async def process_batch(texts):
+            activos[0] += 1
+            activos[1] = max(activos[1], activos[0])
+            await asyncio.sleep(0.1)
+            activos[0] -= 1
+            return [{"intent": t} for t in texts]
+
+        async def run():
+            scheduler = NLUBatchScheduler(process_batch, max_batch_size=1, max_wait_ms=1, max_concurrency=4)
+            loop = asyncio.get_running_loop()
+            inicio = loop.time()
+            results = await asyncio.gather(*(scheduler.process(str(i)) for i in range(8)))
+            duracion = loop.time() - inicio
+            await scheduler.close()
+            return results, duracion
+
+        results, duracion = asyncio.run(run())
+
+        assert [r["intent"] for r in results] == [str(i) for i in range(8)]
+        assert activos[1] == 4
+        assert duracion < 0.35
+
+    def test_timeout_counts_time_in_queue(self):
+        async def process_batch(texts):
+            await asyncio.sleep(0.2)
+            return [{"intent": t} for t in texts]
+
+        async def run():
+            scheduler = NLUBatchScheduler(process_batch, max_batch_size=1, max_wait_ms=1,
+                                          max_concurrency=1, timeout=0.3)
+            results = await asyncio.gather(*(scheduler.process(str(i)) for i in range(4)))
+            await scheduler.close()
+            return results
+
+        results = asyncio.run(run())
+
+        # Solo el primero entra en 0.3s; los demás vencen esperando en la cola
+        assert [r["intent"] for r in results] == ["0", "desconocido", "desconocido", "desconocido"]
+
+    def test_full_queue_returns_fallback(self):
+        async def process_batch(texts):
+            await asyncio.sleep(0.1)
+            return [{"intent": t} for t in texts]
+
+        async def run():
+            scheduler = NLUBatchScheduler(process_batch, max_batch_size=1, max_wait_ms=1,
+                                          max_concurrency=1, max_queue=1)
+            results = await asyncio.gather(*(scheduler.process(str(i)) for i in range(3)))
+            await scheduler.close()
+            return results
+
+        results = asyncio.run(run())
+
+        assert results[-1]["intent"] == "desconocido"
+        assert results[0]["intent"] == "0"
+
+    def test_close_resolves_waiting_callers(self):
+        async def process_batch(texts):
+            await asyncio.sleep(10)
+
+        async def run():
+            scheduler = NLUBatchScheduler(process_batch, max_batch_size=1, max_wait_ms=1,
+                                          max_concurrency=1, timeout=30)
+            pendientes = [asyncio.ensure_future(scheduler.process(str(i))) for i in range(3)]
+            await asyncio.sleep(0.05)
+            await scheduler.close()
+            return await asyncio.wait_for(asyncio.gather(*pendientes), 1)
+
+        results = asyncio.run(run())
+
+        assert [r["intent"] for r in results] == ["desconocido"] * 3
+
+
+class _SlowProcessor:
+    def __init__(self, delay):
+        self.delay = delay
+
+    def process_batch(self, texts):
+        import time
+        time.sleep(self.delay)
+        return [{"intent": "saludo", "confidence": 0.9, "entities": {}} for _ in texts]
+
+
+class TestAsyncNLUProcessor:
+    def test_runs_in_thread_pool(self):
+        from nlu.executor import AsyncNLUProcessor
+        nlu_async = AsyncNLUProcessor(_SlowProcessor(0), executor="thread", max_workers=1)
+        result = asyncio.run(nlu_async.process("hola"))
+        nlu_async.shutdown()
+        assert result["intent"] == "saludo"
+
+    def test_timeout_returns_fallback(self):
+        from nlu.executor import AsyncNLUProcessor
+        nlu_async = AsyncNLUProcessor(_SlowProcessor(0.2), executor="thread", max_workers=1, timeout=0.01)
+        result = asyncio.run(nlu_async.process("hola"))
+        nlu_async.shutdown()
+        assert result["intent"] == "desconocido"
+        assert result["confidence"] == 0.0
+
+    def test_full_queue_returns_fallback(self):
+        from nlu.executor import AsyncNLUProcessor
+        nlu_async = AsyncNLUProcessor(_SlowProcessor(0.1), executor="thread", max_workers=1, max_pending=1)
+
+        async def run():
+            return await asyncio.gather(nlu_async.process("a"), nlu_async.process("b"))
+
+        results = asyncio.run(run())
+        nlu_async.shutdown()
+        assert sorted(r["intent"] for r in results) == ["desconocido", "saludo"]
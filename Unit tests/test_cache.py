@@ -0,0 +1,66 @@
+# tests/test_cache.py
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlu.cache import NLUResultCache
+
+
+class TestNLUResultCache:
+    def test_lru_eviction(self):
+        cache = NLUResultCache(max_entries=2)
+        cache.put("a", {"intent": "a"})
+        cache.put("b", {"intent": "b"})
+        cache.get("a")
+        cache.put("c", {"intent": "c"})
+
+        assert cache.get("b") is None
+        assert cache.get("a") == {"intent": "a"}
+        assert cache.evictions == 1
+
+    def test_ttl_expiry(self, monkeypatch):
+        import nlu.cache as cache_module
+        now = [100.0]
+        monkeypatch.setattr(cache_module.time, "monotonic", lambda: now[0])
+        cache = NLUResultCache(ttl_seconds=10)
+        cache.put("hola", {"intent": "saludo"})
+        now[0] += 11
+
+        assert cache.get("hola") is None
+        assert cache.evictions == 1
+
+    def test_returns_copies(self):
+        cache = NLUResultCache()
+        cache.put("k", {"entities": {"categoria": "laptops"}})
+        cache.get("k")["entities"]["categoria"] = 1
+
+        assert cache.get("k")["entities"]["categoria"] == "laptops"
+
+    def test_skips_long_texts(self):
+        cache = NLUResultCache(max_text_length=5)
+        cache.put("mensaje largo", {"intent": "x"})
+        assert len(cache) == 0
+
+    def test_stats(self):
+        cache = NLUResultCache()
+        cache.put("k", {})
+        cache.get("k")
+        cache.get("otro")
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_rate"] == 0.5
+
+    def test_rejects_results_from_older_generation(self):
+        cache = NLUResultCache()
+        cache.set_generation((0, 1))
+        cache.put("hola", {"intent": "saludo"}, (0, 1))
+        # Un refresco del léxico mientras otra consulta estaba en vuelo
+        cache.set_generation((0, 2))
+        assert len(cache) == 0
+        cache.put("busco acer", {"entities": {}}, (0, 1))
+        assert cache.get("busco acer") is None
+        assert cache.stats()["stale_puts"] == 1
+        cache.put("busco acer", {"entities": {"marca": "acer"}}, (0, 2))
+        assert cache.get("busco acer") == {"entities": {"marca": "acer"}}
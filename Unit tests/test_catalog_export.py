@@ -0,0 +1,68 @@
+# tests/test_catalog_export.py
+import pytest
+import json
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from datetime import datetime
+from models.database import Producto
+import database.catalog_export as catalog_export
+from database.catalog_export import catalog_etag, etag_matches, iter_productos_ndjson
+
+
+@pytest.fixture
+def db(sqlite_db, sqlite_scope, monkeypatch):
+    monkeypatch.setattr(catalog_export, "session_scope", sqlite_scope)
+    session = sqlite_db
+    for i in range(1, 6):
+        session.add(Producto(id=i, nombre=f"Producto {i}", categoria_id=1, precio=10.5 * i, marca="Lenovo",
+                             stock=i, activo=True, fecha_creacion=datetime(2024, 1, i)))
+    session.commit()
+    return session
+
+
+class TestCatalogExport:
+    def test_streams_ndjson_in_chunks(self, db):
+        chunks = list(iter_productos_ndjson(chunk_size=2))
+        assert len(chunks) == 3
+        rows = [json.loads(line) for chunk in chunks for line in chunk.splitlines()]
+        assert [r["id"] for r in rows] == [1, 2, 3, 4, 5]
+        assert rows[0]["precio"] == 10.5
+        assert rows[0]["fecha_creacion"] == "2024-01-01T00:00:00"
+        assert set(rows[0]) == {"id", "nombre", "categoria_id", "precio", "descripcion",
+                                "marca", "stock", "activo", "fecha_creacion"}
+
+    def test_etag_changes_with_catalog(self, db):
+        etag = catalog_etag(db)
+        assert catalog_etag(db) == etag
+        db.add(Producto(id=6, nombre="Nuevo", categoria_id=1, precio=1, activo=True))
+        db.commit()
+        assert catalog_etag(db) != etag
+
+    def test_etag_changes_with_price_and_stock_edits(self, db):
+        etag = catalog_etag(db)
+        db.get(Producto, 2).precio = 99.9
+        db.commit()
+        con_precio = catalog_etag(db)
+        assert con_precio != etag
+        db.get(Producto, 2).stock = 0
+        db.commit()
+        assert catalog_etag(db) != con_precio
+
+    def test_etag_changes_with_same_length_text_edits(self, db):
+        etag = catalog_etag(db)
+        db.get(Producto, 3).nombre = "Producto X"
+        db.commit()
+        renombrado = catalog_etag(db)
+        assert renombrado != etag
+        db.get(Producto, 3).marca = "Lenove"
+        db.commit()
+        assert catalog_etag(db) != renombrado
+
+    def test_etag_matches(self):
+        assert etag_matches('W/"abc"', 'W/"abc"')
+        assert etag_matches('"x", "abc"', 'W/"abc"')
+        assert etag_matches("*", 'W/"abc"')
+        assert not etag_matches('"otro"', 'W/"abc"')
+        assert not etag_matches(None, 'W/"abc"')
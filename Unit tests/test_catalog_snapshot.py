@@ -0,0 +1,135 @@
+# tests/test_catalog_snapshot.py
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from unittest.mock import Mock
+from models.database import Producto, Categoria
+from database.catalog_snapshot import CatalogSnapshotStore
+from database.queries import FuncionesCRUD
+
+MARCAS = ["Lenovo", "HP", "Samsung", "Samsung Electronics", None]
+
+
+@pytest.fixture
+def db(sqlite_db):
+    session = sqlite_db
+    session.add(Categoria(id=1, nombre="Laptops", activo=True))
+    session.add(Categoria(id=2, nombre="Celulares", activo=True))
+    session.add(Categoria(id=3, nombre="Laptops gamer", categoria_padre_id=1, activo=True))
+    for i in range(1, 41):
+        session.add(Producto(id=i, nombre=f"Producto {i}", categoria_id=3 if i % 5 == 0 else 1 + i % 2, precio=(i * 37) % 1000 + 0.5,
+                             marca=MARCAS[i % len(MARCAS)], stock=i, activo=i % 7 != 0))
+    session.commit()
+    return session
+
+
+def make_store(db):
+    store = CatalogSnapshotStore(enabled=True, ttl_seconds=0)
+    store.load(db)
+    return store
+
+
+CASOS = [
+    ("buscar_producto", {"marca": "samsung"}),
+    ("buscar_producto", {"categoria": 1, "rango_precio": {"min": 100, "max": 600}}),
+    ("buscar_producto", {}),
+    ("info_producto", {"marca": "hp", "categoria": 2}),
+    ("recomendar_categoria", {"categoria": 1}),
+    ("buscar_producto", {"categoria": "laptops", "marca": "samsung"}),
+    ("comparar_precios", {"marca": "lenovo"}),
+    ("comparar_precios_web", {"categoria": 2}),
+]
+
+
+class TestCatalogSnapshot:
+    @pytest.mark.parametrize("intent,entities", CASOS)
+    def test_same_results_as_database(self, db, intent, entities):
+        con_foto = FuncionesCRUD(db, catalog=make_store(db))
+        sin_foto = FuncionesCRUD(db, catalog=CatalogSnapshotStore(enabled=False))
+
+        esperado = sin_foto.search_by_intent(intent, dict(entities))
+        obtenido = con_foto.search_by_intent(intent, dict(entities))
+        assert [p.id for p in obtenido] == [p.id for p in esperado]
+        assert [p.precio for p in obtenido] == [p.precio for p in esperado]
+        assert con_foto.count_by_intent(intent, dict(entities)) == sin_foto.count_by_intent(intent, dict(entities))
+
+    def test_answers_without_database(self, db):
+        crud = FuncionesCRUD(Mock(), catalog=make_store(db))
+        result = crud.search_by_intent("comparar_precios", {"marca": "samsung"})
+        assert len(result) == 5
+        crud.db.query.assert_not_called()
+
+    def test_category_includes_subcategories(self, db):
+        crud = FuncionesCRUD(db, catalog=make_store(db))
+        encontrados = crud.search_by_intent("buscar_producto", {"categoria": 1}, limit=40)
+        assert {p.categoria_id for p in encontrados} == {1, 3}
+        assert crud.count_by_intent("buscar_producto", {"categoria": 3}) == 8
+
+    def test_free_text_goes_to_database(self, db):
+        snapshot = make_store(db).snapshot
+        assert not snapshot.can_answer("buscar_producto", {"caracteristicas": ["pantalla grande"]})
+        assert not snapshot.can_answer("saludo", {})
+
+    def test_incremental_refresh(self, db):
+        store = make_store(db)
+        previous = store.snapshot
+        db.add(Producto(id=41, nombre="Nuevo", categoria_id=1, precio=1, marca="Xiaomi", activo=True))
+        db.commit()
+
+        assert store.refresh(db) is True
+        assert len(store.snapshot) == 41
+        assert store.snapshot.marcas[:len(previous.marcas)] == previous.marcas
+        assert [p.id for p in store.snapshot.search("comparar_precios", {"marca": "xiaomi"}, 5)] == [41]
+        assert store.refresh(db) is False
+
+    def test_deletes_rebuild(self, db):
+        store = make_store(db)
+        db.query(Producto).filter(Producto.id == 3).delete()
+        db.commit()
+
+        assert store.refresh(db) is True
+        assert 3 not in store.snapshot.ids
+
+    def test_price_and_activo_edits_rebuild(self, db):
+        store = make_store(db)
+        db.get(Producto, 2).precio = 1
+        db.get(Producto, 4).activo = False
+        db.commit()
+
+        # Sin LexiconRefresher: el refresco por TTL (full=False) ve las ediciones
+        assert store.refresh(db) is True
+        assert store.snapshot.record(1).precio == 1
+        assert store.snapshot.record(3).activo is False
+
+    def test_insert_plus_edit_is_not_incremental(self, db):
+        store = make_store(db)
+        db.get(Producto, 2).stock = 999
+        db.add(Producto(id=41, nombre="Nuevo", categoria_id=1, precio=1, marca="Xiaomi", activo=True))
+        db.commit()
+
+        assert store.refresh(db) is True
+        assert store.snapshot.record(1).stock == 999
+        assert len(store.snapshot) == 41
+
+    def test_same_length_rename_rebuilds(self, db):
+        store = make_store(db)
+        db.get(Producto, 1).marca = "Zenovo"
+        db.commit()
+
+        assert store.refresh(db) is True
+        assert store.snapshot.record(0).marca == "Zenovo"
+
+    def test_unchanged_watermark_renews_checked_at(self, db):
+        store = CatalogSnapshotStore(enabled=True, ttl_seconds=60)
+        store.load(db)
+        store.checked_at = 0.0
+        assert store.stale()
+
+        assert store.refresh(db, watermark=store.watermark) is False
+        assert not store.stale()
+
+    def test_not_loaded_is_never_stale(self):
+        # Sin foto las búsquedas van a la BD: no hay refresco por TTL que lanzar
+        assert not CatalogSnapshotStore(enabled=True, ttl_seconds=60).stale()
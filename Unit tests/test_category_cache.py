@@ -0,0 +1,109 @@
+# tests/test_category_cache.py
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Categoria, Producto
+from database.catalog_snapshot import CatalogSnapshotStore
+from database.category_cache import CategoryCache, categoria_variantes
+from database.queries import FuncionesCRUD
+
+
+@pytest.fixture
+def db(sqlite_db):
+    session = sqlite_db
+    session.add(Categoria(id=1, nombre="Electrónica", activo=True))
+    session.add(Categoria(id=2, nombre="Laptops", categoria_padre_id=1, activo=True))
+    session.add(Categoria(id=3, nombre="Celulares", categoria_padre_id=1, activo=True))
+    session.commit()
+    return session
+
+
+class TestCategoryCache:
+    def test_lookup_ignores_case_and_accents(self, db):
+        cache = CategoryCache()
+        assert cache.get_id("electronica", db=db) == 1
+        assert cache.get_id("LAPTOPS", db=db) == 2
+        assert cache.get_id("tablets", db=db) is None
+        assert cache.get_nombre(1, db=db) == "Electrónica"
+
+    def test_hierarchy(self, db):
+        cache = CategoryCache()
+        assert cache.parent_id(2, db=db) == 1
+        assert sorted(cache.children_ids(1, db=db)) == [2, 3]
+        assert cache.children_ids(2, db=db) == []
+
+    def test_subtree_closure(self, db):
+        db.add(Categoria(id=4, nombre="Laptops gamer", categoria_padre_id=2, activo=True))
+        db.commit()
+        cache = CategoryCache()
+        assert cache.subtree_ids(1, db=db) == (1, 2, 3, 4)
+        assert cache.subtree_ids(2, db=db) == (2, 4)
+        assert cache.subtree_ids(3, db=db) == (3,)
+        assert cache.ancestor_ids(4, db=db) == (2, 1)
+        # Una categoría que el cache no conoce se filtra sola
+        assert cache.subtree_ids(99, db=db) == (99,)
+
+    def test_cycles_do_not_hang(self):
+        cache = CategoryCache()
+        snapshot = cache._build([(1, "A", 2), (2, "B", 1)])
+        assert snapshot.subtree_by_id[1] == (1, 2)
+        assert snapshot.ancestors_by_id[1] == (2,)
+
+    def test_singular_and_plural_names(self, db):
+        cache = CategoryCache()
+        assert cache.get_id("laptop", db=db) == 2
+        assert cache.get_id("celular", db=db) == 3
+        assert cache.get_id("electronicas", db=db) == 1
+        assert categoria_variantes("Celulares") == {"celulares", "celular"}
+
+    def test_plural_of_words_ending_in_e(self, db):
+        assert "smartphone" in categoria_variantes("Smartphones")
+        assert "cinturon" in categoria_variantes("Cinturones")
+        assert categoria_variantes("Cables") == {"cables", "cable"}
+        db.add(Categoria(id=4, nombre="Smartphones", categoria_padre_id=1, activo=True))
+        db.commit()
+        cache = CategoryCache()
+        assert cache.get_id("smartphone", db=db) == 4
+        assert cache.get_id("smartphones", db=db) == 4
+
+    def test_crud_filters_by_subtree(self, db, monkeypatch):
+        import database.queries as queries
+        db.add(Producto(id=1, nombre="ThinkPad", categoria_id=2, precio=900, marca="Lenovo", activo=True))
+        db.add(Producto(id=2, nombre="Galaxy", categoria_id=3, precio=500, marca="Samsung", activo=True))
+        db.commit()
+        monkeypatch.setattr(queries, "categoria_cache", CategoryCache())
+        crud = FuncionesCRUD(db, catalog=CatalogSnapshotStore(enabled=False))
+
+        encontrados = crud.search_by_intent("buscar_producto", {"categoria": "electronica"})
+
+        assert [p.id for p in encontrados] == [1, 2]
+        assert crud.count_productos(categoria_id=1) == 2
+        assert [p.id for p in crud.search_by_intent("recomendar_categoria", {"categoria": "celular"})] == [2]
+
+    def test_loads_once_until_refresh(self, db):
+        cache = CategoryCache()
+        cache.load(db)
+        db.add(Categoria(id=4, nombre="Tablets", activo=True))
+        db.commit()
+        assert cache.get_id("tablets", db=db) is None
+
+        cache.refresh(db)
+        assert cache.get_id("tablets", db=db) == 4
+
+    def test_expires_after_ttl(self, db):
+        cache = CategoryCache(ttl_seconds=0.01)
+        cache.load(db)
+        db.add(Categoria(id=4, nombre="Tablets", activo=True))
+        db.commit()
+        cache._snapshot = cache._snapshot._replace(loaded_at=cache._snapshot.loaded_at - 1)
+        assert cache.get_id("tablets", db=db) == 4
+
+    def test_crud_uses_cache(self, db, monkeypatch):
+        import database.queries as queries
+        cache = CategoryCache()
+        cache.load(db)
+        monkeypatch.setattr(queries, "categoria_cache", cache)
+        # Ya cargado: no necesita la sesión
+        assert FuncionesCRUD(None).get_categoria_id("Celulares") == 3
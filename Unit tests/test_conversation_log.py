@@ -0,0 +1,119 @@
+# tests/test_conversation_log.py
+import pytest
+import asyncio
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, select, func
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from models.database import Conversacion, IntencionDetectada, UsuarioSesion
+from models.records import ProductoResumen
+from database.conversation_log import ConversationLogWriter
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    # BD propia del test en un archivo temporal, nunca la de DATABASE_URL
+    path = tmp_path / "conversaciones.db"
+    engine = create_engine(f"sqlite:///{path}")
+    for model in (UsuarioSesion, Conversacion, IntencionDetectada):
+        model.__table__.create(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(UsuarioSesion(session_id="existente", activo=True))
+        session.commit()
+    engine.dispose()
+    return path
+
+
+def run_writer(db_path, fn, **options):
+    """Corre fn(writer) y devuelve (writer, {tabla: filas})"""
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            writer = ConversationLogWriter(session_factory=async_sessionmaker(engine), enabled=True, **options)
+            await fn(writer)
+            await writer.close()
+            async with async_sessionmaker(engine)() as db:
+                counts = {
+                    model.__tablename__: (await db.execute(select(func.count()).select_from(model))).scalar()
+                    for model in (UsuarioSesion, Conversacion, IntencionDetectada)
+                }
+            return writer, counts
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+def log(writer, session_id="s1", productos=()):
+    writer.log_turn(session_id, "busco laptops", "Tengo estas laptops", "buscar_producto", 0.93,
+                    {"categoria": "laptops"}, list(productos), ip_address="127.0.0.1")
+
+
+class TestConversationLogWriter:
+    def test_batches_by_size_and_drains_on_close(self, db_path):
+        async def fn(writer):
+            for i in range(7):
+                log(writer, session_id=f"s{i % 2}")
+
+        writer, counts = run_writer(db_path, fn, batch_size=3, flush_ms=10_000)
+
+        assert counts == {"usuarios_sesiones": 3, "conversaciones": 7, "intenciones_detectadas": 7}
+        assert writer.written == 7
+        assert writer.batches == 3
+
+    def test_flushes_after_interval(self, db_path):
+        async def fn(writer):
+            log(writer)
+            await asyncio.sleep(0.2)
+            assert writer.written == 1
+
+        run_writer(db_path, fn, batch_size=100, flush_ms=10)
+
+    def test_drops_when_queue_is_full(self, db_path):
+        async def fn(writer):
+            # Sin ceder el event loop el worker no llega a vaciar la cola
+            for _ in range(5):
+                log(writer)
+
+        writer, counts = run_writer(db_path, fn, max_pending=3)
+
+        assert writer.dropped == 2
+        assert counts["conversaciones"] == 3
+
+    def test_existing_session_and_row_contents(self, db_path):
+        producto = ProductoResumen(id=4, nombre="Laptop", marca="HP", precio=500, stock=1,
+                                   categoria_id=1, activo=True)
+
+        async def fn(writer):
+            log(writer, session_id="existente", productos=[producto])
+            log(writer, session_id=None)
+
+        writer, counts = run_writer(db_path, fn)
+
+        assert writer.failed == 0
+        assert counts == {"usuarios_sesiones": 1, "conversaciones": 2, "intenciones_detectadas": 2}
+        engine = create_engine(f"sqlite:///{db_path}")
+        with sessionmaker(bind=engine)() as session:
+            intencion = session.query(IntencionDetectada).filter_by(session_id="existente").one()
+            conversacion = session.query(Conversacion).filter_by(session_id="existente").one()
+        engine.dispose()
+        assert intencion.productos_consultados == [4]
+        assert intencion.resultado_exitoso is True
+        assert conversacion.entidades_extraidas == {"categoria": "laptops"}
+
+    def test_write_errors_do_not_reach_the_caller(self):
+        def broken_session():
+            raise RuntimeError("BD caída")
+
+        async def main():
+            writer = ConversationLogWriter(session_factory=broken_session, enabled=True)
+            log(writer)
+            await writer.close()
+            return writer
+
+        writer = asyncio.run(main())
+
+        assert writer.failed == 1
+        assert writer.written == 0
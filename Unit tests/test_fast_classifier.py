@@ -0,0 +1,48 @@
+# tests/test_fast_classifier.py
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlu.fast_classifier import HashedNgramClassifier
+from nlu.spacy_intent_classifier import MLIntentClassifier
+
+LABELS = ["saludo", "buscar_producto"]
+TEXTS = ["Hola", "Hola, buenos días", "Buenas tardes", "Busco laptops", "Quiero ver celulares", "Busco tablets Samsung"]
+TARGETS = np.array([[1, 0], [1, 0], [1, 0], [0, 1], [0, 1], [0, 1]], dtype=np.float32)
+
+
+class TestHashedNgramClassifier:
+    def setup_method(self):
+        self.classifier = HashedNgramClassifier(LABELS, n_features=2 ** 12).fit(TEXTS, TARGETS)
+
+    def test_predicts_training_labels(self):
+        assert self.classifier.predict("hola buenos dias")[0] == "saludo"
+        assert self.classifier.predict("busco celulares")[0] == "buscar_producto"
+
+    def test_probabilities_sum_to_one(self):
+        probs = self.classifier.predict_proba("algo distinto")
+        assert probs.shape == (2,)
+        assert probs.sum() == pytest.approx(1.0, abs=1e-5)
+
+    def test_save_and_load(self, tmp_path):
+        path = str(tmp_path / "fast.npz")
+        self.classifier.save(path)
+        loaded = HashedNgramClassifier.load(path)
+        assert loaded.labels == LABELS
+        np.testing.assert_allclose(loaded.predict_proba("hola"), self.classifier.predict_proba("hola"))
+
+
+class TestIntentCascade:
+    def test_confident_fast_tier_skips_spacy(self, tmp_path):
+        path = str(tmp_path / "fast.npz")
+        HashedNgramClassifier(LABELS, n_features=2 ** 12).fit(TEXTS, TARGETS, epochs=60).save(path)
+        classifier = MLIntentClassifier(fast_classifier_path=path, fast_threshold=0.6)
+
+        intent, confidence = classifier.classify("Hola, buenos días")
+
+        assert intent == "saludo"
+        assert confidence >= 0.6
+        assert classifier.fast_hits == 1
+        assert classifier.spacy_calls == 0
@@ -0,0 +1,49 @@
+# tests/test_fuzzy_index.py
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlu.fuzzy_index import FuzzyIndex, bounded_distance
+
+
+class TestFuzzyIndex:
+    def setup_method(self):
+        self.index = FuzzyIndex(["samsung", "lenovo", "celulares", "lg", "hp", "samsung galaxy"])
+
+    def test_exact_match_has_distance_zero(self):
+        assert self.index.lookup("lenovo") == ("lenovo", 0)
+
+    def test_tolerates_typos_and_transpositions(self):
+        assert self.index.lookup("lenobo") == ("lenovo", 1)
+        assert self.index.lookup("samsumg") == ("samsung", 1)
+        assert self.index.lookup("celulres") == ("celulares", 1)
+
+    def test_short_terms_only_match_exactly(self):
+        assert self.index.lookup("lg") == ("lg", 0)
+        assert self.index.lookup("la") is None
+
+    def test_rejects_distant_words(self):
+        assert self.index.lookup("precio") is None
+        assert self.index.best_match(["hola", "que", "tal"]) is None
+
+    def test_typo_keeps_first_letter(self):
+        index = FuzzyIndex(["acer"])
+        assert index.lookup("hacer") is None
+        assert index.lookup("acre") == ("acer", 1)
+
+    def test_ignored_words_only_match_exactly(self):
+        index = FuzzyIndex(["casio", "casi"], ignore={"casi", "caso"})
+        assert index.lookup("caso") is None
+        assert index.lookup("casi") == ("casi", 0)
+
+    def test_best_match_over_word_groups(self):
+        assert self.index.best_match(["busco", "samsumg", "galaxy"]) == "samsung galaxy"
+
+    def test_returns_mapped_value(self):
+        index = FuzzyIndex({"hewlett packard": "Hewlett-Packard"})
+        assert index.lookup("hewlet packard") == ("Hewlett-Packard", 1)
+
+    def test_bounded_distance(self):
+        assert bounded_distance("samsumg", "samsung", 2) == 1
+        assert bounded_distance("abcdef", "uvwxyz", 2) == 3
@@ -0,0 +1,32 @@
+# tests/test_gazetteer.py
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlu.gazetteer import Gazetteer
+
+
+class TestGazetteer:
+    def setup_method(self):
+        self.gazetteer = Gazetteer(["lg", "samsung", "samsung galaxy", "laptop", "laptops", "hp"])
+
+    def test_longest_match_wins(self):
+        assert self.gazetteer.longest_match("busco un samsung galaxy nuevo") == "samsung galaxy"
+        assert self.gazetteer.longest_match("quiero ver laptops") == "laptops"
+
+    def test_respects_word_boundaries(self):
+        assert self.gazetteer.longest_match("algo barato") is None
+        assert self.gazetteer.longest_match("televisor lg") == "lg"
+
+    def test_find_all_returns_positions(self):
+        matches = self.gazetteer.find_all("laptop hp")
+        assert (0, 6, "laptop") in matches
+        assert (7, 9, "hp") in matches
+
+    def test_empty_gazetteer(self):
+        assert Gazetteer([]).longest_match("hola") is None
+
+    def test_returns_mapped_value(self):
+        gazetteer = Gazetteer({"hewlettpackard": "hewlett-packard"})
+        assert gazetteer.longest_match("laptop hewlettpackard") == "hewlett-packard"
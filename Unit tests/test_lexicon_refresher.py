@@ -0,0 +1,144 @@
+# tests/test_lexicon_refresher.py
+import pytest
+import sys
+import os
+from unittest.mock import Mock
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Producto, Categoria
+from database.catalog_snapshot import CatalogSnapshotStore
+from database.catalog_watermark import shared_watermark
+import nlu.lexicon_refresher as lexicon_refresher
+import nlu.spacy_entity_extractor as spacy_entity_extractor
+from nlu.lexicon_refresher import LexiconRefresher
+from nlu.spacy_entity_extractor import EntityExtractor
+
+
+@pytest.fixture
+def catalog_db(sqlite_db, sqlite_scope, monkeypatch):
+    monkeypatch.setattr(lexicon_refresher, "session_scope", sqlite_scope)
+    monkeypatch.setattr(spacy_entity_extractor, "session_scope", sqlite_scope)
+    db = sqlite_db
+    db.add(Categoria(id=1, nombre="Electronica", activo=True))
+    db.add(Producto(id=1, nombre="Laptop", categoria_id=1, precio=100, marca="Lenovo", activo=True))
+    db.commit()
+    return db
+
+
+class TestLexiconRefresher:
+    def test_no_changes_no_reload(self, catalog_db):
+        extractor = EntityExtractor()
+        refresher = LexiconRefresher(extractor, full_reload_every=0)
+        refresher.prime()
+        extractor.load()
+        version = extractor.version
+
+        assert refresher.refresh_once() is False
+        assert extractor.version == version
+
+    def test_stores_share_the_cycle_watermark(self, catalog_db, monkeypatch):
+        store = CatalogSnapshotStore(enabled=True, ttl_seconds=60)
+        store.load(catalog_db)
+        store.checked_at = 0.0
+        monkeypatch.setattr(lexicon_refresher, "catalog_snapshot", store)
+        monkeypatch.setattr(lexicon_refresher, "read_watermark", Mock(wraps=lexicon_refresher.read_watermark))
+        extractor = EntityExtractor()
+        refresher = LexiconRefresher(extractor, full_reload_every=0)
+        refresher.prime()
+        extractor.load()
+
+        # Sin cambios: una sola lectura por ciclo y la foto no vence por TTL
+        lexicon_refresher.read_watermark.reset_mock()
+        assert refresher.refresh_once() is False
+        assert lexicon_refresher.read_watermark.call_count == 1
+        assert not store.stale()
+        assert shared_watermark.value == refresher.watermark
+
+    def test_inserted_products_add_brands(self, catalog_db):
+        extractor = EntityExtractor()
+        aviso = Mock()
+        refresher = LexiconRefresher(extractor, full_reload_every=0, on_refresh=aviso)
+        refresher.prime()
+        extractor.load()
+        matcher = extractor.lexicon.categorias_matcher
+
+        catalog_db.add(Producto(id=2, nombre="Celular", categoria_id=1, precio=50, marca="Xiaomi", activo=True))
+        catalog_db.commit()
+
+        assert refresher.refresh_once() is True
+        aviso.assert_called_once()
+        assert set(extractor.marcas) == {"lenovo", "xiaomi"}
+        assert extractor.extract("busco xiaomi")["marca"] == "xiaomi"
+        # Las categorías no cambiaron: se reutiliza el autómata anterior
+        assert extractor.lexicon.categorias_matcher is matcher
+
+    def test_deactivated_product_reloads_brands(self, catalog_db):
+        extractor = EntityExtractor()
+        refresher = LexiconRefresher(extractor, full_reload_every=0)
+        refresher.prime()
+        extractor.load()
+
+        catalog_db.query(Producto).filter(Producto.id == 1).update({"activo": False})
+        catalog_db.commit()
+
+        assert refresher.refresh_once() is True
+        assert extractor.marcas == []
+
+    def test_same_length_renames_reach_gazetteers(self, catalog_db):
+        extractor = EntityExtractor()
+        refresher = LexiconRefresher(extractor, full_reload_every=0)
+        refresher.prime()
+        extractor.load()
+
+        catalog_db.get(Producto, 1).marca = "Lenova"
+        catalog_db.get(Categoria, 1).nombre = "Electronico"
+        catalog_db.commit()
+
+        # Sin recarga completa periódica: el watermark ve los renombres del mismo largo
+        assert refresher.refresh_once() is True
+        assert extractor.marcas == ["lenova"]
+        assert "electronico" in extractor.categorias
+        assert "electronica" not in extractor.categorias
+
+    def test_failed_reload_keeps_previous_lexicon(self, catalog_db, monkeypatch):
+        extractor = EntityExtractor()
+        refresher = LexiconRefresher(extractor, full_reload_every=1)
+        refresher.prime()
+        extractor.load()
+        watermark = refresher.watermark
+
+        def caida():
+            raise RuntimeError("BD caída")
+        monkeypatch.setattr(extractor, "_load_marcas_from_db", caida)
+
+        extractor.refresh_entities()
+        with pytest.raises(RuntimeError):
+            refresher.refresh_once()
+
+        # Ni las listas de respaldo ni un watermark nuevo: el próximo ciclo reintenta
+        assert extractor.marcas == ["lenovo"]
+        assert extractor.from_db is True
+        assert refresher.watermark == watermark
+
+    def test_fallback_only_on_first_load_until_db_answers(self, catalog_db, monkeypatch):
+        extractor = EntityExtractor()
+        refresher = LexiconRefresher(extractor, full_reload_every=0)
+        refresher.prime()
+        cargar = extractor._load_marcas_from_db
+        caida = [True]
+
+        def marcas():
+            if caida[0]:
+                raise RuntimeError("BD caída")
+            return cargar()
+        monkeypatch.setattr(extractor, "_load_marcas_from_db", marcas)
+
+        extractor.load()
+        assert extractor.from_db is False
+        assert "samsung" in extractor.marcas
+
+        caida[0] = False
+        # Sin cambios en el catálogo igual se recarga todo: el léxico era el de respaldo
+        assert refresher.refresh_once() is True
+        assert extractor.from_db is True
+        assert extractor.marcas == ["lenovo"]
@@ -38,6 +38,45 @@ class TestNLUProcessor:
         assert result["intent"] == "ayuda"
         assert result["confidence"] > 0.5
 
+    def test_process_batch_returns_one_result_per_text(self):
+        results = self.nlu.process_batch(["Hola", "Busco laptops Lenovo"])
+        assert len(results) == 2
+        for result in results:
+            assert "intent" in result
+            assert "entities" in result
+            assert "confidence" in result
+
+    def test_repeated_messages_hit_cache(self):
+        first = self.nlu.process("Busco laptops Lenovo")
+        first["entities"]["categoria"] = 1  # los llamadores mutan el resultado
+        second = self.nlu.process("busco LAPTOPS lenovo")
+        assert self.nlu.cache.hits == 1
+        assert second["entities"].get("categoria") != 1
+
+    def test_refresh_entities_invalidates_cache(self, monkeypatch):
+        self.nlu.process("Hola")
+        # Recarga que sí llega a la BD (si falla se conserva el léxico y el cache)
+        monkeypatch.setattr(self.nlu.entity_extractor, "_load_marcas_from_db", lambda: ["lenovo"])
+        monkeypatch.setattr(self.nlu.entity_extractor, "_load_categorias_from_db", lambda: ["laptops"])
+        self.nlu.entity_extractor.refresh_entities()
+        self.nlu.process("Hola")
+        assert self.nlu.cache.hits == 0
+
+    def test_result_computed_before_refresh_is_not_cached(self, monkeypatch):
+        extractor = self.nlu.entity_extractor
+        extractor._lexicon = extractor._build_lexicon(["lenovo"], ["laptops"])
+        extract = extractor.extract
+
+        def extract_y_refresco(text):
+            entities = extract(text)
+            # El LexiconRefresher publica un léxico nuevo mientras esta consulta sigue en vuelo
+            extractor.update_lexicon(marcas=["lenovo", "acer"])
+            return entities
+        monkeypatch.setattr(extractor, "extract", extract_y_refresco)
+
+        self.nlu.process("busco acer")
+        assert len(self.nlu.cache) == 0
+
     def test_low_confidence_handling(self):
         result = self.nlu.process("sdkfjsldfkjslkdfj")
         assert result["confidence"] < 0.7
@@ -80,4 +119,24 @@ class TestEntityExtractor:
 
     def test_normalize_text(self):
         normalized = self.extractor.normalize("TEXTO EN MAYÚSCULAS")
-        assert normalized == "texto en mayusculas"
\ No newline at end of file
+        assert normalized == "texto en mayusculas"
+
+    def test_extract_uses_word_boundaries(self):
+        self.extractor._lexicon = self.extractor._build_lexicon(["lg", "lenovo"], ["laptops"])
+        assert "marca" not in self.extractor.extract("algo para regalar")
+        entities = self.extractor.extract("Busco laptops Lenovo")
+        assert entities["marca"] == "lenovo"
+        assert entities["categoria"] == "laptops"
+
+    def test_extract_tolerates_typos(self):
+        self.extractor._lexicon = self.extractor._build_lexicon(["samsung", "lenovo", "lg"], ["celulares", "laptops"])
+        entities = self.extractor.extract("busco celulres samsumg")
+        assert entities["marca"] == "samsung"
+        assert entities["categoria"] == "celulares"
+        assert "marca" not in self.extractor.extract("hola que tal")
+
+    def test_common_words_are_not_typos(self):
+        self.extractor._lexicon = self.extractor._build_lexicon(["acer", "casio", "asus", "apple"], ["laptops"])
+        for texto in ["que puedo hacer aqui", "casi nada", "quiero saber como comprar", "puedes ayudar"]:
+            assert "marca" not in self.extractor.extract(texto), texto
+        assert self.extractor.extract("reloj cassio")["marca"] == "casio"
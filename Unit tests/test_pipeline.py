@@ -0,0 +1,52 @@
+# tests/test_pipeline.py
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlu.pipeline import resolve_profile_components
+from nlu import config
+
+
+class TestPipelineProfiles:
+    def test_intent_only_keeps_textcat(self):
+        # textcat tiene su propio tok2vec, no depende de otros componentes
+        assert resolve_profile_components(config.MODEL_PATH, "intent-only") == {"textcat"}
+
+    def test_full_profile_loads_everything(self):
+        assert resolve_profile_components(config.MODEL_PATH, "full") is None
+
+    def test_listener_pulls_upstream_tok2vec(self, monkeypatch):
+        monkeypatch.setitem(config.PIPELINE_PROFILES, "parse", ["parser"])
+        assert resolve_profile_components(config.MODEL_PATH, "parse") == {"parser", "tok2vec"}
+
+    def test_unknown_profile(self):
+        with pytest.raises(ValueError):
+            resolve_profile_components(config.MODEL_PATH, "no-existe")
+
+
+class TestSharedVectors:
+    def _nlp_with_vectors(self):
+        import numpy as np
+        import spacy
+        from spacy.vectors import Vectors
+        nlp = spacy.blank("es")
+        keys = [nlp.vocab.strings.add(w) for w in ["hola", "laptop", "celular", "mundo"]]
+        nlp.vocab.vectors = Vectors(data=np.random.rand(4, 8).astype("float32"), keys=keys)
+        return nlp
+
+    def test_export_prunes_to_seen_words(self, tmp_path):
+        from nlu.vectors import export_vectors
+        meta = export_vectors(self._nlp_with_vectors(), ["Hola laptop"], str(tmp_path))
+        assert meta["rows"] == 2
+        assert meta["original_rows"] == 4
+
+    def test_install_uses_memory_map(self, tmp_path):
+        import numpy as np
+        import spacy
+        from nlu.vectors import export_vectors, install_shared_vectors
+        export_vectors(self._nlp_with_vectors(), ["hola laptop celular"], str(tmp_path), dtype="float16")
+        nlp = spacy.blank("es")
+        install_shared_vectors(nlp, str(tmp_path))
+        assert isinstance(nlp.vocab.vectors.data, np.memmap)
+        assert nlp("laptop")[0].has_vector
@@ -0,0 +1,54 @@
+# tests/test_pool_metrics.py
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from database.connection import pool_options
+from database.pool_metrics import InstrumentedQueuePool, pool_status, sync_pool_stats
+
+
+class TestPoolMetrics:
+    def setup_method(self):
+        sync_pool_stats.reset()
+
+    def make_engine(self, tmp_path, **kwargs):
+        # BD propia del test en un archivo temporal
+        return create_engine(f"sqlite:///{tmp_path / 'pool.db'}", poolclass=InstrumentedQueuePool, **kwargs)
+
+    def test_counts_checkouts_and_usage(self, tmp_path):
+        engine = self.make_engine(tmp_path, pool_size=2, max_overflow=0)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            status = pool_status(engine)
+            assert status["checked_out"] == 1
+            assert status["size"] == 2
+        assert pool_status(engine)["checked_out"] == 0
+        assert pool_status(engine)["checkouts"] == 1
+        engine.dispose()
+
+    def test_counts_timeouts(self, tmp_path):
+        engine = self.make_engine(tmp_path, pool_size=1, max_overflow=0, pool_timeout=0.05)
+        with engine.connect():
+            with pytest.raises(PoolTimeoutError):
+                engine.connect()
+        status = pool_status(engine)
+        assert status["timeouts"] == 1
+        assert status["wait_max_ms"] >= 50
+        engine.dispose()
+
+    def test_stats_survive_dispose(self, tmp_path):
+        engine = self.make_engine(tmp_path, pool_size=1)
+        with engine.connect():
+            pass
+        engine.dispose()
+        with engine.connect():
+            pass
+        assert pool_status(engine)["checkouts"] == 2
+        engine.dispose()
+
+    def test_pool_options(self):
+        assert pool_options("sqlite://") == {}
+        assert "pool_size" in pool_options("postgresql://u:p@localhost/db")
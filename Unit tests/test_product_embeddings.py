@@ -0,0 +1,124 @@
+# tests/test_product_embeddings.py
+import pytest
+import sys
+import os
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from spacy.strings import hash_string
+from spacy.vectors import Vectors
+from models.database import Producto, Categoria
+from database.product_embeddings import ProductEmbeddings, ProductEmbeddingStore, text_vector
+from database.queries import FuncionesCRUD
+from nlu.vectors import WordVectorSource
+
+# Vectores de juguete: computadoras, teléfonos y calzado en ejes distintos
+WORDS = {
+    "laptop": [1.0, 0.1, 0.0],
+    "computadora": [0.9, 0.2, 0.0],
+    "portátil": [0.8, 0.0, 0.1],
+    "celular": [0.0, 1.0, 0.1],
+    "teléfono": [0.1, 0.9, 0.0],
+    "camara": [0.1, 0.8, 0.1],
+    "zapatilla": [0.0, 0.0, 1.0],
+    "running": [0.1, 0.0, 0.9],
+}
+
+ROWS = [
+    (1, "Laptop Lenovo", "Laptop para oficina"),
+    (2, "Celular Samsung", "Teléfono con cámara"),
+    (3, "Zapatilla Nike", "Zapatilla de running"),
+    (4, "Mouse Logitech", "Inalámbrico"),
+]
+
+
+@pytest.fixture
+def word_vectors():
+    data = np.asarray(list(WORDS.values()), dtype=np.float32)
+    vectors = Vectors(data=data, keys=[hash_string(w) for w in WORDS])
+    return WordVectorSource.from_spacy(vectors)
+
+
+@pytest.fixture
+def db(sqlite_db):
+    session = sqlite_db
+    session.add(Categoria(id=1, nombre="Varios", activo=True))
+    for producto_id, nombre, descripcion in ROWS:
+        session.add(Producto(id=producto_id, nombre=nombre, descripcion=descripcion, categoria_id=1,
+                             precio=100 * producto_id, marca=nombre.split()[1], activo=True))
+    session.commit()
+    return session
+
+
+def make_store(db, word_vectors):
+    store = ProductEmbeddingStore(enabled=True, ttl_seconds=0, word_vectors=word_vectors)
+    store.load(db)
+    return store
+
+
+class TestTextVector:
+    def test_normalized_average_of_known_words(self, word_vectors):
+        vector = text_vector("Busco una computadora laptop", word_vectors)
+        assert np.linalg.norm(vector) == pytest.approx(1.0)
+        assert vector[0] > 0.9
+
+    def test_falls_back_to_word_without_accent(self, word_vectors):
+        # "cámara" no está en la tabla, "camara" sí
+        assert np.allclose(text_vector("Cámara", word_vectors), text_vector("camara", word_vectors))
+
+    def test_unknown_words_give_none(self, word_vectors):
+        assert text_vector("quiero algo bonito", word_vectors) is None
+
+
+class TestProductEmbeddings:
+    def test_top_k_orders_by_similarity(self, word_vectors):
+        embeddings = ProductEmbeddings.from_rows(ROWS, word_vectors)
+        top = embeddings.top_k("computadora portátil", 2, min_score=0.0)
+        assert [producto_id for producto_id, _ in top][0] == 1
+        assert top[0][1] > top[1][1]
+
+    def test_min_score_filters_unrelated(self, word_vectors):
+        embeddings = ProductEmbeddings.from_rows(ROWS, word_vectors)
+        assert [pid for pid, _ in embeddings.top_k("celular", 5, min_score=0.5)] == [2]
+
+    def test_extend_matches_full_build(self, word_vectors):
+        incremental = ProductEmbeddings.from_rows(ROWS[:2], word_vectors).extend(ROWS[2:])
+        completo = ProductEmbeddings.from_rows(ROWS, word_vectors)
+        assert incremental.ids.tolist() == completo.ids.tolist()
+        assert np.allclose(incremental.matrix, completo.matrix)
+        assert incremental.max_id == 4
+
+    def test_float16_matrix(self, word_vectors):
+        embeddings = ProductEmbeddings.from_rows(ROWS, word_vectors, dtype="float16")
+        assert embeddings.matrix.dtype == np.float16
+        assert embeddings.top_k("zapatilla running", 1)[0][0] == 3
+
+
+class TestSemanticSearch:
+    def test_store_without_vectors_does_not_load(self, db):
+        store = ProductEmbeddingStore(enabled=True, ttl_seconds=0)
+        store.load(db)
+        assert store.snapshot is None
+        assert FuncionesCRUD(db, embeddings=store).semantic_search("laptop") == []
+
+    def test_returns_similar_active_products(self, db, word_vectors):
+        crud = FuncionesCRUD(db, embeddings=make_store(db, word_vectors))
+        productos = crud.semantic_search("necesito una computadora portátil")
+        assert [p.id for p in productos] == [1]
+
+    def test_inactive_products_are_excluded(self, db, word_vectors):
+        store = make_store(db, word_vectors)
+        db.get(Producto, 2).activo = False
+        db.commit()
+        assert FuncionesCRUD(db, embeddings=store).semantic_search("celular") == []
+
+    def test_incremental_refresh(self, db, word_vectors):
+        store = make_store(db, word_vectors)
+        db.add(Producto(id=5, nombre="Teléfono Motorola", descripcion="celular", categoria_id=1,
+                        precio=500, marca="Motorola", activo=True))
+        db.commit()
+
+        assert store.refresh(db) is True
+        assert store.snapshot.max_id == 5
+        productos = FuncionesCRUD(db, embeddings=store).semantic_search("teléfono celular", limit=2)
+        assert sorted(p.id for p in productos) == [2, 5]
@@ -0,0 +1,113 @@
+# tests/test_product_ranking.py
+import pytest
+import sys
+import os
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.database import Producto, Categoria
+from database.catalog_snapshot import CatalogSnapshotStore
+from database.product_ranking import BM25Index, ProductRankingStore, tokenize
+from database.queries import FuncionesCRUD
+
+ROWS = [
+    (1, "Laptop Lenovo IdeaPad", "Laptop liviana para oficina"),
+    (2, "Laptop HP Victus", "Laptop gamer con pantalla grande de 16 pulgadas y teclado RGB"),
+    (3, "Celular Samsung Galaxy", "Pantalla AMOLED y cámara de 50 MP"),
+    (4, "Laptop Lenovo Legion", "Laptop gamer, pantalla grande de 17 pulgadas, RTX 4060"),
+    (5, "Mouse Logitech", "Mouse inalámbrico"),
+]
+
+
+@pytest.fixture
+def db(sqlite_db):
+    session = sqlite_db
+    session.add(Categoria(id=1, nombre="Electrónica", activo=True))
+    for producto_id, nombre, descripcion in ROWS:
+        session.add(Producto(id=producto_id, nombre=nombre, descripcion=descripcion, categoria_id=1,
+                             precio=100 * producto_id, marca=nombre.split()[1], activo=True))
+    session.commit()
+    return session
+
+
+def make_ranking(db):
+    store = ProductRankingStore(enabled=True, ttl_seconds=0)
+    store.load(db)
+    return store
+
+
+class TestTokenize:
+    def test_folds_accents_plurals_and_stopwords(self):
+        assert tokenize("Busco las Cámaras más baratas") == ["camara", "barata"]
+        assert tokenize("celulares con pantallas") == ["celular", "pantalla"]
+        assert tokenize("smartphones") == tokenize("smartphone")
+        assert tokenize("cables") == tokenize("cable") == ["cable"]
+
+
+class TestBM25Index:
+    def test_ranks_by_relevance(self):
+        index = BM25Index.from_rows(ROWS)
+        assert index.top_ids("laptop gamer con pantalla grande", [1, 2, 3, 4, 5], 2) == [2, 4]
+        assert index.top_ids("pantalla amoled", [1, 2, 3, 4, 5], 1) == [3]
+
+    def test_only_candidates_and_fills_with_unscored(self):
+        index = BM25Index.from_rows(ROWS)
+        assert index.top_ids("gamer", [1, 4, 5], 3) == [4, 1, 5]
+        assert index.top_ids("nada que ver", [5, 3], 5) == [5, 3]
+
+    def test_extend_matches_full_build(self):
+        incremental = BM25Index.from_rows(ROWS[:3]).extend(ROWS[3:])
+        completo = BM25Index.from_rows(ROWS)
+        assert incremental.scores("laptop pantalla") == pytest.approx(completo.scores("laptop pantalla"))
+        assert incremental.max_id == 5
+
+    def test_extend_does_not_touch_previous_index(self):
+        previo = BM25Index.from_rows(ROWS[:2])
+        previo.extend([(9, "Laptop nueva", "")])
+        assert 9 not in previo.postings["laptop"]
+        assert len(previo) == 2
+
+
+class TestRankedSearch:
+    @pytest.mark.parametrize("con_foto", [True, False])
+    def test_search_returns_most_relevant_first(self, db, con_foto):
+        catalog = CatalogSnapshotStore(enabled=con_foto, ttl_seconds=0)
+        catalog.load(db)
+        crud = FuncionesCRUD(db, catalog=catalog, ranking=make_ranking(db))
+
+        texto = "quiero una laptop gamer con pantalla grande"
+        productos = crud.search_by_intent("buscar_producto", {"categoria": 1}, limit=3, texto=texto)
+
+        assert [p.id for p in productos] == [2, 4, 1]
+
+    def test_without_text_keeps_id_order(self, db):
+        crud = FuncionesCRUD(db, catalog=CatalogSnapshotStore(enabled=False), ranking=make_ranking(db))
+        productos = crud.search_by_intent("buscar_producto", {"categoria": 1}, limit=3)
+        assert [p.id for p in productos] == [1, 2, 3]
+
+    def test_incremental_refresh(self, db):
+        ranking = make_ranking(db)
+        db.add(Producto(id=6, nombre="Laptop gamer ASUS ROG", descripcion="pantalla grande", categoria_id=1,
+                        precio=999, marca="ASUS", activo=True))
+        db.commit()
+
+        assert ranking.refresh(db) is True
+        assert ranking.snapshot.max_id == 6
+        crud = FuncionesCRUD(db, catalog=CatalogSnapshotStore(enabled=False), ranking=ranking)
+        productos = crud.search_by_intent("info_producto", {"marca": "asus"}, texto="laptop gamer asus")
+        assert [p.id for p in productos] == [6]
+
+    def test_database_fallback_finds_rows_beyond_first_page(self, db):
+        # Más filas que MAX_PAGE_SIZE: lo relevante no está entre los primeros ids
+        for i in range(6, 160):
+            db.add(Producto(id=i, nombre=f"Accesorio {i}", descripcion="cable usb", categoria_id=1,
+                            precio=10, marca="Genérico", activo=True))
+        db.add(Producto(id=160, nombre="Proyector Epson", descripcion="proyector full hd", categoria_id=1,
+                        precio=700, marca="Epson", activo=True))
+        db.commit()
+        crud = FuncionesCRUD(db, catalog=CatalogSnapshotStore(enabled=False), ranking=make_ranking(db))
+
+        productos = crud.search_by_intent("buscar_producto", {"categoria": 1}, limit=3, texto="proyector full hd")
+
+        assert productos[0].id == 160
+        # Sin más coincidencias se completa con los primeros por id
+        assert [p.id for p in productos[1:]] == [1, 2]
@@ -83,6 +83,16 @@ class TestPromptBuilder:
         assert "999.99" in context
         assert "10 unidades" in context
 
+    def test_build_context_uses_total_for_paged_results(self):
+        mock_producto = Mock()
+        mock_producto.nombre = "iPhone 15"
+        db_results = [mock_producto] * 10
+
+        context = self.builder.build_context("buscar_producto", {}, db_results, total=250)
+
+        assert "250 resultados" in context
+        assert "... y 240 productos más" in context
+
     def test_build_context_no_db_results(self):
         entities = {"marca": "Desconocida"}
         db_results = []
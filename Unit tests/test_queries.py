@@ -5,13 +5,24 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from database.queries import FuncionesCRUD
+from database.category_cache import CategoryCache
+from database.catalog_snapshot import COLUMNS
+from database.queries import FuncionesCRUD, MAX_PAGE_SIZE
 from models.database import Producto, Categoria
+from models.records import ProductoResumen
 
 class TestFuncionesCRUD:
     def setup_method(self):
         self.mock_db = Mock()
         self.crud = FuncionesCRUD(self.mock_db)
+        # Cache de categorías ya cargado: la sesión mock no debe usarse para cargarlo
+        cache = CategoryCache()
+        cache._snapshot = cache._build([(1, "Electrónica", None), (2, "Laptops", 1)])
+        self.cache_patch = patch("database.queries.categoria_cache", cache)
+        self.cache_patch.start()
+
+    def teardown_method(self):
+        self.cache_patch.stop()
 
     @patch.object(FuncionesCRUD, 'get_categoria_id')
     def test_search_by_intent_buscar_producto(self, mock_get_categoria_id):
@@ -19,6 +30,8 @@ class TestFuncionesCRUD:
         mock_query = Mock()
         self.mock_db.query.return_value = mock_query
         mock_query.filter.return_value = mock_query
+        mock_query.order_by.return_value = mock_query
+        mock_query.limit.return_value = mock_query
         mock_query.all.return_value = []
         mock_get_categoria_id.return_value = 1
 
@@ -26,7 +39,8 @@ class TestFuncionesCRUD:
         result = self.crud.search_by_intent("buscar_producto", entities)
 
         assert isinstance(result, list)
-        self.mock_db.query.assert_called_with(Producto)
+        # Solo las columnas del resumen, no el Producto completo
+        self.mock_db.query.assert_called_with(*COLUMNS)
 
     def test_search_by_intent_recomendar_categoria(self):
         mock_query = Mock()
@@ -100,9 +114,54 @@ class TestFuncionesCRUD:
         mock_query = Mock()
         self.mock_db.query.return_value = mock_query
         mock_query.filter.return_value = mock_query
+        mock_query.order_by.return_value = mock_query
+        mock_query.limit.return_value = mock_query
         mock_query.all.return_value = []
 
         result = self.crud.listar_productos()
 
         assert isinstance(result, list)
-        self.mock_db.query.assert_called_with(Producto)
\ No newline at end of file
+        self.mock_db.query.assert_called_with(Producto)
+
+
+class TestPaginatedSearch:
+    @pytest.fixture(autouse=True)
+    def setup(self, sqlite_db):
+        self.db = sqlite_db
+        self.db.add(Categoria(id=1, nombre="Laptops", activo=True))
+        for i in range(1, 26):
+            self.db.add(Producto(id=i, nombre=f"Laptop {i}", categoria_id=1, precio=100 + i,
+                                 marca="Lenovo" if i % 2 else "HP", activo=True))
+        self.db.commit()
+        self.crud = FuncionesCRUD(self.db)
+
+    def test_search_is_bounded(self):
+        result = self.crud.search_by_intent("buscar_producto", {"categoria": 1})
+        assert len(result) == 10
+        assert self.crud.count_by_intent("buscar_producto", {"categoria": 1}) == 25
+
+    def test_keyset_and_offset_pages_match(self):
+        first = self.crud.search_by_intent("buscar_producto", {"marca": "lenovo"}, limit=5)
+        by_cursor = self.crud.search_by_intent("buscar_producto", {"marca": "lenovo"}, limit=5, after_id=first[-1].id)
+        by_offset = self.crud.search_by_intent("buscar_producto", {"marca": "lenovo"}, limit=5, offset=5)
+        assert [p.id for p in by_cursor] == [p.id for p in by_offset] == [11, 13, 15, 17, 19]
+        assert self.crud.count_by_intent("buscar_producto", {"marca": "lenovo"}) == 13
+
+    def test_listar_productos_pages(self):
+        assert len(self.crud.listar_productos(limit=MAX_PAGE_SIZE + 50)) == 25
+        page = self.crud.listar_productos(limit=10, after_id=20, categoria_id=1)
+        assert [p.id for p in page] == [21, 22, 23, 24, 25]
+        assert self.crud.count_productos(categoria_id=1) == 25
+
+    def test_search_returns_lightweight_records(self):
+        result = self.crud.search_by_intent("buscar_producto", {"marca": "hp"}, limit=3)
+        assert all(isinstance(p, ProductoResumen) for p in result)
+        assert [(p.id, p.nombre, float(p.precio)) for p in result] == [(2, "Laptop 2", 102), (4, "Laptop 4", 104), (6, "Laptop 6", 106)]
+        # Nada quedó en el identity map de la sesión
+        assert len(self.db.identity_map) == 0
+
+    def test_without_projection_returns_orm_objects(self):
+        crud = FuncionesCRUD(self.db, projection=False)
+        result = crud.search_by_intent("buscar_producto", {"marca": "hp"}, limit=3)
+        assert all(isinstance(p, Producto) for p in result)
+        assert [p.id for p in result] == [p.id for p in self.crud.search_by_intent("buscar_producto", {"marca": "hp"}, limit=3)]
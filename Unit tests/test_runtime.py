@@ -0,0 +1,92 @@
+# tests/test_runtime.py
+import pytest
+import asyncio
+import sys
+import os
+import queue
+import threading
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from nlu.executor import AsyncNLUProcessor
+from nlu.runtime import NLURuntime
+from nlu.spacy_entity_extractor import EntityExtractor
+
+
+def make_runtime(extractor):
+    runtime = NLURuntime(executor="thread")
+    runtime.processor = SimpleNamespace(
+        intent_classifier=SimpleNamespace(nlp=object(), fast_classifier=None),
+        entity_extractor=extractor,
+    )
+    runtime.started = True
+    return runtime
+
+
+class TestReadiness:
+    def test_fallback_lexicon_is_not_ready(self):
+        extractor = EntityExtractor()
+        extractor._lexicon = extractor._build_lexicon(["lenovo"], ["laptops"], from_db=False)
+        runtime = make_runtime(extractor)
+
+        assert runtime.readiness()["gazetteers"] is True
+        assert runtime.readiness()["lexicon_from_db"] is False
+        assert runtime.ready is False
+
+    def test_lexicon_from_db_is_ready(self):
+        extractor = EntityExtractor()
+        extractor._lexicon = extractor._build_lexicon(["lenovo"], ["laptops"])
+        assert make_runtime(extractor).ready is True
+
+
+def make_process_runtime(statuses):
+    runtime = NLURuntime(executor="process")
+    runtime.async_processor = SimpleNamespace(worker_status=lambda: statuses)
+    runtime.started = True
+    return runtime
+
+
+class TestProcessReadiness:
+    def test_no_worker_reported_is_not_ready(self):
+        runtime = make_process_runtime({})
+        assert runtime.readiness()["nlu_workers"] is False
+        assert runtime.ready is False
+
+    def test_every_worker_needs_lexicon_from_db(self):
+        listo = {"intent_model": True, "gazetteers": True, "lexicon_from_db": True}
+        respaldo = dict(listo, lexicon_from_db=False)
+
+        runtime = make_process_runtime({101: listo, 102: respaldo})
+        assert runtime.readiness()["lexicon_from_db"] is False
+        assert runtime.ready is False
+        assert make_process_runtime({101: listo, 102: listo}).ready is True
+
+    def test_worker_status_drains_reports(self):
+        async_processor = AsyncNLUProcessor(SimpleNamespace(process_batch=lambda texts: texts), executor="thread")
+        async_processor._status_queue = queue.Queue()
+        async_processor._status_queue.put((101, {"lexicon_from_db": False}))
+        async_processor._status_queue.put((101, {"lexicon_from_db": True}))
+
+        # Gana el último reporte de cada worker
+        assert async_processor.worker_status() == {101: {"lexicon_from_db": True}}
+        async_processor._status_queue = None
+        async_processor.shutdown()
+
+
+class TestInfo:
+    def test_info_runs_in_the_pool(self):
+        processor = SimpleNamespace(
+            process_batch=lambda texts: texts,
+            intent_classifier=SimpleNamespace(get_model_info=lambda: {"hilo": threading.current_thread().name}),
+            cache=SimpleNamespace(stats=lambda: {"hits": 3}),
+        )
+        runtime = NLURuntime(executor="thread")
+        runtime.async_processor = AsyncNLUProcessor(processor, executor="thread")
+
+        info = asyncio.run(runtime.info())
+
+        assert info["cache"] == {"hits": 3}
+        assert info["hilo"].startswith("nlu")
+        # Sin NLUProcessor propio fuera del pool
+        assert runtime.processor is None
+        runtime.async_processor.shutdown()
@@ -0,0 +1,76 @@
+# tests/test_search_backend.py
+import pytest
+import sys
+import os
+import time
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import text
+from sqlalchemy.dialects import postgresql
+from models.database import Producto
+from database.catalog_watermark import read_watermark
+from database.migrate import apply_migrations
+from database.queries import FuncionesCRUD
+from database.search_backend import (
+    SearchBackend, PostgresSearchBackend, SqliteFTSSearchBackend, get_search_backend
+)
+
+
+@pytest.fixture
+def plain_db(sqlite_db):
+    db = sqlite_db
+    db.add(Producto(id=1, nombre="Galaxy S24", precio=900, marca="Samsung Electronics",
+                    descripcion="Pantalla grande y doble SIM", activo=True))
+    db.add(Producto(id=2, nombre="MacBook Air", precio=1200, marca="Apple",
+                    descripcion="Bateria larga", activo=True))
+    db.add(Producto(id=3, nombre="Pavilion", precio=700, marca="HP", descripcion="Pantalla grande", activo=True))
+    db.commit()
+    return db
+
+
+@pytest.fixture
+def db(plain_db):
+    apply_migrations(plain_db.get_bind())
+    return plain_db
+
+
+class TestSearchBackend:
+    def test_without_migrations_falls_back_to_like(self, plain_db):
+        assert type(get_search_backend(plain_db)) is SearchBackend
+
+    def test_sqlite_fts_backend(self, db):
+        crud = FuncionesCRUD(db)
+        assert isinstance(crud.search, SqliteFTSSearchBackend)
+
+        result = crud.search_by_intent("buscar_producto", {"marca": "samsung", "caracteristicas": ["pantalla grande"]})
+        assert [p.id for p in result] == [1]
+        # "hp" es más corto que un trigrama: va por ILIKE
+        assert [p.id for p in crud.search_by_intent("buscar_producto", {"marca": "hp"})] == [3]
+
+    def test_fts_index_follows_updates(self, db):
+        crud = FuncionesCRUD(db)
+        db.query(Producto).filter(Producto.id == 2).update({"marca": "Lenovo"})
+        db.add(Producto(id=4, nombre="Yoga", precio=800, marca="Lenovo", activo=True))
+        db.commit()
+
+        result = crud.search_by_intent("buscar_producto", {"marca": "lenovo"})
+        assert [p.id for p in result] == [2, 4]
+        assert crud.search_by_intent("buscar_producto", {"marca": "apple"}) == []
+
+    def test_manual_update_moves_watermark(self, db):
+        before = read_watermark(db)
+        time.sleep(0.01)  # el 'now' de SQLite tiene resolución de milisegundos
+        # UPDATE fuera del ORM: la fecha la pone el trigger de 003_fecha_actualizacion
+        db.execute(text("UPDATE productos SET marca = 'Apfel' WHERE id = 2"))
+        db.commit()
+
+        assert read_watermark(db).productos_max_fecha > before.productos_max_fecha
+
+    def test_migrations_run_once(self, db):
+        assert apply_migrations(db.get_bind()) == []
+
+    def test_postgres_uses_tsvector(self):
+        clause = PostgresSearchBackend().caracteristica_filter("pantalla grande")
+        sql = str(clause.compile(dialect=postgresql.dialect()))
+        # Solo la descripción, como el ILIKE base (no nombre ni marca)
+        assert "productos.busqueda_descripcion @@ phraseto_tsquery" in sql
@@ -0,0 +1,158 @@
+# tests/test_session_activity.py
+import pytest
+import asyncio
+import sys
+import time
+import os
+from datetime import datetime
+from types import SimpleNamespace
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from models.database import UsuarioSesion
+from database.session_activity import SessionActivityTracker
+from websockets_file.manager import ConnectionManager
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    # BD propia del test en un archivo temporal, nunca la de DATABASE_URL
+    path = tmp_path / "sesiones.db"
+    engine = create_engine(f"sqlite:///{path}")
+    UsuarioSesion.__table__.create(engine)
+    with sessionmaker(bind=engine)() as session:
+        session.add(UsuarioSesion(session_id="vieja", fecha_inicio=datetime(2024, 1, 1), activo=True))
+        session.commit()
+    engine.dispose()
+    return path
+
+
+def run_tracker(db_path, fn, **options):
+    async def main():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+        try:
+            tracker = SessionActivityTracker(session_factory=async_sessionmaker(engine), enabled=True, **options)
+            await fn(tracker)
+            await tracker.close()
+            return tracker
+        finally:
+            await engine.dispose()
+    return asyncio.run(main())
+
+
+def read_sessions(db_path) -> dict:
+    engine = create_engine(f"sqlite:///{db_path}")
+    with sessionmaker(bind=engine)() as session:
+        rows = {s.session_id: s for s in session.query(UsuarioSesion).all()}
+    engine.dispose()
+    return rows
+
+
+class FakeWebSocket:
+    client = SimpleNamespace(host="10.0.0.1")
+    headers = {"user-agent": "pytest"}
+
+    async def accept(self):
+        pass
+
+
+class TestSessionActivityTracker:
+    def test_coalesces_messages_into_one_row_per_session(self, db_path):
+        async def fn(tracker):
+            for i in range(50):
+                tracker.touch("abc", now=1_700_000_000 + i)
+            tracker.touch("vieja", now=1_700_000_100)
+
+        tracker = run_tracker(db_path, fn, flush_s=60)
+
+        assert tracker.flushes == 1
+        assert tracker.rows_written == 2
+        sesiones = read_sessions(db_path)
+        assert sesiones["abc"].fecha_ultimo_acceso == datetime.fromtimestamp(1_700_000_049)
+        assert sesiones["abc"].fecha_inicio == datetime.fromtimestamp(1_700_000_000)
+        # El upsert no pisa la fecha de inicio de una sesión que ya existía
+        assert sesiones["vieja"].fecha_inicio == datetime(2024, 1, 1)
+        assert sesiones["vieja"].fecha_ultimo_acceso == datetime.fromtimestamp(1_700_000_100)
+
+    def test_periodic_flush(self, db_path):
+        async def fn(tracker):
+            tracker.touch("abc")
+            await asyncio.sleep(0.2)
+            assert tracker.flushes == 1
+            assert tracker.stats()["pending"] == 0
+
+        run_tracker(db_path, fn, flush_s=0.05)
+
+    def test_active_sessions_from_memory(self):
+        tracker = SessionActivityTracker(enabled=True, idle_timeout_s=600)
+        tracker.touch("a", now=1000)
+        tracker.touch("b", now=1500)
+        tracker.connected("c")
+        tracker.sessions["c"].last_seen = 0
+
+        activas = [s.session_id for s in tracker.active_sessions(within_s=300, now=1700)]
+
+        assert activas == ["b", "c"]
+
+    def test_idle_sessions_are_marked_inactive(self, db_path):
+        async def fn(tracker):
+            tracker.touch("abc", now=1_700_000_000)
+            await tracker.flush(now=1_700_000_100)
+            assert tracker.expire_idle(now=1_700_000_100) == []
+            assert [s.session_id for s in tracker.expire_idle(now=1_700_001_000)] == ["abc"]
+
+        tracker = run_tracker(db_path, fn, flush_s=60, idle_timeout_s=300)
+
+        assert "abc" not in tracker.sessions
+        assert read_sessions(db_path)["abc"].activo is False
+
+    def test_connection_manager_reports_connections(self):
+        tracker = SessionActivityTracker(enabled=True)
+        manager = ConnectionManager(tracker=tracker)
+        websocket = FakeWebSocket()
+
+        asyncio.run(manager.connect(websocket, "ws1"))
+        assert tracker.sessions["ws1"].connections == 1
+        assert tracker.sessions["ws1"].ip_address == "10.0.0.1"
+
+        manager.disconnect(websocket, "ws1")
+        assert tracker.sessions["ws1"].connections == 0
+
+    def test_failed_flush_is_retried(self, db_path):
+        class FallaUnaVez:
+            def __init__(self, factory):
+                self.factory = factory
+                self.llamadas = 0
+
+            def __call__(self):
+                self.llamadas += 1
+                if self.llamadas == 1:
+                    raise RuntimeError("BD caída")
+                return self.factory()
+
+        # Relativo a ahora: close() vuelve a vencer sesiones con la hora real
+        base = time.time() - 1000
+
+        async def main():
+            engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}")
+            try:
+                tracker = SessionActivityTracker(session_factory=FallaUnaVez(async_sessionmaker(engine)),
+                                                 enabled=True, flush_s=60, idle_timeout_s=300)
+                tracker.touch("vieja", now=base)
+                tracker.touch("abc", now=base)
+                # La primera escritura falla: "vieja" venció y su activo = false no debe perderse
+                assert await tracker.flush(now=base + 1000) == 0
+                assert tracker.stats()["pending"] == 2
+                tracker.touch("abc", now=base + 1000)
+                assert await tracker.flush(now=base + 1000) == 2
+                await tracker.close()
+            finally:
+                await engine.dispose()
+
+        asyncio.run(main())
+        sesiones = read_sessions(db_path)
+        assert sesiones["vieja"].activo is False
+        assert sesiones["abc"].activo is True
+        assert sesiones["abc"].fecha_ultimo_acceso == datetime.fromtimestamp(base + 1000)
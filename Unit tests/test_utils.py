@@ -28,31 +28,25 @@ class TestUtilsChat:
         
         assert "laptop" in result
 
-    @patch('database.connection.get_db')
-    def test_extract_product_name_categoria_id(self, mock_get_db):
-        # Mock de la base de datos
-        mock_db = Mock()
-        mock_get_db.return_value.__next__.return_value = mock_db
-        
-        mock_categoria = Mock()
-        mock_categoria.nombre = "electronica"
-        mock_db.query.return_value.filter.return_value.first.return_value = mock_categoria
-        
+    @patch('database.category_cache.categoria_cache')
+    def test_extract_product_name_categoria_id(self, mock_cache):
+        # Mock del cache de categorías
+        mock_cache.get_nombre.return_value = "electronica"
+
         entities = {"categoria": 1}
         result = extract_product_name("mensaje", entities)
-        
+
         assert "electronica" in result
+        mock_cache.get_nombre.assert_called_with(1)
+
+    @patch('database.category_cache.categoria_cache')
+    def test_extract_product_name_categoria_id_not_found(self, mock_cache):
+        # Mock del cache sin resultado
+        mock_cache.get_nombre.return_value = None
 
-    @patch('database.connection.get_db')
-    def test_extract_product_name_categoria_id_not_found(self, mock_get_db):
-        # Mock de la base de datos sin resultado
-        mock_db = Mock()
-        mock_get_db.return_value.__next__.return_value = mock_db
-        mock_db.query.return_value.filter.return_value.first.return_value = None
-        
         entities = {"categoria": 999}
         result = extract_product_name("mensaje de prueba", entities)
-        
+
         # Debería retornar el mensaje original si no encuentra la categoría
         assert result == "mensaje de prueba"
 
@@ -0,0 +1,77 @@
+from contextlib import asynccontextmanager
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from database.connection import DATABASE_URL, DB_CONNECT_TIMEOUT_S, pool_options
+from database.pool_metrics import InstrumentedAsyncQueuePool
+
+# Driver async para cada motor: asyncpg en PostgreSQL, aiosqlite en SQLite (tests)
+ASYNC_DRIVERS = {
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Misma BD que DATABASE_URL pero con el driver async"""
+    parsed = make_url(url.replace("postgres://", "postgresql://", 1))
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"Motor sin driver async configurado: {backend}")
+    parsed = parsed.set(drivername=ASYNC_DRIVERS[backend])
+    if backend.startswith("postgres") and "sslmode" in parsed.query:
+        # asyncpg no entiende sslmode (psycopg2 sí); el equivalente es ssl
+        query = dict(parsed.query)
+        query["ssl"] = query.pop("sslmode")
+        parsed = parsed.set(query=query)
+    return parsed.render_as_string(hide_password=False)
+
+
+_async_engine = None
+_async_session_factory = None
+
+
+def get_async_engine():
+    """Engine async perezoso: sin asyncpg/aiosqlite la app igual importa"""
+    global _async_engine, _async_session_factory
+    if _async_engine is None:
+        url = to_async_url(DATABASE_URL)
+        pool = pool_options(DATABASE_URL)
+        connect_args = {"timeout": DB_CONNECT_TIMEOUT_S} if url.startswith("postgresql") else {}
+        _async_engine = create_async_engine(
+            url,
+            pool_pre_ping=True,
+            connect_args=connect_args,
+            **({"poolclass": InstrumentedAsyncQueuePool, **pool} if pool else {}),
+        )
+        _async_session_factory = async_sessionmaker(_async_engine, autoflush=False, expire_on_commit=False)
+    return _async_engine
+
+
+def AsyncSessionLocal() -> AsyncSession:
+    get_async_engine()
+    return _async_session_factory()
+
+
+async def get_async_db():
+    """Dependencia de FastAPI para los endpoints async"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def async_session_scope():
+    """Sesión async fuera de un request (p. ej. un mensaje del WebSocket)"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def async_engine_created() -> bool:
+    return _async_engine is not None
+
+
+async def dispose_async_engine():
+    global _async_engine, _async_session_factory
+    if _async_engine is not None:
+        await _async_engine.dispose()
+        _async_engine = _async_session_factory = None
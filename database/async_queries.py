@@ -0,0 +1,110 @@
+import asyncio
+from typing import Optional
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from database.category_cache import categoria_cache
+from database.product_ranking import RANK_CANDIDATES
+from database.queries import MAX_PAGE_SIZE, PAGINATED_INTENTS, PRODUCT_PROJECTION, SEARCH_LIMIT, ProductQueries
+from database.search_backend import get_search_backend
+from models.database import Producto
+
+
+class AsyncFuncionesCRUD(ProductQueries):
+    """
+    Variante async de FuncionesCRUD para los endpoints async (chat y
+    WebSocket): las consultas no bloquean el event loop.
+
+    Los filtros son los mismos de ProductQueries aplicados sobre select().
+    Los caches en memoria (categorías, foto del catálogo) se leen sin
+    bloquear; si hay que cargarlos se hace con run_sync sobre la misma
+    conexión async, o en un hilo aparte en el caso de la foto.
+    """
+
+    def __init__(self, db: AsyncSession, search_backend=None, catalog=None, ranking=None, embeddings=None,
+                 projection: bool = PRODUCT_PROJECTION):
+        super().__init__(db, search_backend, catalog, ranking, embeddings, projection)
+
+    async def _fetch(self, stmt) -> list:
+        """Ejecutar el select(): filas → ProductoResumen, o los Producto si no hay proyección"""
+        result = await self.db.execute(stmt)
+        return self._records(result.all() if self.projection else result.scalars().all())
+
+    async def _ensure_search_backend(self):
+        if self._search_backend is None:
+            self._search_backend = await self.db.run_sync(get_search_backend)
+
+    async def get_categoria_id(self, nombre_categoria: str) -> Optional[int]:
+        if categoria_cache.needs_load:
+            await self.db.run_sync(categoria_cache.load)
+        return categoria_cache.get_id(nombre_categoria)
+
+    async def _resolve_categoria(self, entities: dict):
+        if "categoria" in entities and isinstance(entities["categoria"], str):
+            entities["categoria"] = await self.get_categoria_id(entities["categoria"])
+        elif entities.get("categoria") and categoria_cache.needs_load:
+            # El subárbol sale del cache: se carga sin bloquear el event loop
+            await self.db.run_sync(categoria_cache.load)
+
+    def _snapshot(self, intent: str, entities: dict):
+        if self._catalog.stale():
+            # El refresco por TTL va a un hilo; mientras, sirve la foto actual
+            asyncio.get_running_loop().run_in_executor(None, self._catalog.refresh_if_stale)
+        return self._snapshot_for(intent, entities, refresh=False)
+
+    def _ranking_index(self, intent: str, texto: Optional[str], offset: int, after_id: Optional[int]):
+        index = self._ranking_for(intent, texto, offset, after_id, refresh=False)
+        if index is not None and self._ranking.stale():
+            asyncio.get_running_loop().run_in_executor(None, self._ranking.refresh_if_stale)
+        return index
+
+    async def count_by_intent(self, intent: str, entities: dict) -> Optional[int]:
+        """Total de coincidencias sin traer las filas (None si la intención no pagina)"""
+        if intent not in PAGINATED_INTENTS:
+            return None
+        await self._resolve_categoria(entities)
+        snapshot = self._snapshot(intent, entities)
+        if snapshot is not None:
+            return snapshot.count(intent, entities, self._snapshot_categorias(entities))
+        await self._ensure_search_backend()
+        stmt = self._search_query(intent, entities, select(func.count(Producto.id)))
+        return (await self.db.scalar(stmt)) or 0
+
+    async def search_by_intent(self, intent: str, entities: dict, limit: int = SEARCH_LIMIT,
+                               offset: int = 0, after_id: Optional[int] = None,
+                               texto: Optional[str] = None) -> list:
+        await self._resolve_categoria(entities)
+        index = self._ranking_index(intent, texto, offset, after_id)
+
+        # Filtros estructurados: se resuelven en memoria, sin ir a la BD
+        snapshot = self._snapshot(intent, entities)
+        if snapshot is not None:
+            categorias = self._snapshot_categorias(entities)
+            if index is not None:
+                ids = snapshot.candidate_ids(intent, entities, categorias)
+                return snapshot.records_for(index.top_ids(texto, ids, min(limit, MAX_PAGE_SIZE)))
+            return snapshot.search(intent, entities, min(limit, MAX_PAGE_SIZE), offset, after_id, categorias)
+
+        await self._ensure_search_backend()
+        if index is not None:
+            k = min(limit, MAX_PAGE_SIZE)
+            ranked = []
+            ids = index.best_ids(texto, RANK_CANDIDATES)
+            if ids:
+                stmt = self._relevant_query(intent, entities, select(*self._entities), ids)
+                ranked = index.rank(texto, await self._fetch(stmt), k)
+            if len(ranked) < k:
+                stmt = self._intent_query(intent, entities, select(*self._entities), k + len(ranked))
+                ranked = self._fill(ranked, await self._fetch(stmt), k)
+            return ranked
+        stmt = self._intent_query(intent, entities, select(*self._entities), limit, offset, after_id)
+        return await self._fetch(stmt)
+
+    async def semantic_search(self, texto: str, limit: int = SEARCH_LIMIT) -> list:
+        """Productos parecidos al mensaje (embeddings) cuando no se reconoció marca ni categoría"""
+        if self._embeddings.stale():
+            asyncio.get_running_loop().run_in_executor(None, self._embeddings.refresh_if_stale)
+        ids = self._semantic_ids(texto, limit, refresh=False)
+        if not ids:
+            return []
+        stmt = select(*self._entities).where(Producto.id.in_(ids), Producto.activo == True)
+        return self._in_order(await self._fetch(stmt), ids, limit)
@@ -0,0 +1,68 @@
+import hashlib
+from decimal import Decimal
+from sqlalchemy import select
+from database.catalog_watermark import read_watermark
+from database.connection import session_scope
+from models.database import Producto
+
+try:
+    import orjson
+
+    def _dumps(obj) -> bytes:
+        return orjson.dumps(obj, default=_default)
+except ImportError:
+    import json
+
+    def _dumps(obj) -> bytes:
+        return json.dumps(obj, default=_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+# Filas por ida al cursor del servidor (y por trozo de la respuesta)
+EXPORT_CHUNK_SIZE = 1000
+
+# Mismos campos que ProductoOut
+EXPORT_COLUMNS = (
+    Producto.id, Producto.nombre, Producto.categoria_id, Producto.precio, Producto.descripcion,
+    Producto.marca, Producto.stock, Producto.activo, Producto.fecha_creacion,
+)
+_FIELDS = [c.key for c in EXPORT_COLUMNS]
+
+
+def _default(value):
+    if isinstance(value, Decimal):
+        return float(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(value)}")
+
+
+def catalog_etag(db) -> str:
+    """ETag débil del catálogo: hash del watermark (su fecha_actualizacion cambia con cualquier edición)"""
+    watermark = read_watermark(db)
+    digest = hashlib.sha1(str(tuple(watermark)).encode("utf-8")).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Comparación débil: W/"x" y "x" son el mismo
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in if_none_match.split(","))
+
+
+def iter_productos_ndjson(chunk_size: int = EXPORT_CHUNK_SIZE):
+    """
+    Catálogo completo como NDJSON, en trozos de chunk_size filas.
+
+    Usa un cursor del lado del servidor (stream_results) y tuplas en vez de
+    objetos ORM, así que la memoria no crece con el tamaño del catálogo.
+    """
+    with session_scope() as db:
+        stmt = select(*EXPORT_COLUMNS).order_by(Producto.id).execution_options(
+            stream_results=True, yield_per=chunk_size
+        )
+        result = db.execute(stmt)
+        for rows in result.partitions(chunk_size):
+            yield b"".join(_dumps(dict(zip(_FIELDS, row))) + b"\n" for row in rows)
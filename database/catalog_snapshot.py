@@ -0,0 +1,312 @@
+import logging
+import os
+import threading
+import time
+from typing import Optional
+import numpy as np
+from database.catalog_watermark import only_inserts, productos_changed, read_watermark, shared_watermark
+from database.connection import session_scope
+from models.database import Producto
+from models.records import ProductoResumen
+
+logger = logging.getLogger("database")
+
+CATALOG_SNAPSHOT_ENABLED = os.getenv("CATALOG_SNAPSHOT", "1") == "1"
+# Revisión del watermark cuando nadie avisa de cambios (p. ej. executor "process")
+CATALOG_SNAPSHOT_TTL_S = float(os.getenv("CATALOG_SNAPSHOT_TTL_S", "60"))
+
+# Mismo orden que los argumentos de ProductoResumen (también lo usan las búsquedas del chat)
+COLUMNS = (
+    Producto.id, Producto.nombre, Producto.marca, Producto.precio,
+    Producto.stock, Producto.categoria_id, Producto.activo,
+)
+
+# Intenciones que se resuelven con filtros estructurados (marca, categoría, precio)
+SNAPSHOT_INTENTS = (
+    "buscar_producto", "info_producto", "recomendar_categoria",
+    "comparar_precios", "comparar_precios_web",
+)
+
+_EMPTY = np.empty(0, dtype=np.int64)
+
+
+def _postings(codes: np.ndarray) -> dict:
+    """{código: filas ordenadas} para todos los códigos >= 0"""
+    order = np.argsort(codes, kind="stable")
+    sorted_codes = codes[order]
+    valid = sorted_codes >= 0
+    order, sorted_codes = order[valid], sorted_codes[valid]
+    if not len(order):
+        return {}
+    bounds = np.flatnonzero(np.diff(sorted_codes)) + 1
+    starts = np.concatenate(([0], bounds))
+    ends = np.concatenate((bounds, [len(order)]))
+    return {int(sorted_codes[s]): order[s:e] for s, e in zip(starts, ends)}
+
+
+class CatalogSnapshot:
+    """
+    Foto de solo lectura de la tabla productos, por columnas.
+
+    Precio, stock, activo, categoría y marca viven en arrays de NumPy
+    (marca codificada contra un diccionario de marcas distintas) con listas
+    de filas por marca y por categoría, así que los filtros de búsqueda son
+    máscaras vectorizadas sin ir a la BD. Las filas están ordenadas por id.
+    Nunca se modifica: extend() devuelve una foto nueva.
+    """
+
+    def __init__(self, rows: list, marcas: list = None):
+        rows = sorted(rows, key=lambda r: r[0])
+        self.ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        self.nombres = [r[1] for r in rows]
+        self.marcas_fila = [r[2] for r in rows]
+        self.precios_raw = [r[3] for r in rows]
+        self.precios = np.array([float(r[3]) for r in rows], dtype=np.float64)
+        self.stock = np.array([r[4] or 0 for r in rows], dtype=np.int64)
+        self.categorias = np.array([r[5] if r[5] is not None else -1 for r in rows], dtype=np.int64)
+        self.activo = np.array([r[6] is not False for r in rows], dtype=bool)
+
+        # Diccionario de marcas: código = posición en self.marcas (en minúsculas)
+        self.marcas = list(marcas or [])
+        codigos = {m: i for i, m in enumerate(self.marcas)}
+        marca_codes = np.empty(len(rows), dtype=np.int64)
+        for i, marca in enumerate(self.marcas_fila):
+            if not marca:
+                marca_codes[i] = -1
+                continue
+            key = marca.lower()
+            code = codigos.get(key)
+            if code is None:
+                code = codigos[key] = len(self.marcas)
+                self.marcas.append(key)
+            marca_codes[i] = code
+        self.marca_codes = marca_codes
+        self.por_marca = _postings(marca_codes)
+        self.por_categoria = _postings(self.categorias)
+        self._marca_cache = {}
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def max_id(self) -> int:
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    def rows(self) -> list:
+        return list(zip(
+            self.ids.tolist(), self.nombres, self.marcas_fila, self.precios_raw,
+            self.stock.tolist(), [c if c >= 0 else None for c in self.categorias.tolist()],
+            self.activo.tolist(),
+        ))
+
+    def extend(self, new_rows: list) -> "CatalogSnapshot":
+        """Foto nueva con las filas agregadas (conserva el diccionario de marcas)"""
+        return CatalogSnapshot(self.rows() + list(new_rows), marcas=self.marcas)
+
+    def can_answer(self, intent: str, entities: dict) -> bool:
+        if intent not in SNAPSHOT_INTENTS:
+            return False
+        # Texto libre en la descripción: lo resuelve el backend de búsqueda
+        if intent == "buscar_producto" and entities.get("caracteristicas"):
+            return False
+        categoria = entities.get("categoria")
+        return categoria is None or isinstance(categoria, int)
+
+    def _marca_rows(self, marca: str) -> np.ndarray:
+        """Filas cuya marca contiene el texto (como ILIKE '%marca%')"""
+        key = marca.lower()
+        rows = self._marca_cache.get(key)
+        if rows is None:
+            partes = [self.por_marca[code] for code, m in enumerate(self.marcas)
+                      if key in m and code in self.por_marca]
+            rows = np.sort(np.concatenate(partes)) if partes else _EMPTY
+            if len(self._marca_cache) > 1024:
+                self._marca_cache.clear()
+            self._marca_cache[key] = rows
+        return rows
+
+    def _categoria_rows(self, categorias: tuple) -> np.ndarray:
+        """Filas de cualquiera de las categorías (la pedida y su subárbol)"""
+        if len(categorias) == 1:
+            return self.por_categoria.get(categorias[0], _EMPTY)
+        partes = [self.por_categoria[c] for c in categorias if c in self.por_categoria]
+        return np.sort(np.concatenate(partes)) if partes else _EMPTY
+
+    def _candidates(self, intent: str, entities: dict, categorias: tuple = None) -> np.ndarray:
+        rows = None
+        if "marca" in entities:
+            rows = self._marca_rows(entities["marca"])
+        if entities.get("categoria"):
+            por_categoria = self._categoria_rows(categorias or (entities["categoria"],))
+            rows = por_categoria if rows is None else np.intersect1d(rows, por_categoria, assume_unique=True)
+        if rows is None:
+            rows = np.arange(len(self.ids))
+        if intent == "buscar_producto" and "rango_precio" in entities:
+            rp = entities["rango_precio"]
+            precios = self.precios[rows]
+            mask = np.ones(len(rows), dtype=bool)
+            if "min" in rp:
+                mask &= precios >= rp["min"]
+            if "max" in rp:
+                mask &= precios <= rp["max"]
+            rows = rows[mask]
+        return rows
+
+    def _top_by_price(self, rows: np.ndarray, k: int, descending: bool) -> np.ndarray:
+        precios = -self.precios[rows] if descending else self.precios[rows]
+        if len(rows) > k:
+            part = np.argpartition(precios, k - 1)[:k]
+            return rows[part[np.argsort(precios[part], kind="stable")]]
+        return rows[np.argsort(precios, kind="stable")]
+
+    def count(self, intent: str, entities: dict, categorias: tuple = None) -> int:
+        return int(len(self._candidates(intent, entities, categorias)))
+
+    def search(self, intent: str, entities: dict, limit: int, offset: int = 0,
+               after_id: Optional[int] = None, categorias: tuple = None) -> list:
+        """
+        Mismos resultados (y orden) que la consulta de FuncionesCRUD.search_by_intent.
+        categorias es el subárbol de entities["categoria"] (por defecto, solo ella).
+        """
+        rows = self._candidates(intent, entities, categorias)
+        if intent == "recomendar_categoria":
+            rows = self._top_by_price(rows, 5, descending=True)
+        elif intent in ("comparar_precios", "comparar_precios_web"):
+            rows = self._top_by_price(rows, 5, descending=False)
+        else:
+            # Paginado por id, como paginate()
+            if after_id is not None:
+                rows = rows[self.ids[rows] > after_id]
+            elif offset:
+                rows = rows[offset:]
+            rows = rows[:limit]
+        return [self.record(int(row)) for row in rows]
+
+    def candidate_ids(self, intent: str, entities: dict, categorias: tuple = None) -> np.ndarray:
+        """Ids (ordenados) de todos los productos que pasan los filtros"""
+        return self.ids[self._candidates(intent, entities, categorias)]
+
+    def records_for(self, ids) -> list:
+        """Registros de los ids dados, en ese orden (ids que están en la foto)"""
+        rows = np.searchsorted(self.ids, np.asarray(ids, dtype=np.int64))
+        return [self.record(int(row)) for row in rows]
+
+    def record(self, row: int) -> ProductoResumen:
+        categoria = int(self.categorias[row])
+        return ProductoResumen(
+            id=int(self.ids[row]),
+            nombre=self.nombres[row],
+            marca=self.marcas_fila[row],
+            precio=self.precios_raw[row],
+            stock=int(self.stock[row]),
+            categoria_id=categoria if categoria >= 0 else None,
+            activo=bool(self.activo[row]),
+        )
+
+
+def load_rows(db, after_id: int = None) -> list:
+    query = db.query(*COLUMNS)
+    if after_id is not None:
+        query = query.filter(Producto.id > after_id)
+    return [tuple(row) for row in query.order_by(Producto.id).all()]
+
+
+class CatalogSnapshotStore:
+    """
+    Dueño de la foto vigente del catálogo.
+
+    load() la arma completa (en el lifespan). refresh() compara el watermark
+    del catálogo: si solo hubo inserciones trae las filas nuevas y extiende
+    la foto; si hubo bajas o ediciones la vuelve a armar. La llama el
+    LexiconRefresher en cada ciclo con el watermark que leyó (si no cambió
+    solo renueva checked_at) y, como respaldo, current() cuando pasó
+    CATALOG_SNAPSHOT_TTL_S. Mientras no esté cargada, current() devuelve
+    None y las búsquedas van a la BD.
+    """
+
+    label = "Foto del catálogo"
+
+    def __init__(self, enabled: bool = CATALOG_SNAPSHOT_ENABLED, ttl_seconds: float = CATALOG_SNAPSHOT_TTL_S):
+        self.enabled = enabled
+        self.ttl_seconds = ttl_seconds
+        self.snapshot = None
+        self.watermark = None
+        self.checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def load(self, db=None):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._with_db(db, self._load)
+
+    def refresh(self, db=None, watermark=None, full: bool = False):
+        """
+        Poner la foto al día; devuelve True si cambió. watermark es la lectura
+        ya hecha en este ciclo (sin ella se lee). full fuerza la recarga.
+        """
+        if not self.enabled or self.snapshot is None:
+            return False
+        with self._lock:
+            return self._with_db(db, lambda session: self._refresh(session, watermark, full))
+
+    def current(self, refresh: bool = True) -> Optional[CatalogSnapshot]:
+        """Foto vigente; con refresh=False nunca toca la BD (para el event loop)"""
+        if self.snapshot is None:
+            return None
+        if refresh and self.stale():
+            self.refresh_if_stale()
+        return self.snapshot
+
+    def stale(self) -> bool:
+        # Sin foto no hay nada que refrescar (las búsquedas van a la BD)
+        if self.snapshot is None or not self.ttl_seconds:
+            return False
+        return time.monotonic() - self.checked_at > self.ttl_seconds
+
+    def refresh_if_stale(self):
+        """Refresco de respaldo por TTL; los errores solo se registran"""
+        if not self.stale() or self._lock.locked():
+            return
+        try:
+            # La lectura del watermark se comparte con las otras fotos que vencen a la vez
+            self._with_db(None, lambda db: self.refresh(db, watermark=shared_watermark.read(db)))
+        except Exception as e:
+            logger.warning(f"No se pudo refrescar {self.label.lower()}: {e}")
+            self.checked_at = time.monotonic()
+
+    def _with_db(self, db, fn):
+        if db is not None:
+            return fn(db)
+        with session_scope() as own_db:
+            return fn(own_db)
+
+    def _build(self, db):
+        return CatalogSnapshot(load_rows(db))
+
+    def _extend(self, db):
+        return self.snapshot.extend(load_rows(db, after_id=self.snapshot.max_id))
+
+    def _load(self, db):
+        watermark = read_watermark(db)
+        self.snapshot = self._build(db)
+        self.watermark = watermark
+        self.checked_at = time.monotonic()
+        logger.info(f"{self.label}: {len(self.snapshot)} productos cargados")
+
+    def _refresh(self, db, watermark=None, full: bool = False) -> bool:
+        current = watermark or read_watermark(db)
+        self.checked_at = time.monotonic()
+        previous = self.watermark
+        if not full and not productos_changed(previous, current):
+            return False
+        if not full and only_inserts(previous, current, db):
+            self.snapshot = self._extend(db)
+        else:
+            self.snapshot = self._build(db)
+        self.watermark = current
+        return True
+
+
+# Instancia compartida por FuncionesCRUD
+catalog_snapshot = CatalogSnapshotStore()
@@ -0,0 +1,107 @@
+import os
+import threading
+import time
+from collections import namedtuple
+from sqlalchemy import case, func
+from models.database import Categoria, Producto
+
+# Cuánto vale una lectura del watermark para las fotos que se refrescan solas (TTL)
+CATALOG_WATERMARK_MAX_AGE_S = float(os.getenv("CATALOG_WATERMARK_MAX_AGE_S", "5"))
+
+# Resumen barato del catálogo: si no cambia, no hay nada que recargar
+CatalogWatermark = namedtuple("CatalogWatermark", [
+    "productos_max_id", "productos_total", "productos_activos", "productos_max_fecha",
+    "categorias_max_id", "categorias_total", "categorias_activas", "categorias_max_fecha",
+])
+
+# Campos de productos y de categorías dentro del watermark
+PRODUCTOS = slice(0, 4)
+CATEGORIAS = slice(4, None)
+
+
+def read_watermark(db) -> CatalogWatermark:
+    """
+    max id y conteos ven altas y bajas; max(fecha_actualizacion), que sale
+    del índice, ve cualquier edición, también los renombres de marcas y
+    categorías (la columna la mantienen el ORM y los triggers de las
+    migraciones 003 y 004).
+    """
+    productos = db.query(
+        func.max(Producto.id),
+        func.count(Producto.id),
+        func.sum(case((Producto.activo == True, 1), else_=0)),
+        func.max(Producto.fecha_actualizacion),
+    ).one()
+    categorias = db.query(
+        func.max(Categoria.id),
+        func.count(Categoria.id),
+        func.sum(case((Categoria.activo == True, 1), else_=0)),
+        func.max(Categoria.fecha_actualizacion),
+    ).one()
+    return CatalogWatermark(
+        productos[0] or 0, productos[1] or 0, productos[2] or 0, productos[3],
+        categorias[0] or 0, categorias[1] or 0, categorias[2] or 0, categorias[3],
+    )
+
+
+def productos_changed(previous: CatalogWatermark, current: CatalogWatermark) -> bool:
+    return current[PRODUCTOS] != previous[PRODUCTOS]
+
+
+def categorias_changed(previous: CatalogWatermark, current: CatalogWatermark) -> bool:
+    return current[CATEGORIAS] != previous[CATEGORIAS]
+
+
+def edited_before(db, previous: CatalogWatermark) -> bool:
+    """¿Se modificó algún producto que ya estaba en previous? (solo recorre las filas tocadas desde entonces)"""
+    query = db.query(Producto.id).filter(Producto.id <= previous.productos_max_id)
+    if previous.productos_max_fecha is not None:
+        query = query.filter(Producto.fecha_actualizacion > previous.productos_max_fecha)
+    return db.query(query.exists()).scalar()
+
+
+def only_inserts(previous: CatalogWatermark, current: CatalogWatermark, db=None) -> bool:
+    """
+    ¿Entre los dos watermarks solo se insertaron productos activos nuevos?
+    Con db además se verifica que las filas que ya estaban no se editaron.
+    """
+    added = current.productos_total - previous.productos_total
+    if not (
+        added > 0
+        and current.productos_max_id > previous.productos_max_id
+        and current.productos_activos - previous.productos_activos == added
+    ):
+        return False
+    return db is None or not edited_before(db, previous)
+
+
+class SharedWatermark:
+    """
+    Última lectura del watermark, compartida por las fotos del catálogo.
+
+    El LexiconRefresher publica la suya en cada ciclo; los refrescos por TTL
+    (p. ej. en los workers de proceso, sin refresher) la reutilizan si tiene
+    menos de max_age_s en vez de leer cada uno la suya.
+    """
+
+    def __init__(self, max_age_s: float = CATALOG_WATERMARK_MAX_AGE_S):
+        self.max_age_s = max_age_s
+        self.value = None
+        self.read_at = 0.0
+        self._lock = threading.Lock()
+
+    def publish(self, watermark: CatalogWatermark):
+        with self._lock:
+            self.value = watermark
+            self.read_at = time.monotonic()
+
+    def read(self, db) -> CatalogWatermark:
+        with self._lock:
+            if self.value is not None and time.monotonic() - self.read_at <= self.max_age_s:
+                return self.value
+        watermark = read_watermark(db)
+        self.publish(watermark)
+        return watermark
+
+
+shared_watermark = SharedWatermark()
@@ -0,0 +1,164 @@
+import os
+import threading
+import time
+import unicodedata
+from collections import namedtuple
+from typing import Optional
+from database.connection import session_scope
+from models.database import Categoria
+
+# Tiempo máximo sin recargar aunque nadie avise de cambios (0 = sin límite)
+CATEGORY_CACHE_TTL_S = float(os.getenv("CATEGORY_CACHE_TTL_S", "300"))
+
+# Índices de solo lectura; se reemplazan juntos en una sola asignación
+CategorySnapshot = namedtuple("CategorySnapshot", [
+    "ids_by_name", "names_by_id", "parent_by_id", "children_by_id",
+    "ancestors_by_id", "subtree_by_id", "loaded_at",
+])
+
+
+def normalize_nombre(nombre: str) -> str:
+    """Minúsculas y sin tildes: "Electrónica" y "electronica" son la misma clave"""
+    nombre = unicodedata.normalize('NFD', nombre.strip().lower())
+    return ''.join(c for c in nombre if unicodedata.category(c) != 'Mn')
+
+
+def categoria_variantes(nombre: str) -> set:
+    """Nombre normalizado y sus formas singular/plural ("celulares" → "celular")"""
+    base = normalize_nombre(nombre)
+    variantes = {base}
+    if not base:
+        return variantes
+    if base.endswith("es") and len(base) > 4 and base[-3] in "lrndj" and base[-4] in "aeiou":
+        # Plural con -es tras consonante: celulares, televisores, cinturones
+        variantes.add(base[:-2])
+        if base[-3] == "n":
+            # -nes también es el plural de las palabras en -ne: smartphones, cines
+            variantes.add(base[:-1])
+    elif base.endswith("s"):
+        # Incluye las palabras en -e tras dos consonantes: cables, muebles
+        if len(base) > 3:
+            variantes.add(base[:-1])
+    elif len(base) > 3:
+        variantes.add(base + ("s" if base[-1] in "aeiou" else "es"))
+    return variantes
+
+
+class CategoryCache:
+    """
+    Categorías en memoria: nombre → id, id → nombre y la jerarquía de
+    categoria_padre_id con su clausura precalculada (ancestros y subárbol de
+    cada categoría), así que filtrar por una categoría y sus subcategorías no
+    necesita consultas recursivas. Los nombres también se encuentran en
+    singular o plural.
+
+    La tabla es chica y casi no cambia, así que se carga entera una vez y
+    las búsquedas de cada mensaje no van a la BD. Se recarga con refresh()
+    (el LexiconRefresher lo llama cuando cambia el watermark de categorías)
+    o cuando pasa CATEGORY_CACHE_TTL_S desde la última carga.
+    """
+
+    def __init__(self, ttl_seconds: float = CATEGORY_CACHE_TTL_S):
+        self.ttl_seconds = ttl_seconds
+        self._snapshot = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def loaded(self) -> bool:
+        return self._snapshot is not None
+
+    @property
+    def needs_load(self) -> bool:
+        """¿La próxima consulta irá a la BD (sin cargar o vencido)?"""
+        snapshot = self._snapshot
+        return snapshot is None or bool(
+            self.ttl_seconds and time.monotonic() - snapshot.loaded_at > self.ttl_seconds
+        )
+
+    def _current(self, db=None) -> CategorySnapshot:
+        snapshot = self._snapshot
+        if self.needs_load:
+            with self._load_lock:
+                if self._snapshot is snapshot:
+                    self.refresh(db)
+            snapshot = self._snapshot
+        return snapshot
+
+    def load(self, db=None):
+        """Cargar la tabla si todavía no se cargó"""
+        self._current(db)
+
+    def refresh(self, db=None):
+        """Releer todas las categorías (con la sesión dada o con una propia)"""
+        if db is None:
+            with session_scope() as own_db:
+                rows = self._read(own_db)
+        else:
+            rows = self._read(db)
+        self._snapshot = self._build(rows)
+
+    def invalidate(self):
+        self._snapshot = None
+
+    def _read(self, db) -> list:
+        return db.query(Categoria.id, Categoria.nombre, Categoria.categoria_padre_id).all()
+
+    def _build(self, rows) -> CategorySnapshot:
+        ids_by_name, names_by_id, parent_by_id, children_by_id = {}, {}, {}, {}
+        for categoria_id, nombre, padre_id in rows:
+            ids_by_name.setdefault(normalize_nombre(nombre), categoria_id)
+            names_by_id[categoria_id] = nombre
+            parent_by_id[categoria_id] = padre_id
+            if padre_id is not None:
+                children_by_id.setdefault(padre_id, []).append(categoria_id)
+        # Las variantes no pisan un nombre real ("tablet" puede ser otra categoría)
+        for categoria_id, nombre, _ in rows:
+            for variante in categoria_variantes(nombre):
+                ids_by_name.setdefault(variante, categoria_id)
+
+        ancestors_by_id = {categoria_id: self._ancestors(categoria_id, parent_by_id) for categoria_id in names_by_id}
+        subtrees = {categoria_id: [categoria_id] for categoria_id in names_by_id}
+        for categoria_id, ancestros in ancestors_by_id.items():
+            for ancestro in ancestros:
+                subtrees[ancestro].append(categoria_id)
+        subtree_by_id = {categoria_id: tuple(sorted(ids)) for categoria_id, ids in subtrees.items()}
+        return CategorySnapshot(
+            ids_by_name, names_by_id, parent_by_id, children_by_id,
+            ancestors_by_id, subtree_by_id, time.monotonic(),
+        )
+
+    @staticmethod
+    def _ancestors(categoria_id: int, parent_by_id: dict) -> tuple:
+        """Padre, abuelo, ... hasta la raíz (corta si hay un ciclo o un padre inexistente)"""
+        ancestros, vistos = [], {categoria_id}
+        padre = parent_by_id.get(categoria_id)
+        while padre is not None and padre in parent_by_id and padre not in vistos:
+            ancestros.append(padre)
+            vistos.add(padre)
+            padre = parent_by_id.get(padre)
+        return tuple(ancestros)
+
+    def get_id(self, nombre: str, db=None) -> Optional[int]:
+        if not nombre:
+            return None
+        return self._current(db).ids_by_name.get(normalize_nombre(nombre))
+
+    def get_nombre(self, categoria_id: int, db=None) -> Optional[str]:
+        return self._current(db).names_by_id.get(categoria_id)
+
+    def parent_id(self, categoria_id: int, db=None) -> Optional[int]:
+        return self._current(db).parent_by_id.get(categoria_id)
+
+    def children_ids(self, categoria_id: int, db=None) -> list:
+        return list(self._current(db).children_by_id.get(categoria_id, ()))
+
+    def ancestor_ids(self, categoria_id: int, db=None) -> tuple:
+        return self._current(db).ancestors_by_id.get(categoria_id, ())
+
+    def subtree_ids(self, categoria_id: int, db=None) -> tuple:
+        """La categoría y todas sus descendientes, ordenadas (solo ella si no está en el cache)"""
+        return self._current(db).subtree_by_id.get(categoria_id, (categoria_id,))
+
+
+# Instancia compartida por FuncionesCRUD, extract_product_name y los endpoints
+categoria_cache = CategoryCache()
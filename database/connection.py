@@ -1,6 +1,9 @@
+from contextlib import contextmanager
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, scoped_session
 from sqlalchemy.ext.declarative import declarative_base
+from database.pool_metrics import InstrumentedQueuePool
 import os
 from dotenv import load_dotenv
 
@@ -8,13 +11,58 @@ load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 
-engine = create_engine(DATABASE_URL, pool_pre_ping=True )
-Session_Local = scoped_session(sessionmaker(autocommit = False, autoflush=False, bind=engine))
+# Pool de conexiones (por proceso/worker de uvicorn)
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+DB_POOL_TIMEOUT_S = float(os.getenv("DB_POOL_TIMEOUT_S", "10"))
+DB_POOL_RECYCLE_S = int(os.getenv("DB_POOL_RECYCLE_S", "1800"))
+DB_CONNECT_TIMEOUT_S = int(os.getenv("DB_CONNECT_TIMEOUT_S", "5"))
+
+
+def pool_options(url: str) -> dict:
+    """Tamaño, timeouts y reciclado del pool; SQLite en memoria usa su pool propio"""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        return {}
+    return {
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT_S,
+        "pool_recycle": DB_POOL_RECYCLE_S,
+    }
+
+
+def connect_options(url: str) -> dict:
+    if make_url(url).get_backend_name() == "postgresql":
+        return {"connect_timeout": DB_CONNECT_TIMEOUT_S}
+    return {}
+
+
+_pool = pool_options(DATABASE_URL)
+engine = create_engine(
+    DATABASE_URL,
+    pool_pre_ping=True,
+    connect_args=connect_options(DATABASE_URL),
+    **({"poolclass": InstrumentedQueuePool, **_pool} if _pool else {}),
+)
+SessionFactory = sessionmaker(autocommit = False, autoflush=False, bind=engine)
+Session_Local = scoped_session(SessionFactory)
 Base = declarative_base()
 
 def get_db():
-    db = Session_Local()
+    # Sesión propia por request: la scoped (por hilo) se compartía entre
+    # requests que caen en el mismo hilo del threadpool
+    db = SessionFactory()
+    try:
+        yield db
+    finally:
+        db.close()
+
+@contextmanager
+def session_scope():
+    """Sesión propia (no la del hilo) para tareas fuera de un request; siempre se cierra"""
+    db = SessionFactory()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
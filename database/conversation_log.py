@@ -0,0 +1,201 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from sqlalchemy import insert
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database.async_connection import async_session_scope
+from models.database import Conversacion, IntencionDetectada, UsuarioSesion
+
+logger = logging.getLogger("database")
+
+CONVERSATION_LOG_ENABLED = os.getenv("CONVERSATION_LOG", "1") == "1"
+# Se escribe cada N turnos o cada T ms, lo que llegue primero
+CONVERSATION_LOG_BATCH_SIZE = int(os.getenv("CONVERSATION_LOG_BATCH_SIZE", "200"))
+CONVERSATION_LOG_FLUSH_MS = float(os.getenv("CONVERSATION_LOG_FLUSH_MS", "1000"))
+# Turnos en memoria como máximo; si la BD no da abasto se descartan los nuevos
+CONVERSATION_LOG_MAX_PENDING = int(os.getenv("CONVERSATION_LOG_MAX_PENDING", "10000"))
+# Espera máxima para vaciar la cola al apagar la app
+CONVERSATION_LOG_DRAIN_TIMEOUT_S = float(os.getenv("CONVERSATION_LOG_DRAIN_TIMEOUT_S", "5"))
+
+# Marca de fin para el worker (close())
+_STOP = object()
+
+
+def _insert_ignore(dialect: str, table):
+    """INSERT que ignora session_id repetidos (otro worker pudo crear la sesión)"""
+    # Solo hay driver async para PostgreSQL y SQLite (ASYNC_DRIVERS)
+    insert_fn = pg_insert if dialect == "postgresql" else sqlite_insert
+    return insert_fn(table).on_conflict_do_nothing(index_elements=["session_id"])
+
+
+class ConversationLogWriter:
+    """
+    Registro diferido (write-behind) de conversaciones e intenciones.
+
+    log_turn() arma las filas y las deja en una cola acotada sin tocar la BD,
+    así que al request le cuesta microsegundos. Un worker junta hasta
+    batch_size turnos o espera flush_ms y los escribe con un INSERT masivo por
+    tabla, creando antes las filas de usuarios_sesiones que falten. Si la
+    cola está llena el turno se descarta (y se cuenta). close() vacía la
+    cola antes de apagar la app.
+    """
+
+    def __init__(self, session_factory=async_session_scope, enabled: bool = CONVERSATION_LOG_ENABLED,
+                 batch_size: int = CONVERSATION_LOG_BATCH_SIZE, flush_ms: float = CONVERSATION_LOG_FLUSH_MS,
+                 max_pending: int = CONVERSATION_LOG_MAX_PENDING):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_ms / 1000
+        self.max_pending = max_pending
+        self._queue = None
+        self._worker = None
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+
+    def log_turn(self, session_id: str, mensaje: str, respuesta: str, intent: str, confidence: float,
+                 entities: dict, productos: list = (), started_at: float = None,
+                 ip_address: str = None, user_agent: str = None):
+        """Encolar un turno del chat; nunca espera ni lanza excepciones"""
+        if not self.enabled:
+            return
+        try:
+            self._ensure_worker()
+        except RuntimeError:
+            # Sin event loop (p. ej. un script síncrono): no hay quién escriba
+            self.dropped += 1
+            return
+        ahora = datetime.now()
+        elapsed_ms = int((time.perf_counter() - started_at) * 1000) if started_at is not None else None
+        ids = [p.id for p in productos]
+        entities = dict(entities or {})
+        turn = (
+            {
+                "session_id": session_id,
+                "mensaje_usuario": mensaje,
+                "respuesta_bot": respuesta,
+                "intencion_detectada": intent,
+                "entidades_extraidas": entities,
+                "contexto_bd": {"productos": ids},
+                "tiempo_respuesta_ms": elapsed_ms,
+                "fecha_creacion": ahora,
+            },
+            {
+                "session_id": session_id,
+                "intencion": intent,
+                "confianza": round(float(confidence), 2),
+                "entidades": entities,
+                "mensaje_original": mensaje,
+                "productos_consultados": ids,
+                "resultado_exitoso": bool(ids),
+                "fecha_deteccion": ahora,
+            },
+            {"ip_address": ip_address, "user_agent": user_agent},
+        )
+        try:
+            self._queue.put_nowait(turn)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+    async def close(self, timeout: float = CONVERSATION_LOG_DRAIN_TIMEOUT_S):
+        """Escribir lo pendiente y detener el worker"""
+        if self._worker is None:
+            return
+        worker, self._worker = self._worker, None
+        if not worker.done():
+            await self._queue.put(_STOP)
+            try:
+                await asyncio.wait_for(worker, timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Registro de conversaciones: {self._queue.qsize()} turnos sin escribir al apagar")
+        self._queue = None
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            loop = asyncio.get_running_loop()
+            # La cola se crea dentro del event loop que la va a usar
+            if self._queue is None:
+                self._queue = asyncio.Queue(maxsize=self.max_pending)
+            self._worker = loop.create_task(self._run())
+
+    async def _collect_batch(self) -> tuple:
+        """(turnos, hay_que_parar)"""
+        loop = asyncio.get_running_loop()
+        first = await self._queue.get()
+        if first is _STOP:
+            return [], True
+        batch = [first]
+        deadline = loop.time() + self.flush_interval
+        while len(batch) < self.batch_size:
+            try:
+                item = self._queue.get_nowait()
+            except asyncio.QueueEmpty:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            if item is _STOP:
+                return batch, True
+            batch.append(item)
+        return batch, False
+
+    async def _run(self):
+        while True:
+            batch, stop = await self._collect_batch()
+            if batch:
+                await self.flush(batch)
+            if stop:
+                return
+
+    async def flush(self, batch: list):
+        """Escribir un lote; si falla se registra y el lote se pierde"""
+        try:
+            async with self.session_factory() as db:
+                await self._write(db, batch)
+            self.written += len(batch)
+            self.batches += 1
+        except Exception as e:
+            self.failed += len(batch)
+            logger.error(f"No se pudieron guardar {len(batch)} turnos de conversación: {e}")
+
+    async def _write(self, db, batch: list):
+        sesiones = {}
+        for conversacion, _, cliente in batch:
+            session_id = conversacion["session_id"]
+            if session_id and session_id not in sesiones:
+                sesiones[session_id] = {
+                    "session_id": session_id,
+                    "ip_address": cliente["ip_address"],
+                    "user_agent": cliente["user_agent"],
+                    "fecha_inicio": conversacion["fecha_creacion"],
+                    "fecha_ultimo_acceso": conversacion["fecha_creacion"],
+                    "activo": True,
+                }
+        if sesiones:
+            dialect = db.get_bind().dialect.name
+            await db.execute(_insert_ignore(dialect, UsuarioSesion.__table__), list(sesiones.values()))
+        await db.execute(insert(Conversacion.__table__), [conversacion for conversacion, _, _ in batch])
+        await db.execute(insert(IntencionDetectada.__table__), [intencion for _, intencion, _ in batch])
+        await db.commit()
+
+
+# Instancia compartida por /chat y /ws
+conversation_log = ConversationLogWriter()
@@ -0,0 +1,45 @@
+"""
+Aplicar las migraciones SQL de database/migrations/ que correspondan al
+motor de la BD (archivos NNN_nombre.<dialecto>.sql, en orden).
+
+Uso:
+    python -m database.migrate
+"""
+from pathlib import Path
+from sqlalchemy import text
+
+MIGRATIONS_DIR = Path(__file__).parent / "migrations"
+
+
+def pending_migrations(dialect: str, applied: set) -> list:
+    files = sorted(MIGRATIONS_DIR.glob(f"*.{dialect}.sql"))
+    return [f for f in files if f.name not in applied]
+
+
+def apply_migrations(engine) -> list:
+    """Ejecutar las migraciones que falten; devuelve los nombres aplicados"""
+    dialect = engine.dialect.name
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations (nombre VARCHAR(255) PRIMARY KEY)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT nombre FROM schema_migrations"))}
+
+    done = []
+    for path in pending_migrations(dialect, applied):
+        sql = path.read_text(encoding="utf-8")
+        with engine.begin() as conn:
+            if dialect == "sqlite":
+                # Los triggers llevan ';' internos: el script va entero al driver
+                conn.connection.executescript(sql)
+            else:
+                conn.exec_driver_sql(sql)
+            conn.execute(text("INSERT INTO schema_migrations (nombre) VALUES (:nombre)"), {"nombre": path.name})
+        done.append(path.name)
+    return done
+
+
+if __name__ == "__main__":
+    from database.connection import engine
+    aplicadas = apply_migrations(engine)
+    print(f"✅ Migraciones aplicadas: {', '.join(aplicadas) if aplicadas else 'ninguna pendiente'}")
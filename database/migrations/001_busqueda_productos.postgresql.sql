@@ -0,0 +1,16 @@
+-- Búsqueda de texto en productos (PostgreSQL 12+)
+-- tsvector en español para características/descripciones y pg_trgm para
+-- que los ILIKE '%...%' sobre marca/nombre usen índice en vez de seq scan.
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+
+ALTER TABLE productos ADD COLUMN IF NOT EXISTS busqueda tsvector
+    GENERATED ALWAYS AS (
+        setweight(to_tsvector('spanish', coalesce(nombre, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(marca, '')), 'A') ||
+        setweight(to_tsvector('spanish', coalesce(descripcion, '')), 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_productos_busqueda ON productos USING GIN (busqueda);
+CREATE INDEX IF NOT EXISTS idx_productos_marca_trgm ON productos USING GIN (marca gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_productos_nombre_trgm ON productos USING GIN (nombre gin_trgm_ops);
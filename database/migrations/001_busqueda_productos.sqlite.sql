@@ -0,0 +1,28 @@
+-- Búsqueda de texto en productos (SQLite, tests y desarrollo local)
+-- FTS5 con tokenizer trigram: coincidencias por subcadena sin distinguir
+-- mayúsculas, igual que ILIKE '%...%' pero con índice.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS productos_fts USING fts5(
+    nombre, marca, descripcion,
+    content='productos', content_rowid='id', tokenize='trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS productos_fts_insert AFTER INSERT ON productos BEGIN
+    INSERT INTO productos_fts(rowid, nombre, marca, descripcion)
+    VALUES (new.id, new.nombre, new.marca, new.descripcion);
+END;
+
+CREATE TRIGGER IF NOT EXISTS productos_fts_delete AFTER DELETE ON productos BEGIN
+    INSERT INTO productos_fts(productos_fts, rowid, nombre, marca, descripcion)
+    VALUES ('delete', old.id, old.nombre, old.marca, old.descripcion);
+END;
+
+CREATE TRIGGER IF NOT EXISTS productos_fts_update AFTER UPDATE ON productos BEGIN
+    INSERT INTO productos_fts(productos_fts, rowid, nombre, marca, descripcion)
+    VALUES ('delete', old.id, old.nombre, old.marca, old.descripcion);
+    INSERT INTO productos_fts(rowid, nombre, marca, descripcion)
+    VALUES (new.id, new.nombre, new.marca, new.descripcion);
+END;
+
+-- Indexar las filas que ya existían
+INSERT INTO productos_fts(productos_fts) VALUES ('rebuild');
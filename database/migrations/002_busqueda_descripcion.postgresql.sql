@@ -0,0 +1,9 @@
+-- Características solo sobre la descripción (PostgreSQL 12+)
+-- busqueda mezcla nombre, marca y descripción: filtrar "16gb" con ella
+-- también encontraba el texto en el nombre o la marca. Esta columna tiene
+-- la misma semántica que el ILIKE sobre descripcion, con su propio índice.
+
+ALTER TABLE productos ADD COLUMN IF NOT EXISTS busqueda_descripcion tsvector
+    GENERATED ALWAYS AS (to_tsvector('spanish', coalesce(descripcion, ''))) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_productos_busqueda_descripcion ON productos USING GIN (busqueda_descripcion);
@@ -0,0 +1,20 @@
+-- Fecha de última modificación de cada producto (PostgreSQL 12+)
+-- El watermark del catálogo compara max(fecha_actualizacion): cualquier
+-- edición lo mueve sin recorrer la tabla. La pone un trigger para que
+-- también cuenten los UPDATE hechos a mano, fuera de la aplicación.
+
+ALTER TABLE productos ADD COLUMN IF NOT EXISTS fecha_actualizacion TIMESTAMP
+    NOT NULL DEFAULT (now() AT TIME ZONE 'UTC');
+
+CREATE OR REPLACE FUNCTION marcar_fecha_actualizacion() RETURNS trigger AS $$
+BEGIN
+    NEW.fecha_actualizacion := clock_timestamp() AT TIME ZONE 'UTC';
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS productos_fecha_actualizacion ON productos;
+CREATE TRIGGER productos_fecha_actualizacion BEFORE INSERT OR UPDATE ON productos
+    FOR EACH ROW EXECUTE FUNCTION marcar_fecha_actualizacion();
+
+CREATE INDEX IF NOT EXISTS idx_productos_fecha_actualizacion ON productos (fecha_actualizacion);
@@ -0,0 +1,18 @@
+-- Fecha de última modificación de cada producto (SQLite, tests y desarrollo local)
+-- La columna la crea el modelo (create_all) y el ORM la actualiza; estos
+-- triggers cubren los INSERT/UPDATE hechos a mano que no la tocan.
+
+CREATE INDEX IF NOT EXISTS idx_productos_fecha_actualizacion ON productos (fecha_actualizacion);
+
+CREATE TRIGGER IF NOT EXISTS productos_fecha_actualizacion_insert AFTER INSERT ON productos
+WHEN new.fecha_actualizacion IS NULL BEGIN
+    UPDATE productos SET fecha_actualizacion = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS productos_fecha_actualizacion_update AFTER UPDATE ON productos
+WHEN new.fecha_actualizacion IS old.fecha_actualizacion BEGIN
+    UPDATE productos SET fecha_actualizacion = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = new.id;
+END;
+
+UPDATE productos SET fecha_actualizacion = strftime('%Y-%m-%d %H:%M:%f', 'now')
+WHERE fecha_actualizacion IS NULL;
@@ -0,0 +1,12 @@
+-- Fecha de última modificación de cada categoría (PostgreSQL 12+)
+-- Con ella el watermark ve los renombres de categorías, que no mueven
+-- ni el max id ni los conteos. Usa la función de 003_fecha_actualizacion.
+
+ALTER TABLE categorias ADD COLUMN IF NOT EXISTS fecha_actualizacion TIMESTAMP
+    NOT NULL DEFAULT (now() AT TIME ZONE 'UTC');
+
+DROP TRIGGER IF EXISTS categorias_fecha_actualizacion ON categorias;
+CREATE TRIGGER categorias_fecha_actualizacion BEFORE INSERT OR UPDATE ON categorias
+    FOR EACH ROW EXECUTE FUNCTION marcar_fecha_actualizacion();
+
+CREATE INDEX IF NOT EXISTS idx_categorias_fecha_actualizacion ON categorias (fecha_actualizacion);
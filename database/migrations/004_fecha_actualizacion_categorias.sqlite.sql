@@ -0,0 +1,17 @@
+-- Fecha de última modificación de cada categoría (SQLite, tests y desarrollo local)
+-- Mismos triggers que 003_fecha_actualizacion, para la tabla categorias.
+
+CREATE INDEX IF NOT EXISTS idx_categorias_fecha_actualizacion ON categorias (fecha_actualizacion);
+
+CREATE TRIGGER IF NOT EXISTS categorias_fecha_actualizacion_insert AFTER INSERT ON categorias
+WHEN new.fecha_actualizacion IS NULL BEGIN
+    UPDATE categorias SET fecha_actualizacion = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = new.id;
+END;
+
+CREATE TRIGGER IF NOT EXISTS categorias_fecha_actualizacion_update AFTER UPDATE ON categorias
+WHEN new.fecha_actualizacion IS old.fecha_actualizacion BEGIN
+    UPDATE categorias SET fecha_actualizacion = strftime('%Y-%m-%d %H:%M:%f', 'now') WHERE id = new.id;
+END;
+
+UPDATE categorias SET fecha_actualizacion = strftime('%Y-%m-%d %H:%M:%f', 'now')
+WHERE fecha_actualizacion IS NULL;
@@ -0,0 +1,7 @@
+-- Quitar el tsvector combinado de 001_busqueda_productos (PostgreSQL 12+)
+-- Desde 002 las características se buscan en busqueda_descripcion y la
+-- marca/nombre van por pg_trgm: busqueda y su índice GIN no los usa
+-- ninguna consulta y solo encarecían cada INSERT/UPDATE de productos.
+
+DROP INDEX IF EXISTS idx_productos_busqueda;
+ALTER TABLE productos DROP COLUMN IF EXISTS busqueda;
@@ -0,0 +1,90 @@
+import threading
+import time
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+# Esperas de checkout por encima de esto cuentan como lentas
+SLOW_CHECKOUT_S = 0.1
+
+
+class PoolStats:
+    """Contadores de espera al pedir una conexión al pool"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.checkouts = 0
+            self.timeouts = 0
+            self.slow_checkouts = 0
+            self.wait_total_s = 0.0
+            self.wait_max_s = 0.0
+
+    def record(self, wait_s: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_total_s += wait_s
+            self.wait_max_s = max(self.wait_max_s, wait_s)
+            if wait_s > SLOW_CHECKOUT_S:
+                self.slow_checkouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            calls = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "slow_checkouts": self.slow_checkouts,
+                "wait_avg_ms": round(self.wait_total_s / calls * 1000, 3) if calls else 0.0,
+                "wait_max_ms": round(self.wait_max_s * 1000, 3),
+            }
+
+
+class _TimedCheckout:
+    """Mide cuánto espera _do_get (lo que tarda conseguir una conexión libre)"""
+
+    stats: PoolStats = None
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.stats.record(time.perf_counter() - start, timed_out=True)
+            raise
+        self.stats.record(time.perf_counter() - start)
+        return connection
+
+
+# Los contadores son de clase: sobreviven a pool.recreate() (engine.dispose())
+sync_pool_stats = PoolStats()
+async_pool_stats = PoolStats()
+
+
+class InstrumentedQueuePool(_TimedCheckout, QueuePool):
+    stats = sync_pool_stats
+
+
+class InstrumentedAsyncQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    stats = async_pool_stats
+
+
+def pool_status(engine) -> dict:
+    """Uso actual del pool del engine + contadores de espera si está instrumentado"""
+    pool = engine.pool
+    status = {"pool": type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        status.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+        })
+    if isinstance(pool, _TimedCheckout):
+        status.update(pool.stats.snapshot())
+    return status
@@ -0,0 +1,120 @@
+import os
+import re
+import numpy as np
+from database.catalog_snapshot import CATALOG_SNAPSHOT_TTL_S, CatalogSnapshotStore
+from database.category_cache import normalize_nombre
+from database.product_ranking import STOPWORDS, load_text_rows
+
+SEMANTIC_SEARCH_ENABLED = os.getenv("SEMANTIC_SEARCH", "1") == "1"
+# Similitud coseno mínima para mostrar un producto
+SEMANTIC_MIN_SCORE = float(os.getenv("SEMANTIC_MIN_SCORE", "0.35"))
+# float16 ocupa la mitad de memoria; el producto punto se calcula en float32
+PRODUCT_EMBEDDINGS_DTYPE = os.getenv("PRODUCT_EMBEDDINGS_DTYPE", "float32")
+
+_WORD_RE = re.compile(r"\w+")
+
+
+def text_vector(text: str, word_vectors) -> np.ndarray:
+    """Promedio de los vectores de las palabras conocidas, normalizado (None si no hay ninguna)"""
+    suma, encontradas = None, 0
+    for word in _WORD_RE.findall((text or "").lower()):
+        plegada = normalize_nombre(word)
+        if len(plegada) < 2 or plegada in STOPWORDS:
+            continue
+        # Los vectores de fastText tienen las palabras con tilde; si no está, sin tilde
+        vector = word_vectors.get(word)
+        if vector is None and plegada != word:
+            vector = word_vectors.get(plegada)
+        if vector is None:
+            continue
+        vector = np.asarray(vector, dtype=np.float32)
+        suma = vector.copy() if suma is None else suma + vector
+        encontradas += 1
+    if not encontradas:
+        return None
+    norma = np.linalg.norm(suma)
+    return suma / norma if norma else None
+
+
+class ProductEmbeddings:
+    """
+    Matriz de embeddings de productos (una fila por producto, ordenadas por
+    id): promedio de los vectores de palabras de nombre + descripción,
+    normalizado a norma 1, en un array contiguo de NumPy. La similitud
+    coseno con una consulta es un solo producto matriz-vector y el top-k
+    sale de argpartition. Nunca se modifica: extend() devuelve una nueva.
+    """
+
+    def __init__(self, ids: np.ndarray, matrix: np.ndarray, word_vectors):
+        self.ids = ids
+        self.matrix = matrix
+        self.word_vectors = word_vectors
+
+    @classmethod
+    def from_rows(cls, rows: list, word_vectors, dtype: str = PRODUCT_EMBEDDINGS_DTYPE) -> "ProductEmbeddings":
+        rows = sorted(rows, key=lambda r: r[0])
+        ids = np.fromiter((r[0] for r in rows), dtype=np.int64, count=len(rows))
+        matrix = np.zeros((len(rows), word_vectors.width), dtype=dtype)
+        for i, (_, nombre, descripcion) in enumerate(rows):
+            vector = text_vector(f"{nombre} {descripcion or ''}", word_vectors)
+            if vector is not None:
+                matrix[i] = vector
+        return cls(ids, np.ascontiguousarray(matrix), word_vectors)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def max_id(self) -> int:
+        return int(self.ids[-1]) if len(self.ids) else 0
+
+    def extend(self, new_rows: list) -> "ProductEmbeddings":
+        nuevos = ProductEmbeddings.from_rows(new_rows, self.word_vectors, dtype=self.matrix.dtype)
+        return ProductEmbeddings(
+            np.concatenate((self.ids, nuevos.ids)),
+            np.ascontiguousarray(np.concatenate((self.matrix, nuevos.matrix))),
+            self.word_vectors,
+        )
+
+    def top_k(self, text: str, k: int, min_score: float = SEMANTIC_MIN_SCORE) -> list:
+        """[(producto_id, similitud)] de los k productos más parecidos al texto, de mayor a menor"""
+        query = text_vector(text, self.word_vectors)
+        if query is None or not len(self.ids):
+            return []
+        scores = self.matrix @ query
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+        else:
+            top = np.arange(len(scores))
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.ids[i]), float(scores[i])) for i in top if scores[i] >= min_score]
+
+
+class ProductEmbeddingStore(CatalogSnapshotStore):
+    """
+    Dueño de la matriz de embeddings vigente; se actualiza igual que la foto
+    del catálogo. Necesita word_vectors (los del modelo del NLU): sin ellos
+    no se carga y la búsqueda semántica no devuelve nada.
+    """
+
+    label = "Embeddings de productos"
+
+    def __init__(self, enabled: bool = SEMANTIC_SEARCH_ENABLED, ttl_seconds: float = CATALOG_SNAPSHOT_TTL_S,
+                 word_vectors=None):
+        super().__init__(enabled, ttl_seconds)
+        self.word_vectors = word_vectors
+
+    def load(self, db=None):
+        if self.word_vectors is None:
+            return
+        super().load(db)
+
+    def _build(self, db) -> ProductEmbeddings:
+        return ProductEmbeddings.from_rows(load_text_rows(db), self.word_vectors)
+
+    def _extend(self, db) -> ProductEmbeddings:
+        return self.snapshot.extend(load_text_rows(db, after_id=self.snapshot.max_id))
+
+
+# Instancia compartida por FuncionesCRUD; main le pasa los vectores del NLU
+product_embeddings = ProductEmbeddingStore()
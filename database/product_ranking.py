@@ -0,0 +1,168 @@
+import heapq
+import itertools
+import math
+import os
+import re
+from collections import Counter
+import numpy as np
+from database.catalog_snapshot import CATALOG_SNAPSHOT_TTL_S, CatalogSnapshotStore
+from database.category_cache import normalize_nombre
+from models.database import Producto
+
+PRODUCT_RANKING_ENABLED = os.getenv("PRODUCT_RANKING", "1") == "1"
+# Sin la foto del catálogo, la BD filtra entre los tantos ids con más puntaje
+RANK_CANDIDATES = int(os.getenv("RANK_CANDIDATES", "500"))
+
+# Parámetros usuales de BM25; el nombre pesa como si apareciera NOMBRE_WEIGHT veces
+BM25_K1 = 1.2
+BM25_B = 0.75
+NOMBRE_WEIGHT = 2
+
+_TOKEN_RE = re.compile(r"\w+")
+
+# Palabras vacías y muletillas del chat que no distinguen un producto de otro
+STOPWORDS = frozenset("""
+    a al con de del el en es la las lo los mas me mi muy o para por que se sin sobre su sus
+    un una unos unas y ya
+    busco buscar quiero necesito tienes tienen tiene hay dame muestrame ver info informacion
+""".split())
+
+
+def _stem(token: str) -> str:
+    """Plural → singular aproximado: "pantallas" y "pantalla" cuentan como el mismo término"""
+    if len(token) > 4 and token.endswith("es") and token[-3] in "lrndj" and token[-4] in "aeiou":
+        return token[:-2]
+    if len(token) > 3 and token.endswith("s"):
+        token = token[:-1]
+    # "smartphone" y "smartphones" (→ "smartphon") deben dar el mismo término
+    if len(token) > 4 and token.endswith("ne") and token[-3] in "aeiou":
+        return token[:-1]
+    return token
+
+
+def tokenize(text: str) -> list:
+    """Minúsculas, sin tildes, sin palabras vacías y con el plural plegado"""
+    tokens = _TOKEN_RE.findall(normalize_nombre(text or ""))
+    return [_stem(t) for t in tokens if len(t) > 1 and t not in STOPWORDS]
+
+
+def load_text_rows(db, after_id: int = None) -> list:
+    query = db.query(Producto.id, Producto.nombre, Producto.descripcion)
+    if after_id is not None:
+        query = query.filter(Producto.id > after_id)
+    return [tuple(row) for row in query.order_by(Producto.id).all()]
+
+
+class BM25Index:
+    """
+    Índice invertido de nombre + descripción de los productos, con BM25.
+
+    postings: término → {producto_id: frecuencia}. Nunca se modifica:
+    extend() devuelve un índice nuevo que comparte las listas de los
+    términos que no cambiaron.
+    """
+
+    def __init__(self, k1: float = BM25_K1, b: float = BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_len = {}
+        self.total_len = 0
+        self.max_id = 0
+
+    @classmethod
+    def from_rows(cls, rows: list) -> "BM25Index":
+        return cls().extend(rows)
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    def extend(self, rows: list) -> "BM25Index":
+        """Índice nuevo con los productos (id, nombre, descripcion) agregados"""
+        index = BM25Index(self.k1, self.b)
+        index.postings = dict(self.postings)
+        index.doc_len = dict(self.doc_len)
+        index.total_len = self.total_len
+        index.max_id = self.max_id
+        nuevos = {}
+        for producto_id, nombre, descripcion in rows:
+            frecuencias = Counter(tokenize(nombre) * NOMBRE_WEIGHT + tokenize(descripcion))
+            index.doc_len[producto_id] = sum(frecuencias.values())
+            index.total_len += index.doc_len[producto_id]
+            index.max_id = max(index.max_id, producto_id)
+            for term, tf in frecuencias.items():
+                nuevos.setdefault(term, {})[producto_id] = tf
+        for term, docs in nuevos.items():
+            index.postings[term] = {**self.postings.get(term, {}), **docs}
+        return index
+
+    def idf(self, df: int) -> float:
+        return math.log(1 + (len(self.doc_len) - df + 0.5) / (df + 0.5))
+
+    def scores(self, query: str) -> dict:
+        """{producto_id: puntaje} de los productos con al menos un término de la consulta"""
+        if not self.doc_len:
+            return {}
+        avgdl = (self.total_len / len(self.doc_len)) or 1.0
+        k1, b = self.k1, self.b
+        acumulado = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf(len(docs))
+            for producto_id, tf in docs.items():
+                norm = tf + k1 * (1 - b + b * self.doc_len[producto_id] / avgdl)
+                acumulado[producto_id] = acumulado.get(producto_id, 0.0) + idf * tf * (k1 + 1) / norm
+        return acumulado
+
+    def best_ids(self, query: str, n: int) -> list:
+        """Los n ids con más puntaje en todo el índice (en orden de id, para un IN)"""
+        scores = self.scores(query)
+        return sorted(heapq.nlargest(n, scores, key=lambda pid: (scores[pid], -pid)))
+
+    def top_ids(self, query: str, candidate_ids, k: int) -> list:
+        """
+        Los k candidatos más relevantes (selección con heap, sin ordenar todo).
+        Empates por id; si hay menos de k con puntaje se completa con el
+        resto de los candidatos en su orden original.
+        """
+        ids = candidate_ids.tolist() if isinstance(candidate_ids, np.ndarray) else list(candidate_ids)
+        scores = self.scores(query)
+        if len(scores) < len(ids):
+            candidatos = set(ids)
+            puntuados = [(s, pid) for pid, s in scores.items() if pid in candidatos]
+        else:
+            puntuados = [(scores[pid], pid) for pid in ids if pid in scores]
+        top = [pid for _, pid in heapq.nlargest(k, puntuados, key=lambda x: (x[0], -x[1]))]
+        if len(top) < k:
+            elegidos = set(top)
+            top.extend(itertools.islice((pid for pid in ids if pid not in elegidos), k - len(top)))
+        return top
+
+    def rank(self, query: str, productos: list, k: int) -> list:
+        """Los k productos (objetos con .id) más relevantes para la consulta"""
+        por_id = {p.id: p for p in productos}
+        return [por_id[pid] for pid in self.top_ids(query, por_id, k)]
+
+
+class ProductRankingStore(CatalogSnapshotStore):
+    """
+    Dueño del índice BM25 vigente. Se carga y se actualiza igual que la foto
+    del catálogo (watermark: solo lo nuevo si hubo inserciones, todo si no).
+    """
+
+    label = "Índice de relevancia"
+
+    def __init__(self, enabled: bool = PRODUCT_RANKING_ENABLED, ttl_seconds: float = CATALOG_SNAPSHOT_TTL_S):
+        super().__init__(enabled, ttl_seconds)
+
+    def _build(self, db) -> BM25Index:
+        return BM25Index.from_rows(load_text_rows(db))
+
+    def _extend(self, db) -> BM25Index:
+        return self.snapshot.extend(load_text_rows(db, after_id=self.snapshot.max_id))
+
+
+# Instancia compartida por FuncionesCRUD
+product_ranking = ProductRankingStore()
@@ -1,36 +1,136 @@
+import os
+from sqlalchemy import func
 from sqlalchemy.orm import Session
+from database.catalog_snapshot import COLUMNS, catalog_snapshot
+from database.category_cache import categoria_cache
+from database.product_embeddings import product_embeddings
+from database.product_ranking import RANK_CANDIDATES, product_ranking
+from database.search_backend import get_search_backend
 from models.database import Producto, Categoria
+from models.records import ProductoResumen
 from typing import List, Optional
 
+# Productos que se traen por búsqueda (el prompt muestra 10) y tope por página
+SEARCH_LIMIT = 10
+MAX_PAGE_SIZE = 100
 
+# Intenciones cuya búsqueda puede devolver medio catálogo: van paginadas
+PAGINATED_INTENTS = ("buscar_producto", "info_producto")
 
+# Las búsquedas del chat traen solo las columnas de ProductoResumen (sin
+# descripcion ni objetos ORM); PRODUCT_PROJECTION=0 vuelve a Producto completo
+PRODUCT_PROJECTION = os.getenv("PRODUCT_PROJECTION", "1") == "1"
 
-class FuncionesCRUD: 
-    def __init__(self,db: Session):
+
+def paginate(query, limit: int, offset: int = 0, after_id: Optional[int] = None):
+    """
+    Página ordenada por id. Con after_id (cursor = último id de la página
+    anterior) se usa keyset en vez de OFFSET, que no recorre las filas saltadas.
+    """
+    query = query.order_by(Producto.id)
+    if after_id is not None:
+        query = query.filter(Producto.id > after_id)
+    elif offset:
+        query = query.offset(offset)
+    return query.limit(min(limit, MAX_PAGE_SIZE))
+
+
+class ProductQueries:
+    """
+    Armado de las consultas de productos, sin ejecutarlas.
+
+    Los filtros se aplican con .filter/.order_by/.limit, que existen tanto en
+    Query (sesión síncrona) como en select() (AsyncSession), así que
+    FuncionesCRUD y AsyncFuncionesCRUD comparten la misma lógica.
+    """
+
+    def __init__(self, db, search_backend=None, catalog=None, ranking=None, embeddings=None,
+                 projection: bool = PRODUCT_PROJECTION):
         self.db = db
+        self.projection = projection
+        self._search_backend = search_backend
+        self._catalog = catalog if catalog is not None else catalog_snapshot
+        self._ranking = ranking if ranking is not None else product_ranking
+        self._embeddings = embeddings if embeddings is not None else product_embeddings
 
-    def listar_productos(self):
-        return self.db.query(Producto).all()
-    
-    def get_categoria_id(self, nombre_categoria: str) -> Optional[int]:
-        categoria = self.db.query(Categoria).filter(Categoria.nombre.ilike(nombre_categoria)).first()
-        return categoria.id if categoria else None
-    
-    def search_by_intent(self, intent: str, entities: dict) -> list:
-        query = self.db.query(Producto)
+    @property
+    def _entities(self) -> tuple:
+        """Qué se selecciona en las búsquedas: las columnas del resumen o el Producto completo"""
+        return COLUMNS if self.projection else (Producto,)
 
-        working_entities = entities.copy()
+    def _records(self, rows) -> list:
+        """Filas de la consulta → ProductoResumen (en modo proyección) o los Producto tal cual"""
+        if self.projection:
+            return [ProductoResumen(*row) for row in rows]
+        return list(rows)
 
-        if "categoria" in entities and isinstance(entities["categoria"], str):
-            categoria_id = self.get_categoria_id(entities["categoria"])
-            entities["categoria"] = categoria_id
+    @property
+    def search(self):
+        """Predicados de texto (FTS/trigram según el motor, ILIKE si no hay índices)"""
+        if self._search_backend is None:
+            self._search_backend = get_search_backend(self.db)
+        return self._search_backend
 
-        # Filtros dinámicos según intención y entidades
+    def _categoria_ids(self, categoria_id: int) -> tuple:
+        """La categoría y todas sus subcategorías (clausura precalculada en el cache)"""
+        return categoria_cache.subtree_ids(categoria_id)
+
+    def _categoria_filter(self, categoria_id: int):
+        """Un solo IN con el subárbol: "electronica" incluye laptops y celulares"""
+        ids = self._categoria_ids(categoria_id)
+        if len(ids) == 1:
+            return Producto.categoria_id == ids[0]
+        return Producto.categoria_id.in_(ids)
+
+    def _snapshot_categorias(self, entities: dict) -> Optional[tuple]:
+        """Subárbol de la categoría pedida, para filtrar la foto en memoria"""
+        if entities.get("categoria"):
+            return self._categoria_ids(entities["categoria"])
+        return None
+
+    def _ranking_for(self, intent: str, texto: Optional[str], offset: int = 0,
+                     after_id: Optional[int] = None, refresh: bool = True):
+        """Índice BM25 si la búsqueda se ordena por relevancia (primera página, con texto)"""
+        if not texto or intent not in PAGINATED_INTENTS or offset or after_id is not None:
+            return None
+        return self._ranking.current(refresh=refresh)
+
+    def _semantic_ids(self, texto: str, limit: int, refresh: bool = True) -> list:
+        """Ids más parecidos al texto (de sobra: después se descartan los inactivos)"""
+        embeddings = self._embeddings.current(refresh=refresh)
+        if embeddings is None or not texto:
+            return []
+        return [producto_id for producto_id, _ in embeddings.top_k(texto, limit * 2)]
+
+    def _relevant_query(self, intent: str, entities: dict, query, ids: list):
+        """Filtros de la intención sobre los ids con puntaje BM25, sin paginar por id"""
+        return self._search_query(intent, entities, query).filter(Producto.id.in_(ids))
+
+    @staticmethod
+    def _fill(ranked: list, primeros: list, k: int) -> list:
+        """Completar los relevantes con los primeros por id (los que no tienen puntaje)"""
+        elegidos = {p.id for p in ranked}
+        return (ranked + [p for p in primeros if p.id not in elegidos])[:k]
+
+    @staticmethod
+    def _in_order(productos: list, ids: list, limit: int) -> list:
+        por_id = {p.id: p for p in productos}
+        return [por_id[i] for i in ids if i in por_id][:limit]
+
+    def _snapshot_for(self, intent: str, entities: dict, refresh: bool = True):
+        """Foto en memoria del catálogo si ya está cargada y puede resolver el filtro"""
+        snapshot = self._catalog.current(refresh=refresh)
+        if snapshot is not None and snapshot.can_answer(intent, entities):
+            return snapshot
+        return None
+
+    def _search_query(self, intent: str, entities: dict, query):
+        """Filtros de buscar_producto / info_producto (compartidos con el conteo)"""
+        if "marca" in entities:
+            query = query.filter(self.search.marca_filter(entities['marca']))
+        if "categoria" in entities and entities["categoria"]:
+            query = query.filter(self._categoria_filter(entities["categoria"]))
         if intent == "buscar_producto":
-            if "marca" in entities:
-                query = query.filter(Producto.marca.ilike(f"%{entities['marca']}%"))
-            if "categoria" in entities and entities["categoria"]:
-                query = query.filter(Producto.categoria_id == entities["categoria"])
             if "rango_precio" in entities:
                 rp = entities["rango_precio"]
                 if "min" in rp:
@@ -39,48 +139,135 @@ class FuncionesCRUD:
                     query = query.filter(Producto.precio <= rp["max"])
             if "caracteristicas" in entities:
                 for car in entities["caracteristicas"]:
-                    query = query.filter(Producto.descripcion.ilike(f"%{car}%"))
-            return query.all()
+                    query = query.filter(self.search.caracteristica_filter(car))
+        return query
+
+    def _intent_query(self, intent: str, entities: dict, query, limit: int = SEARCH_LIMIT,
+                      offset: int = 0, after_id: Optional[int] = None):
+        """Filtros dinámicos según intención y entidades (categoria ya resuelta a id)"""
+        if intent == "buscar_producto":
+            query = self._search_query(intent, entities, query)
+            return paginate(query, limit, offset, after_id)
 
         elif intent == "recomendar_categoria":
             if "categoria" in entities and entities["categoria"]:
-                query = query.filter(Producto.categoria_id == entities["categoria"])
-            return query.order_by(Producto.precio.desc()).limit(5).all()
+                query = query.filter(self._categoria_filter(entities["categoria"]))
+            return query.order_by(Producto.precio.desc()).limit(5)
 
         elif intent == "comparar_precios":
             if "marca" in entities:
-                query = query.filter(Producto.marca.ilike(f"%{entities['marca']}%"))
+                query = query.filter(self.search.marca_filter(entities['marca']))
             if "categoria" in entities and entities["categoria"]:
-                query = query.filter(Producto.categoria_id == entities["categoria"])
-            return query.order_by(Producto.precio.asc()).limit(5).all()
+                query = query.filter(self._categoria_filter(entities["categoria"]))
+            return query.order_by(Producto.precio.asc()).limit(5)
         
         elif intent == "comparar_precios_web":
             if "marca" in entities:
-                query = query.filter(Producto.marca.ilike(f"%{entities['marca']}%"))
+                query = query.filter(self.search.marca_filter(entities['marca']))
             if "categoria" in entities and entities["categoria"]:
-                query = query.filter(Producto.categoria_id == entities["categoria"])
-            return query.order_by(Producto.precio.asc()).limit(5).all()
+                query = query.filter(self._categoria_filter(entities["categoria"]))
+            return query.order_by(Producto.precio.asc()).limit(5)
 
         elif intent == "info_producto":
-            if "marca" in entities:
-                query = query.filter(Producto.marca.ilike(f"%{entities['marca']}%"))
-            if "categoria" in entities and entities["categoria"]:
-                query = query.filter(Producto.categoria_id == entities["categoria"])
-            return query.all()
+            query = self._search_query(intent, entities, query)
+            return paginate(query, limit, offset, after_id)
 
         # Fallback: retorna todos los productos activos
-        return query.filter(Producto.activo == True).limit(10).all()
+        return query.filter(Producto.activo == True).limit(10)
+
+
+class FuncionesCRUD(ProductQueries): 
+    def __init__(self,db: Session, search_backend=None, catalog=None, ranking=None, embeddings=None,
+                 projection: bool = PRODUCT_PROJECTION):
+        super().__init__(db, search_backend, catalog, ranking, embeddings, projection)
+
+    def listar_productos(self, limit: int = MAX_PAGE_SIZE, offset: int = 0,
+                         after_id: Optional[int] = None, categoria_id: Optional[int] = None):
+        query = self.db.query(Producto)
+        if categoria_id is not None:
+            query = query.filter(self._categoria_filter(categoria_id))
+        return paginate(query, limit, offset, after_id).all()
+
+    def count_productos(self, categoria_id: Optional[int] = None) -> int:
+        query = self.db.query(func.count(Producto.id))
+        if categoria_id is not None:
+            query = query.filter(self._categoria_filter(categoria_id))
+        return query.scalar() or 0
+    
+    def get_categoria_id(self, nombre_categoria: str) -> Optional[int]:
+        # Desde el cache en memoria; self.db solo se usa si hay que cargarlo
+        return categoria_cache.get_id(nombre_categoria, db=self.db)
+
+    def _categoria_ids(self, categoria_id: int) -> tuple:
+        return categoria_cache.subtree_ids(categoria_id, db=self.db)
+    
+    def _resolve_categoria(self, entities: dict):
+        if "categoria" in entities and isinstance(entities["categoria"], str):
+            categoria_id = self.get_categoria_id(entities["categoria"])
+            entities["categoria"] = categoria_id
+
+    def count_by_intent(self, intent: str, entities: dict) -> Optional[int]:
+        """Total de coincidencias sin traer las filas (None si la intención no pagina)"""
+        if intent not in PAGINATED_INTENTS:
+            return None
+        self._resolve_categoria(entities)
+        snapshot = self._snapshot_for(intent, entities)
+        if snapshot is not None:
+            return snapshot.count(intent, entities, self._snapshot_categorias(entities))
+        query = self._search_query(intent, entities, self.db.query(func.count(Producto.id)))
+        return query.scalar() or 0
+
+    def search_by_intent(self, intent: str, entities: dict, limit: int = SEARCH_LIMIT,
+                         offset: int = 0, after_id: Optional[int] = None, texto: Optional[str] = None) -> list:
+        """
+        Productos para la intención. Con texto (el mensaje del usuario), la
+        primera página de buscar_producto/info_producto trae los más
+        relevantes por BM25 en vez de los primeros por id.
+        """
+        self._resolve_categoria(entities)
+        index = self._ranking_for(intent, texto, offset, after_id)
+
+        # Filtros estructurados: se resuelven en memoria, sin ir a la BD
+        snapshot = self._snapshot_for(intent, entities)
+        if snapshot is not None:
+            categorias = self._snapshot_categorias(entities)
+            if index is not None:
+                ids = snapshot.candidate_ids(intent, entities, categorias)
+                return snapshot.records_for(index.top_ids(texto, ids, min(limit, MAX_PAGE_SIZE)))
+            return snapshot.search(intent, entities, min(limit, MAX_PAGE_SIZE), offset, after_id, categorias)
+
+        if index is not None:
+            k = min(limit, MAX_PAGE_SIZE)
+            ranked = []
+            ids = index.best_ids(texto, RANK_CANDIDATES)
+            if ids:
+                query = self._relevant_query(intent, entities, self.db.query(*self._entities), ids)
+                ranked = index.rank(texto, self._records(query.all()), k)
+            if len(ranked) < k:
+                query = self._intent_query(intent, entities, self.db.query(*self._entities), k + len(ranked))
+                ranked = self._fill(ranked, self._records(query.all()), k)
+            return ranked
+        query = self._intent_query(intent, entities, self.db.query(*self._entities), limit, offset, after_id)
+        return self._records(query.all())
+
+    def semantic_search(self, texto: str, limit: int = SEARCH_LIMIT) -> list:
+        """Productos parecidos al mensaje (embeddings) cuando no se reconoció marca ni categoría"""
+        ids = self._semantic_ids(texto, limit)
+        if not ids:
+            return []
+        query = self.db.query(*self._entities).filter(Producto.id.in_(ids), Producto.activo == True)
+        return self._in_order(self._records(query.all()), ids, limit)
 
     def get_recommendations(self, categoria: str, limit: int = 5):
         return self.db.query(Producto).filter(
-            Producto.categoria_id == categoria,
+            self._categoria_filter(categoria),
             Producto.activo == True
         ).order_by(Producto.precio.desc()).limit(limit).all()
 
     def compare_prices(self, entities: dict):
         query = self.db.query(Producto)
         if "marca" in entities:
-            query = query.filter(Producto.marca.ilike(f"%{entities['marca']}%"))
+            query = query.filter(self.search.marca_filter(entities['marca']))
         if "categoria" in entities:
-            query = query.filter(Producto.categoria_id == entities["categoria"])
+            query = query.filter(self._categoria_filter(entities["categoria"]))
         return query.order_by(Producto.precio.asc()).limit(5).all()
\ No newline at end of file
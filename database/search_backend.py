@@ -0,0 +1,112 @@
+import logging
+import weakref
+from sqlalchemy import column, func, inspect, literal_column, select, table
+from models.database import Producto
+
+logger = logging.getLogger("database")
+
+# Tabla FTS5 de SQLite (database/migrations/001_busqueda_productos.sqlite.sql)
+productos_fts = table("productos_fts", column("rowid"), column("marca"), column("descripcion"))
+
+# El tokenizer trigram no indexa términos de menos de 3 caracteres ("hp", "lg")
+FTS_MIN_LENGTH = 3
+
+
+class SearchBackend:
+    """
+    Predicados de texto sobre Producto para FuncionesCRUD.
+
+    Esta implementación base usa ILIKE '%...%' (recorre toda la tabla); las
+    subclases usan los índices creados por las migraciones de cada motor.
+    """
+
+    name = "like"
+
+    def marca_filter(self, marca: str):
+        return Producto.marca.ilike(f"%{marca}%")
+
+    def caracteristica_filter(self, texto: str):
+        return Producto.descripcion.ilike(f"%{texto}%")
+
+
+class PostgresSearchBackend(SearchBackend):
+    """
+    Marca por ILIKE (acelerado por el índice pg_trgm) y características por
+    el tsvector en español de la descripción (como el ILIKE base, sin nombre
+    ni marca): "pantallas grandes" encuentra "pantalla grande".
+    """
+
+    name = "postgresql"
+
+    def caracteristica_filter(self, texto: str):
+        return literal_column("productos.busqueda_descripcion").op("@@")(func.phraseto_tsquery("spanish", texto))
+
+
+class SqliteFTSSearchBackend(SearchBackend):
+    """FTS5 con tokenizer trigram: misma semántica de subcadena que ILIKE"""
+
+    name = "sqlite-fts5"
+
+    @staticmethod
+    def _phrase(texto: str) -> str:
+        return '"' + texto.replace('"', '""') + '"'
+
+    def _match(self, fts_column, texto: str):
+        return Producto.id.in_(
+            select(productos_fts.c.rowid).where(fts_column.op("MATCH")(self._phrase(texto)))
+        )
+
+    def marca_filter(self, marca: str):
+        if len(marca) < FTS_MIN_LENGTH:
+            return super().marca_filter(marca)
+        return self._match(productos_fts.c.marca, marca)
+
+    def caracteristica_filter(self, texto: str):
+        if len(texto) < FTS_MIN_LENGTH:
+            return super().caracteristica_filter(texto)
+        return self._match(productos_fts.c.descripcion, texto)
+
+
+LIKE_BACKEND = SearchBackend()
+
+# Un backend por engine; se detecta una sola vez
+_backends = weakref.WeakKeyDictionary()
+
+
+def _detect(bind) -> SearchBackend:
+    dialect = bind.dialect.name
+    try:
+        inspector = inspect(bind)
+        if dialect == "postgresql":
+            columnas = {c["name"] for c in inspector.get_columns("productos")}
+            # busqueda_descripcion la crea 002; sin ella las características van por ILIKE
+            if "busqueda_descripcion" in columnas:
+                return PostgresSearchBackend()
+        elif dialect == "sqlite":
+            if inspector.has_table("productos_fts"):
+                return SqliteFTSSearchBackend()
+    except Exception as e:
+        logger.warning(f"No se pudo inspeccionar el esquema de búsqueda: {e}")
+        return LIKE_BACKEND
+    if dialect in ("postgresql", "sqlite"):
+        logger.warning("Índices de búsqueda no creados (python -m database.migrate); se usa ILIKE")
+    return LIKE_BACKEND
+
+
+def get_search_backend(db) -> SearchBackend:
+    """Backend de búsqueda para la BD de la sesión db"""
+    try:
+        bind = db.get_bind()
+    except Exception:
+        return LIKE_BACKEND
+    if not hasattr(bind, "dialect") or not isinstance(getattr(bind.dialect, "name", None), str):
+        return LIKE_BACKEND
+    backend = _backends.get(bind)
+    if backend is None:
+        backend = _backends[bind] = _detect(bind)
+    return backend
+
+
+def reset_search_backends():
+    """Olvidar la detección (p. ej. después de correr las migraciones)"""
+    _backends.clear()
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from database.async_connection import async_session_scope
+from models.database import UsuarioSesion
+
+logger = logging.getLogger("database")
+
+SESSION_ACTIVITY_ENABLED = os.getenv("SESSION_ACTIVITY", "1") == "1"
+# Cada cuánto se escriben los últimos accesos acumulados
+SESSION_ACTIVITY_FLUSH_S = float(os.getenv("SESSION_ACTIVITY_FLUSH_S", "15"))
+# Sin mensajes ni WebSocket abierto durante este tiempo la sesión pasa a inactiva
+SESSION_IDLE_TIMEOUT_S = float(os.getenv("SESSION_IDLE_TIMEOUT_S", "1800"))
+
+
+class SessionActivity:
+    __slots__ = ("session_id", "ip_address", "user_agent", "first_seen", "last_seen", "connections")
+
+    def __init__(self, session_id: str, now: float, ip_address: str = None, user_agent: str = None):
+        self.session_id = session_id
+        self.ip_address = ip_address
+        self.user_agent = user_agent
+        self.first_seen = now
+        self.last_seen = now
+        self.connections = 0
+
+
+class SessionActivityTracker:
+    """
+    Tabla en memoria de las sesiones activas.
+
+    touch() (en cada mensaje y al conectar un WebSocket) solo actualiza un
+    diccionario y marca la sesión como pendiente. Cada flush_s un worker
+    escribe un upsert por lote en usuarios_sesiones con el último acceso de
+    cada sesión pendiente, así que son a lo sumo una fila por sesión por
+    ciclo, no un UPDATE por mensaje. Las sesiones sin actividad ni WebSocket
+    durante idle_timeout_s salen de memoria y quedan con activo = false.
+    active_sessions() se responde sin ir a la BD.
+    """
+
+    def __init__(self, session_factory=async_session_scope, enabled: bool = SESSION_ACTIVITY_ENABLED,
+                 flush_s: float = SESSION_ACTIVITY_FLUSH_S, idle_timeout_s: float = SESSION_IDLE_TIMEOUT_S):
+        self.session_factory = session_factory
+        self.enabled = enabled
+        self.flush_s = flush_s
+        self.idle_timeout_s = idle_timeout_s
+        self.sessions = {}
+        # session_id -> True (activa) o la SessionActivity que venció, para el próximo upsert
+        self._dirty = {}
+        self._worker = None
+        self._stop = None
+        self.flushes = 0
+        self.rows_written = 0
+        self.failed = 0
+
+    def touch(self, session_id: str, ip_address: str = None, user_agent: str = None, now: float = None):
+        """Registrar actividad de la sesión; no toca la BD"""
+        if not self.enabled or not session_id:
+            return
+        now = time.time() if now is None else now
+        sesion = self.sessions.get(session_id)
+        if sesion is None:
+            sesion = self.sessions[session_id] = SessionActivity(session_id, now, ip_address, user_agent)
+        else:
+            sesion.last_seen = now
+        self._dirty[session_id] = True
+        self._ensure_worker()
+
+    def connected(self, session_id: str, ip_address: str = None, user_agent: str = None):
+        self.touch(session_id, ip_address, user_agent)
+        if session_id in self.sessions:
+            self.sessions[session_id].connections += 1
+
+    def disconnected(self, session_id: str):
+        sesion = self.sessions.get(session_id)
+        if sesion is not None:
+            sesion.connections = max(0, sesion.connections - 1)
+            self.touch(session_id)
+
+    def active_sessions(self, within_s: float = None, now: float = None) -> list:
+        """Sesiones con WebSocket abierto o con actividad en los últimos within_s"""
+        now = time.time() if now is None else now
+        within_s = self.idle_timeout_s if within_s is None else within_s
+        activas = [s for s in self.sessions.values() if s.connections or now - s.last_seen <= within_s]
+        return sorted(activas, key=lambda s: s.last_seen, reverse=True)
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "tracked": len(self.sessions),
+            "pending": len(self._dirty),
+            "flushes": self.flushes,
+            "rows_written": self.rows_written,
+            "failed": self.failed,
+        }
+
+    def expire_idle(self, now: float = None) -> list:
+        """Sacar de memoria las sesiones inactivas (quedan pendientes con activo = false)"""
+        now = time.time() if now is None else now
+        vencidas = [s for s in self.sessions.values()
+                    if not s.connections and now - s.last_seen > self.idle_timeout_s]
+        for sesion in vencidas:
+            self._dirty[sesion.session_id] = sesion
+            del self.sessions[sesion.session_id]
+        return vencidas
+
+    def _sesion(self, session_id: str, estado):
+        # Las vencidas traen su propio objeto: ya no están en self.sessions
+        return estado if isinstance(estado, SessionActivity) else self.sessions.get(session_id)
+
+    def _pending_rows(self, dirty: dict) -> list:
+        rows = []
+        for session_id, estado in dirty.items():
+            sesion = self._sesion(session_id, estado)
+            if sesion is None:
+                continue
+            rows.append({
+                "session_id": session_id,
+                "ip_address": sesion.ip_address,
+                "user_agent": sesion.user_agent,
+                "fecha_inicio": datetime.fromtimestamp(sesion.first_seen),
+                "fecha_ultimo_acceso": datetime.fromtimestamp(sesion.last_seen),
+                "activo": estado is True,
+            })
+        return rows
+
+    def _requeue(self, dirty: dict):
+        """Devolver a _dirty lo que no se pudo escribir, sin pisar algo más nuevo"""
+        for session_id, estado in dirty.items():
+            actual = self._dirty.get(session_id)
+            if actual is None:
+                self._dirty[session_id] = estado
+                continue
+            previa, nueva = self._sesion(session_id, estado), self._sesion(session_id, actual)
+            if previa is not None and (nueva is None or previa.last_seen > nueva.last_seen):
+                self._dirty[session_id] = estado
+
+    async def flush(self, now: float = None):
+        """Escribir el último acceso de las sesiones pendientes en un solo upsert"""
+        self.expire_idle(now)
+        dirty, self._dirty = self._dirty, {}
+        rows = self._pending_rows(dirty)
+        if not rows:
+            return 0
+        try:
+            async with self.session_factory() as db:
+                dialect = db.get_bind().dialect.name
+                # Solo hay driver async para PostgreSQL y SQLite (ASYNC_DRIVERS)
+                stmt = (pg_insert if dialect == "postgresql" else sqlite_insert)(UsuarioSesion.__table__)
+                stmt = stmt.on_conflict_do_update(
+                    index_elements=["session_id"],
+                    set_={
+                        "fecha_ultimo_acceso": stmt.excluded.fecha_ultimo_acceso,
+                        "activo": stmt.excluded.activo,
+                    },
+                )
+                await db.execute(stmt, rows)
+                await db.commit()
+        except Exception as e:
+            # Quedan pendientes (también las vencidas con activo = false) para el próximo ciclo
+            self._requeue(dirty)
+            self.failed += len(rows)
+            logger.error(f"No se pudo guardar la actividad de {len(rows)} sesiones: {e}")
+            return 0
+        self.flushes += 1
+        self.rows_written += len(rows)
+        return len(rows)
+
+    async def close(self):
+        """Detener el worker y escribir lo pendiente"""
+        worker, self._worker = self._worker, None
+        if worker is not None and not worker.done():
+            # Sin cancelar: un upsert a medias perdería las filas ya sacadas de _dirty
+            self._stop.set()
+            await worker
+        await self.flush()
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                # Sin event loop queda pendiente hasta el próximo flush()
+                return
+            self._stop = asyncio.Event()
+            self._worker = loop.create_task(self._run())
+
+    async def _run(self):
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.flush_s)
+            except asyncio.TimeoutError:
+                pass
+            await self.flush()
+
+
+# Instancia compartida por ConnectionManager y /chat
+session_activity = SessionActivityTracker()
@@ -1,7 +1,9 @@
 class PromptBuilder:
-    def build_context(self, intent: str, entities: dict, db_results: list, comparison: dict = None) -> str:
+    def build_context(self, intent: str, entities: dict, db_results: list, comparison: dict = None,
+                      total: int = None) -> str:
         """
-        Construye el contexto específico para cada intención
+        Construye el contexto específico para cada intención.
+        total: coincidencias en la BD cuando db_results es solo una página
         """
         context = ""
         
@@ -76,7 +78,9 @@ class PromptBuilder:
 
         # Formatear resultados de la BD
         if db_results:
-            context += f"\nProductos disponibles en nuestra tienda ({len(db_results)} resultados):\n"
+            if total is None or total < len(db_results):
+                total = len(db_results)
+            context += f"\nProductos disponibles en nuestra tienda ({total} resultados):\n"
             for idx, prod in enumerate(db_results[:10], 1):  # Limitar a 10 resultados
                 context += (
                     f"{idx}. {getattr(prod, 'nombre', 'Sin nombre')}\n"
@@ -84,8 +88,9 @@ class PromptBuilder:
                     f"   Precio: S/. {getattr(prod, 'precio', '0')}\n"
                     f"   Stock: {getattr(prod, 'stock', 0)} unidades\n"
                 )
-            if len(db_results) > 10:
-                context += f"... y {len(db_results) - 10} productos más.\n"
+            shown = min(len(db_results), 10)
+            if total > shown:
+                context += f"... y {total - shown} productos más.\n"
         else:
             context += "\nNo se encontraron productos que coincidan con tu búsqueda en nuestra tienda.\n"
 
@@ -12,12 +12,10 @@ def extract_product_name(message: str, entities: dict) -> str:
             name_parts.append(entities["categoria"])
         elif isinstance(entities["categoria"], int):
             try:
-                from database.connection import get_db
-                from models.database import Categoria
-                db = next(get_db())
-                categoria_obj = db.query(Categoria).filter(Categoria.id == entities["categoria"]).first()
-                if categoria_obj:
-                    name_parts.append(categoria_obj.nombre)
+                from database.category_cache import categoria_cache
+                nombre = categoria_cache.get_nombre(entities["categoria"])
+                if nombre:
+                    name_parts.append(nombre)
             except Exception:
                 pass
     
@@ -1,38 +1,90 @@
-from fastapi import FastAPI, Depends, Body ,WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, Depends, Body ,WebSocket, WebSocketDisconnect, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
 from websockets_file.manager import ConnectionManager
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from database.connection import get_db
+from database.connection import get_db, engine
+from database.async_connection import (
+    get_async_db, async_session_scope, dispose_async_engine, async_engine_created, get_async_engine
+)
+from database.pool_metrics import pool_status
+from database.catalog_export import catalog_etag, etag_matches, iter_productos_ndjson
+from database.async_queries import AsyncFuncionesCRUD
+from database.category_cache import categoria_cache
+from database.catalog_snapshot import catalog_snapshot
+from database.product_embeddings import product_embeddings
+from database.product_ranking import product_ranking
+from database.conversation_log import conversation_log
+from database.session_activity import session_activity
 from models.database import Producto,Categoria
 from models.schemas import ProductoOut
-from database.queries import FuncionesCRUD
+from database.queries import FuncionesCRUD, SEARCH_LIMIT, MAX_PAGE_SIZE
 from fastapi import Request
 from llm.ollama_client import OllamaClient
 from fastapi.templating import Jinja2Templates
 from scraping.price_comparator import PriceComparator
 from llm.prompt_builder import PromptBuilder
 from llm.utils_chat import extract_product_name
-from nlu import NLUProcessor
+from nlu.runtime import NLURuntime
+import asyncio
 import os
+import time
+from datetime import datetime
 from dotenv import load_dotenv
 
 load_dotenv()
 
-app = FastAPI()
-
-nlu_processor = NLUProcessor()
-manager = ConnectionManager()
+# Una sola instancia del NLU; se carga en el lifespan, no al importar
+nlu_runtime = NLURuntime()
+manager = ConnectionManager(tracker=session_activity)
 price_comparator = PriceComparator()
-nlu_processor = NLUProcessor()
 prompt_builder = PromptBuilder()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Carga de modelo + léxico + warmup fuera del event loop
+    await asyncio.to_thread(nlu_runtime.start)
+    try:
+        await asyncio.to_thread(categoria_cache.load)
+    except Exception as e:
+        # Se reintenta en el primer uso
+        print(f"Error cargando categorías: {e}")
+    try:
+        await asyncio.to_thread(catalog_snapshot.load)
+    except Exception as e:
+        # Sin foto en memoria las búsquedas van a la BD
+        print(f"Error cargando la foto del catálogo: {e}")
+    try:
+        await asyncio.to_thread(product_ranking.load)
+    except Exception as e:
+        # Sin índice los resultados quedan en el orden de la BD
+        print(f"Error cargando el índice de relevancia: {e}")
+    try:
+        # Vectores de palabras del modelo ya cargado (o la tabla compartida por mmap)
+        product_embeddings.word_vectors = nlu_runtime.word_vectors()
+        await asyncio.to_thread(product_embeddings.load)
+    except Exception as e:
+        # Sin embeddings, los mensajes sin marca ni categoría reciben el aviso de siempre
+        print(f"Error cargando los embeddings de productos: {e}")
+    yield
+    await nlu_runtime.shutdown()
+    # Lo pendiente del registro de conversaciones se escribe antes de cerrar el engine
+    await conversation_log.close()
+    await session_activity.close()
+    await dispose_async_engine()
+
+app = FastAPI(lifespan=lifespan)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Total-Count", "X-Next-Cursor"],
 )
 
 #server de archivos estticos
@@ -49,11 +101,54 @@ def index(request: Request):
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/ready")
+async def readiness_check():
+    """Pasa solo cuando el modelo y los gazetteers (desde la BD) están cargados"""
+    checks = nlu_runtime.readiness()
+    if not nlu_runtime.ready:
+        return JSONResponse(status_code=503, content={"status": "loading", "checks": checks})
+    return {"status": "ready", "checks": checks}
+
+
+async def total_resultados(crud: AsyncFuncionesCRUD, intent: str, entities: dict, productos: list):
+    """Conteo aparte solo cuando la página vino llena"""
+    if len(productos) < SEARCH_LIMIT:
+        return len(productos)
+    return await crud.count_by_intent(intent, entities)
+
+
+def set_pagination_headers(response: Response, productos: list, limit: int, total: int = None):
+    """X-Next-Cursor = último id de la página (para after_id); X-Total-Count solo en la primera"""
+    if len(productos) >= limit:
+        response.headers["X-Next-Cursor"] = str(productos[-1].id)
+    if total is not None:
+        response.headers["X-Total-Count"] = str(total)
+
 
 @app.get("/productos", response_model = list[ProductoOut])
-def listar_productos(db: Session = Depends(get_db)):
+def listar_productos(
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    after_id: int = Query(None),
+    db: Session = Depends(get_db)
+):
     crud = FuncionesCRUD(db)
-    return crud.listar_productos()
+    productos = crud.listar_productos(limit=limit, offset=offset, after_id=after_id)
+    first_page = offset == 0 and after_id is None
+    set_pagination_headers(response, productos, limit, crud.count_productos() if first_page else None)
+    return productos
+
+
+@app.get("/productos/stream")
+def exportar_productos(request: Request, db: Session = Depends(get_db)):
+    """Catálogo completo en NDJSON (una línea por producto), en streaming"""
+    etag = catalog_etag(db)
+    db.close()
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+    return StreamingResponse(iter_productos_ndjson(), media_type="application/x-ndjson", headers=headers)
 
 
 @app.post("/test-llm")
@@ -66,26 +161,43 @@ async def test_llm(prompt: str = Body(..., embed=True)):
 
 
 @app.post("/test-intent")
-def test_intent(text: str = Body(..., embed=True)):
-    result = nlu_processor.process(text)
+async def test_intent(text: str = Body(..., embed=True)):
+    if not nlu_runtime.started:
+        return JSONResponse(status_code=503, content={"status": "loading"})
+    result = await nlu_runtime.process(text)
     return {"text": text, "intent": result["intent"], "confidence": result["confidence"]}
 
 @app.post("/chat")
 async def chat_endpoint(
+    request: Request,
     message: str = Body(..., embed=True),
     session_id: str = Body(None, embed=True),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    nlu_result = nlu_processor.process(message)
+    started_at = time.perf_counter()
+    cliente = {
+        "ip_address": request.client.host if request.client else None,
+        "user_agent": request.headers.get("user-agent"),
+    }
+    session_activity.touch(session_id, **cliente)
+    nlu_result = await nlu_runtime.process(message)
     intent = nlu_result["intent"]
     entities = nlu_result["entities"]
     confidence = nlu_result["confidence"]
 
     intenciones_que_necesitan_entidades = ["buscar_producto", "comparar_precios", "comparar_precios_web", "info_producto"]
     
+    semanticos = None
     if not entities and intent in intenciones_que_necesitan_entidades:
+        # Sin marca ni categoría: productos parecidos al mensaje (embeddings en memoria)
+        if confidence >= 0.7:
+            semanticos = await AsyncFuncionesCRUD(db).semantic_search(message)
+    if not entities and intent in intenciones_que_necesitan_entidades and not semanticos:
+        respuesta = "No pude identificar la marca o categoría en tu mensaje. ¿Puedes especificar qué buscas?"
+        conversation_log.log_turn(session_id, message, respuesta, intent, confidence, entities,
+                                  started_at=started_at, **cliente)
         return {
-            "response": "No pude identificar la marca o categoría en tu mensaje. ¿Puedes especificar qué buscas?",
+            "response": respuesta,
             "intent": intent,
             "entities": entities
         }
@@ -95,31 +207,39 @@ async def chat_endpoint(
         respuesta = "No estoy seguro de la intención de tu mensaje. ¿Podrías reformularlo o darme más detalles?"
         productos = []
     else:
-        crud = FuncionesCRUD(db)
-        productos = crud.search_by_intent(intent, entities)
+        crud = AsyncFuncionesCRUD(db)
 
+        if semanticos:
+            productos = semanticos
+            await db.close()
+            prompt = prompt_builder.build_context("buscar_producto", entities, productos)
         # Si es comparar precios web, activa scraping y contexto enriquecido
-        if intent == "comparar_precios_web":
+        elif intent == "comparar_precios_web":
             print(f"🐛 DEBUG - Entities antes de extract_product_name: {entities}")
             product_name = extract_product_name(message, entities)  # Usar entities original
             print(f"🐛 DEBUG - Product name extraído: '{product_name}' (tipo: {type(product_name)})")
             
-            crud = FuncionesCRUD(db)
-            productos = crud.search_by_intent(intent, entities)
+            productos = await crud.search_by_intent(intent, entities)
             db_price = float(productos[0].precio) if productos else None
+            # La conexión vuelve al pool antes del scraping y del LLM
+            await db.close()
             print(f"🐛 DEBUG - Enviando a compare_prices: product_name='{product_name}', db_price={db_price}")
             comparison = await price_comparator.compare_prices(product_name, db_price)
             prompt = prompt_builder.build_context(intent, entities, productos, comparison)
         else:
-            crud = FuncionesCRUD(db)
-            productos = crud.search_by_intent(intent, entities)
-            prompt = prompt_builder.build_context(intent, entities, productos)
+            productos = await crud.search_by_intent(intent, entities, texto=message)
+            total = await total_resultados(crud, intent, entities, productos)
+            await db.close()
+            prompt = prompt_builder.build_context(intent, entities, productos, total=total)
 
         HF_TOKEN = os.getenv("HF_TOKEN")
         MODEL_NAME = "meta-llama/Meta-Llama-3-8B-Instruct"
         client = OllamaClient(model_name=MODEL_NAME, api_key=HF_TOKEN)
         respuesta = await client.generate_response(prompt)
 
+    # Solo se encola: la escritura en la BD va por lotes en segundo plano
+    conversation_log.log_turn(session_id, message, respuesta, intent, confidence, entities, productos,
+                              started_at=started_at, **cliente)
     return {
         "message": message,
         "intent": intent,
@@ -135,12 +255,24 @@ def listar_categorias(db: Session = Depends(get_db)):
     return [{"id": c.id, "nombre": c.nombre, "descripcion": c.descripcion} for c in categorias]
 
 @app.get("/productos/{categoria}")
-def productos_por_categoria(categoria: str, db: Session = Depends(get_db)):
+def productos_por_categoria(
+    categoria: str,
+    response: Response,
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+    after_id: int = Query(None),
+    db: Session = Depends(get_db)
+):
     crud = FuncionesCRUD(db)
     categoria_id = crud.get_categoria_id(categoria)
     if not categoria_id:
         return []
-    productos = db.query(Producto).filter(Producto.categoria_id == categoria_id).all()
+    productos = crud.listar_productos(limit=limit, offset=offset, after_id=after_id, categoria_id=categoria_id)
+    first_page = offset == 0 and after_id is None
+    set_pagination_headers(
+        response, productos, limit,
+        crud.count_productos(categoria_id=categoria_id) if first_page else None
+    )
     return [{"id": p.id, "nombre": p.nombre, "precio": float(p.precio), "marca": p.marca} for p in productos]
 
 @app.get("/stats")
@@ -149,17 +281,40 @@ def stats(db: Session = Depends(get_db)):
     total_categorias = db.query(Categoria).count()
     return {
         "total_productos": total_productos,
-        "total_categorias": total_categorias
+        "total_categorias": total_categorias,
+        "sesiones_activas": len(session_activity.active_sessions())
+    }
+
+@app.get("/sesiones/activas")
+async def sesiones_activas(minutos: float = Query(None, gt=0)):
+    """Sesiones con WebSocket abierto o con mensajes recientes (desde memoria, sin BD)"""
+    activas = session_activity.active_sessions(within_s=minutos * 60 if minutos else None)
+    return {
+        "total": len(activas),
+        "sesiones": [
+            {
+                "session_id": s.session_id,
+                "ultimo_acceso": datetime.fromtimestamp(s.last_seen).isoformat(),
+                "conexiones": s.connections,
+            }
+            for s in activas
+        ],
     }
 
 @app.websocket("/ws/{session_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: str):
     await manager.connect(websocket, session_id)
+    cliente = {
+        "ip_address": websocket.client.host if websocket.client else None,
+        "user_agent": websocket.headers.get("user-agent"),
+    }
     try:
         while True:
             data = await websocket.receive_text()
-            
-            nlu_result = nlu_processor.process(data)
+            started_at = time.perf_counter()
+            session_activity.touch(session_id)
+
+            nlu_result = await nlu_runtime.process(data)
             intent = nlu_result["intent"]
             entities = nlu_result["entities"]
             confidence = nlu_result["confidence"]
@@ -167,32 +322,48 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             # ✅ MISMA lógica de fallback que REST
             intenciones_que_necesitan_entidades = ["buscar_producto", "comparar_precios", "comparar_precios_web", "info_producto"]
             
-            if not entities and intent in intenciones_que_necesitan_entidades:
+            semanticos = None
+            if not entities and intent in intenciones_que_necesitan_entidades and confidence >= 0.7:
+                # Sin marca ni categoría: productos parecidos al mensaje (embeddings en memoria)
+                async with async_session_scope() as db:
+                    semanticos = await AsyncFuncionesCRUD(db).semantic_search(data)
+
+            if not entities and intent in intenciones_que_necesitan_entidades and not semanticos:
                 respuesta = "No pude identificar la marca o categoría en tu mensaje. ¿Puedes especificar qué buscas?"
                 await manager.send_message(respuesta, session_id)  # ✅ Parámetros correctos
+                conversation_log.log_turn(session_id, data, respuesta, intent, confidence, entities,
+                                          started_at=started_at, **cliente)
                 continue
 
             if confidence < 0.7:
                 respuesta = "No estoy seguro de la intención de tu mensaje. ¿Podrías reformularlo?"
                 await manager.send_message(respuesta, session_id)  # ✅ Parámetros correctos
+                conversation_log.log_turn(session_id, data, respuesta, intent, confidence, entities,
+                                          started_at=started_at, **cliente)
                 continue
 
-            # Resto del flujo igual que /chat
-            db = next(get_db())
-            crud = FuncionesCRUD(db)
-            productos = crud.search_by_intent(intent, entities)
-
-            if intent == "comparar_precios_web":
-                product_name = extract_product_name(data, entities)  # Usar entities original
-                crud = FuncionesCRUD(db)
-                productos = crud.search_by_intent(intent, entities)
-                db_price = float(productos[0].precio) if productos else None
+            # Resto del flujo igual que /chat; una sesión async por mensaje,
+            # cerrada antes del scraping y del LLM
+            async with async_session_scope() as db:
+                crud = AsyncFuncionesCRUD(db)
+
+                if semanticos:
+                    productos = semanticos
+                elif intent == "comparar_precios_web":
+                    product_name = extract_product_name(data, entities)  # Usar entities original
+                    productos = await crud.search_by_intent(intent, entities)
+                    db_price = float(productos[0].precio) if productos else None
+                else:
+                    productos = await crud.search_by_intent(intent, entities, texto=data)
+                    total = await total_resultados(crud, intent, entities, productos)
+
+            if semanticos:
+                prompt = prompt_builder.build_context("buscar_producto", entities, productos)
+            elif intent == "comparar_precios_web":
                 comparison = await price_comparator.compare_prices(product_name, db_price)
                 prompt = prompt_builder.build_context(intent, entities, productos, comparison)
             else:
-                crud = FuncionesCRUD(db)
-                productos = crud.search_by_intent(intent, entities)
-                prompt = prompt_builder.build_context(intent, entities, productos)
+                prompt = prompt_builder.build_context(intent, entities, productos, total=total)
 
             HF_TOKEN = os.getenv("HF_TOKEN")
             MODEL_NAME = "meta-llama/Meta-Llama-3-8B-Instruct"
@@ -200,6 +371,8 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str):
             respuesta = await client.generate_response(prompt)
 
             await manager.send_message(respuesta, session_id)  # ✅ Parámetros correctos
+            conversation_log.log_turn(session_id, data, respuesta, intent, confidence, entities, productos,
+                                      started_at=started_at, **cliente)
     except WebSocketDisconnect:
         manager.disconnect(websocket, session_id)
 
@@ -215,7 +388,22 @@ async def compare_prices_endpoint(
     except Exception as e:
         return {"error": str(e)}
 
+@app.get("/db-pool")
+async def db_pool():
+    """Uso de los pools de conexiones, esperas al pedir una conexión y escrituras en segundo plano"""
+    info = {
+        "sync": pool_status(engine),
+        "conversation_log": conversation_log.stats(),
+        "session_activity": session_activity.stats(),
+    }
+    if async_engine_created():
+        info["async"] = pool_status(get_async_engine().sync_engine)
+    return info
+
 @app.get("/nlu-info")
 async def nlu_info():
     """Información del modelo NLU"""
-    return nlu_processor.intent_classifier.get_model_info()
\ No newline at end of file
+    if not nlu_runtime.started:
+        return JSONResponse(status_code=503, content={"status": "loading"})
+    # Va al pool del NLU: en modo process responde un worker, sin cargar otro modelo aquí
+    return await nlu_runtime.info()
\ No newline at end of file
@@ -1,7 +1,14 @@
+from datetime import datetime, timezone
 from sqlalchemy import Column, Integer, String, Text, Boolean, DECIMAL, ForeignKey, TIMESTAMP, JSON
 from sqlalchemy.orm import relationship
 from database.connection import Base
 
+
+def ahora_utc() -> datetime:
+    # Misma referencia que los triggers de las migraciones (UTC, sin zona)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class Categoria(Base):
     __tablename__ = "categorias"
     id = Column(Integer, primary_key=True, index=True)
@@ -9,6 +16,8 @@ class Categoria(Base):
     descripcion = Column(Text)
     categoria_padre_id = Column(Integer, ForeignKey("categorias.id"), nullable=True)
     activo = Column(Boolean, default=True)
+    # Igual que en productos: la mantienen los triggers de 004_fecha_actualizacion_categorias
+    fecha_actualizacion = Column(TIMESTAMP, default=ahora_utc, onupdate=ahora_utc, index=True)
 
     categoria_padre = relationship("Categoria", remote_side=[id])
     productos = relationship("Producto", back_populates="categoria")
@@ -24,6 +33,8 @@ class Producto(Base):
     stock = Column(Integer, default=0)
     activo = Column(Boolean, default=True)
     fecha_creacion = Column(TIMESTAMP)
+    # La mantienen los triggers de 003_fecha_actualizacion; el watermark del catálogo lee su máximo
+    fecha_actualizacion = Column(TIMESTAMP, default=ahora_utc, onupdate=ahora_utc, index=True)
 
     categoria = relationship("Categoria", back_populates="productos")
 
@@ -0,0 +1,21 @@
+class ProductoResumen:
+    """
+    Producto de solo lectura para armar respuestas, sin sesión ni ORM.
+
+    Tiene los campos que usan PromptBuilder y los endpoints de chat, así
+    que se puede usar en lugar de un Producto.
+    """
+
+    __slots__ = ("id", "nombre", "marca", "precio", "stock", "categoria_id", "activo")
+
+    def __init__(self, id, nombre, marca, precio, stock, categoria_id, activo):
+        self.id = id
+        self.nombre = nombre
+        self.marca = marca
+        self.precio = precio
+        self.stock = stock
+        self.categoria_id = categoria_id
+        self.activo = activo
+
+    def __repr__(self):
+        return f"ProductoResumen(id={self.id}, nombre={self.nombre!r}, precio={self.precio})"
@@ -1,11 +1,14 @@
 from nlu.spacy_intent_classifier import MLIntentClassifier
 from nlu.spacy_entity_extractor import EntityExtractor
+from nlu.cache import NLUResultCache
+import copy
 import logging
 
 class NLUProcessor:
     def __init__(self):
         self.intent_classifier = MLIntentClassifier()
         self.entity_extractor = EntityExtractor() 
+        self.cache = NLUResultCache()
         self.logger = self.setup_logger()
 
     def setup_logger(self):
@@ -20,21 +23,101 @@ class NLUProcessor:
 
     def process(self, text: str) -> dict:
         try:
+            key, generation = self._cache_key(text)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
             intent, confidence = self.intent_classifier.classify(text)
-            entities = self.entity_extractor.extract(text)
-            self.logger.info(f"Intent: {intent} (conf: {confidence:.2f}) | Entities: {entities}")
-            # Fallback si la confianza es baja
-            if confidence < self.intent_classifier.threshold:
-                return self.fallback_processing(text, entities)
-            return {
-                "intent": intent,
-                "confidence": confidence,
-                "entities": entities
-            }
+            result = self._build_result(text, intent, confidence)
+            self._store(key, result, generation)
+            return result
         except Exception as e:
             self.logger.error(f"Error en NLUProcessor: {e}")
             return self.fallback_processing(text, {})
 
+    def process_batch(self, texts: list) -> list:
+        """Procesar varios mensajes en una sola pasada de nlp.pipe"""
+        results = [None] * len(texts)
+        pending = {}  # clave normalizada -> índices que la comparten
+        generations = {}  # clave normalizada -> generación al momento de buscarla
+        for i, text in enumerate(texts):
+            key, generation = self._cache_key(text)
+            generations.setdefault(key, generation)
+            if key in pending:
+                pending[key].append(i)
+                continue
+            cached = self.cache.get(key)
+            if cached is not None:
+                results[i] = cached
+            else:
+                pending[key] = [i]
+        if not pending:
+            return results
+
+        misses = [texts[indices[0]] for indices in pending.values()]
+        try:
+            predictions = self.intent_classifier.classify_batch(misses)
+        except Exception as e:
+            self.logger.error(f"Error en NLUProcessor (batch): {e}")
+            predictions = [None] * len(misses)
+        for (key, indices), text, prediction in zip(pending.items(), misses, predictions):
+            result = self._resolve(key, text, prediction, generations[key])
+            results[indices[0]] = result
+            for i in indices[1:]:
+                results[i] = copy.deepcopy(result)
+        return results
+
+    def _resolve(self, key: str, text: str, prediction, generation=None) -> dict:
+        if prediction is None:
+            return self.fallback_processing(text, {})
+        try:
+            result = self._build_result(text, *prediction)
+        except Exception as e:
+            self.logger.error(f"Error en NLUProcessor: {e}")
+            return self.fallback_processing(text, {})
+        self._store(key, result, generation)
+        return result
+
+    def reload_model(self):
+        """Recargar el modelo de intenciones e invalidar el cache"""
+        self.intent_classifier.load_model()
+        self.cache.clear()
+
+    def refresh_entities(self):
+        """Recargar marcas/categorías desde la BD e invalidar el cache"""
+        self.entity_extractor.refresh_entities()
+        self.cache.clear()
+
+    def _current_generation(self) -> tuple:
+        return (self.intent_classifier.version, self.entity_extractor.version)
+
+    def _store(self, key: str, result: dict, generation: tuple):
+        # Si el léxico o el modelo cambiaron mientras se calculaba, no se guarda
+        self.cache.set_generation(self._current_generation())
+        self.cache.put(key, result, generation)
+
+    def _cache_key(self, text: str) -> tuple:
+        """(clave normalizada, generación) con la que se calcula el resultado"""
+        # El léxico se carga antes de fijar la generación del cache
+        if not self.entity_extractor.loaded:
+            self.entity_extractor.load()
+        # Si el modelo o el léxico se recargaron por fuera, el cache ya no vale
+        generation = self._current_generation()
+        self.cache.set_generation(generation)
+        return self.entity_extractor.normalize(text), generation
+
+    def _build_result(self, text: str, intent: str, confidence: float) -> dict:
+        entities = self.entity_extractor.extract(text)
+        self.logger.info(f"Intent: {intent} (conf: {confidence:.2f}) | Entities: {entities}")
+        # Fallback si la confianza es baja
+        if confidence < self.intent_classifier.threshold:
+            return self.fallback_processing(text, entities)
+        return {
+            "intent": intent,
+            "confidence": confidence,
+            "entities": entities
+        }
+
     def fallback_processing(self, text: str, entities: dict) -> dict:
         # Aquí puedes integrar un fallback al LLM o reglas simples
         self.logger.warning("Usando fallback NLU (intención desconocida)")
@@ -0,0 +1,149 @@
+import asyncio
+import inspect
+import logging
+from nlu.config import (
+    NLU_BATCH_MAX_SIZE, NLU_BATCH_MAX_WAIT_MS, NLU_MAX_PENDING, NLU_MAX_WORKERS, NLU_TIMEOUT_S,
+)
+from nlu.executor import fallback_result
+
+logger = logging.getLogger("nlu")
+
+
+class NLUBatchScheduler:
+    """
+    Agrupa los mensajes de sesiones concurrentes en lotes.
+
+    Cada llamada a process() se encola; un worker junta hasta max_batch_size
+    textos o espera como máximo max_wait_ms y lanza process_batch como tarea
+    aparte, con hasta max_concurrency lotes en vuelo (uno por worker del
+    pool). Mientras están todos ocupados, los mensajes se acumulan y el
+    próximo lote sale más grande.
+
+    La cola es acotada (max_queue mensajes) y el timeout se cuenta desde que
+    el mensaje se encola; si la cola está llena o vence el timeout, el
+    llamador recibe fallback().
+    """
+
+    def __init__(self, process_batch, max_batch_size: int = NLU_BATCH_MAX_SIZE,
+                 max_wait_ms: float = NLU_BATCH_MAX_WAIT_MS, max_concurrency: int = NLU_MAX_WORKERS,
+                 max_queue: int = NLU_MAX_PENDING * NLU_BATCH_MAX_SIZE, timeout: float = NLU_TIMEOUT_S,
+                 fallback=fallback_result):
+        # process_batch puede ser síncrono o async: list[str] -> list[dict]
+        self.process_batch = process_batch
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.fallback = fallback
+        self._queue = None
+        self._slots = None
+        self._worker = None
+        self._tasks = set()
+
+    async def process(self, text: str) -> dict:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((text, future))
+        except asyncio.QueueFull:
+            logger.warning(f"Cola de micro-batching llena ({self.max_queue}); usando fallback")
+            return self.fallback()
+        try:
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"NLU excedió {self.timeout}s (cola incluida); usando fallback")
+            return self.fallback()
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._tasks)
+
+    async def close(self):
+        """Detener el worker; los llamadores que siguen esperando reciben el fallback"""
+        if self._worker:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        tasks = list(self._tasks)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if self._queue is not None:
+            while not self._queue.empty():
+                _, future = self._queue.get_nowait()
+                self._resolve_fallback([future])
+
+    def _ensure_worker(self):
+        if self._worker is None or self._worker.done():
+            # La cola y el semáforo se crean dentro del event loop que los va a usar
+            self._queue = asyncio.Queue(maxsize=self.max_queue)
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def _collect_batch(self) -> list:
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            # Primero lo que ya está en cola, sin esperar
+            try:
+                batch.append(self._queue.get_nowait())
+                continue
+            except asyncio.QueueEmpty:
+                pass
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Sin worker libre no se arma el lote: lo que llegue mientras se suma al próximo
+            await self._slots.acquire()
+            try:
+                batch = await self._collect_batch()
+            except BaseException:
+                self._slots.release()
+                raise
+            # Los llamadores que ya se fueron (timeout, desconexión) no cuentan
+            batch = [(text, future) for text, future in batch if not future.done()]
+            if not batch:
+                self._slots.release()
+                continue
+            task = loop.create_task(self._dispatch(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _dispatch(self, batch: list):
+        try:
+            results = self.process_batch([text for text, _ in batch])
+            if inspect.isawaitable(results):
+                results = await results
+        except asyncio.CancelledError:
+            self._resolve_fallback([future for _, future in batch])
+            raise
+        except Exception as e:
+            logger.error(f"Error procesando lote NLU de {len(batch)} mensajes: {e}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        finally:
+            self._slots.release()
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+    def _resolve_fallback(self, futures: list):
+        for future in futures:
+            if not future.done():
+                future.set_result(self.fallback())
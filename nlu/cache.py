@@ -0,0 +1,91 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from nlu.config import NLU_CACHE_MAX_ENTRIES, NLU_CACHE_TTL_S, NLU_CACHE_MAX_TEXT_LENGTH
+
+
+class NLUResultCache:
+    """
+    Cache LRU con TTL para resultados del NLU, indexado por texto normalizado.
+
+    Acotado en memoria por número de entradas y por largo de la clave (los
+    mensajes largos casi nunca se repiten y no se guardan). Devuelve copias
+    porque los llamadores modifican el dict de entidades.
+
+    Las entradas son de una generación (versiones del modelo y del léxico):
+    set_generation() vacía el cache cuando cambia, y put() descarta los
+    resultados calculados con una generación anterior (una consulta que
+    empezó antes de un refresco y termina después).
+    """
+
+    def __init__(self, max_entries: int = NLU_CACHE_MAX_ENTRIES, ttl_seconds: float = NLU_CACHE_TTL_S,
+                 max_text_length: int = NLU_CACHE_MAX_TEXT_LENGTH):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_text_length = max_text_length
+        self._entries = OrderedDict()  # clave -> (expira_en, resultado)
+        self._lock = threading.Lock()
+        self.generation = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stale_puts = 0
+
+    def get(self, key: str) -> Optional[dict]:
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] < now:
+                if entry is not None:
+                    del self._entries[key]
+                    self.evictions += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            value = entry[1]
+        return copy.deepcopy(value)
+
+    def put(self, key: str, value: dict, generation=None):
+        """generation: la del modelo/léxico con que se calculó value (None = la vigente)"""
+        if self.max_entries <= 0 or len(key) > self.max_text_length:
+            return
+        value = copy.deepcopy(value)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                self.stale_puts += 1
+                return
+            self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def set_generation(self, generation):
+        """Generación vigente del modelo/léxico; si cambió, se vacía el cache"""
+        with self._lock:
+            if generation != self.generation:
+                self._entries.clear()
+                self.generation = generation
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "stale_puts": self.stale_puts,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
@@ -1,3 +1,5 @@
+import os
+
 # Umbral mínimo de confianza para aceptar una intención
 INTENT_THRESHOLD = 0.7
 
@@ -12,6 +14,68 @@ ENTITY_LABELS = {
 # Ruta donde se guardará/cargará el modelo entrenado de spaCy
 MODEL_PATH = "nlu/spacy_model/modelo_intenciones"
 
+# Clasificador rápido (n-gramas hasheados) que va delante de spaCy: si su
+# confianza supera FAST_INTENT_THRESHOLD responde él, si no decide spaCy.
+# Se genera con nlu/training/train_fast_classifier.py; sin archivo, no se usa.
+FAST_CLASSIFIER_PATH = "nlu/spacy_model/fast_intent.npz"
+FAST_INTENT_THRESHOLD = float(os.getenv("FAST_INTENT_THRESHOLD", "0.9"))
+
+# Vectores podados para abrir con mmap (los genera nlu/training/export_vectors.py).
+# Si la carpeta existe, reemplaza la tabla de vectores privada de cada worker.
+SHARED_VECTORS_PATH = os.getenv("SHARED_VECTORS_PATH", "nlu/spacy_model/vectores_compartidos")
+
+# Perfiles del pipeline: componentes que se ejecutan en cada modo.
+# Las dependencias (listeners de tok2vec) se agregan solas al cargar;
+# todo lo demás se excluye en spacy.load. None = pipeline completo.
+PIPELINE_PROFILES = {
+    "full": None,
+    "intent-only": ["textcat"],
+    "intent-ner": ["textcat", "ner"],
+}
+
+# Perfil activo (solo se lee doc.cats, así que basta con textcat)
+PIPELINE_PROFILE = os.getenv("NLU_PIPELINE_PROFILE", "intent-only")
+
+# Micro-batching: máximo de mensajes por lote y espera máxima para completarlo
+NLU_BATCH_MAX_SIZE = int(os.getenv("NLU_BATCH_MAX_SIZE", "32"))
+NLU_BATCH_MAX_WAIT_MS = float(os.getenv("NLU_BATCH_MAX_WAIT_MS", "5"))
+
+# Pool donde corre la inferencia ("thread" o "process"), tamaño de la cola
+# de lotes en vuelo y timeout por llamada en segundos
+NLU_EXECUTOR = os.getenv("NLU_EXECUTOR", "thread")
+NLU_MAX_WORKERS = int(os.getenv("NLU_MAX_WORKERS", "2"))
+NLU_MAX_PENDING = int(os.getenv("NLU_MAX_PENDING", "64"))
+NLU_TIMEOUT_S = float(os.getenv("NLU_TIMEOUT_S", "2.0"))
+
+# Cache de resultados del NLU (clave = texto normalizado)
+NLU_CACHE_MAX_ENTRIES = int(os.getenv("NLU_CACHE_MAX_ENTRIES", "5000"))
+NLU_CACHE_TTL_S = float(os.getenv("NLU_CACHE_TTL_S", "600"))
+NLU_CACHE_MAX_TEXT_LENGTH = 200
+
+# Refresco en segundo plano de marcas/categorías desde el catálogo
+# (0 desactiva) y cada cuántos ciclos se hace una recarga completa
+LEXICON_REFRESH_INTERVAL_S = float(os.getenv("LEXICON_REFRESH_INTERVAL_S", "60"))
+LEXICON_FULL_RELOAD_EVERY = int(os.getenv("LEXICON_FULL_RELOAD_EVERY", "60"))
+
+# Marcas/categorías con errores de tipeo: distancia de edición máxima y largo
+# mínimo de palabra para tolerar errores (las más cortas solo matchean exacto)
+FUZZY_MAX_DISTANCE = int(os.getenv("FUZZY_MAX_DISTANCE", "2"))
+FUZZY_MIN_LENGTH = 5
+
+# Palabras comunes que nunca se toman como marca/categoría mal escrita
+# ("hacer" está a un borrado de "acer", "casi" de "casio")
+FUZZY_COMMON_WORDS = frozenset("""
+    a al algo alguna alguno aqui asi bien bueno buena cada casi como con cual cuales cuando cuanto
+    cuesta cuestan de del desde donde el ella ellos en entonces es esa ese esta este esto hay hola
+    la las le lo los mas me mejor mi mis muy no nos o otra otro para pero poco por porque puede
+    que quien se si sin sobre solo su sus tambien tan tengo todo todos tu un una unas unos y ya
+    ayuda ayudar barata barato buscar busco buscando cara caro comparar comprar compro decir dime
+    favor gracias gustaria hacer hablar mostrar muestrame necesito poder podria puedo quiero
+    quisiera saber sabes tener tiene tienen tienes vender venden ver precio precios
+    producto productos marca marcas categoria categorias tienda nuevo nueva grande pequeno
+    ahora hoy mucho muchos otros otras alguien nada nadie siempre nunca tenga tengan hace
+""".split())
+
 # Nombre del modelo base de spaCy para español
 #BASE_SPACY_MODEL = "es_dep_news_trf"
 
@@ -25,4 +89,3 @@ SUPPORTED_INTENTS = [
     "ayuda",
     "comparar_precios_web"
 ]
-
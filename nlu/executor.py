@@ -0,0 +1,176 @@
+import asyncio
+import functools
+import logging
+import multiprocessing
+import os
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from nlu.config import NLU_EXECUTOR, NLU_MAX_WORKERS, NLU_MAX_PENDING, NLU_TIMEOUT_S
+
+logger = logging.getLogger("nlu")
+
+# NLUProcessor propio de cada proceso worker (se carga una sola vez)
+_worker_processor = None
+
+
+def processor_status(processor) -> dict:
+    """Qué le falta a un NLUProcessor para atender (lo usa /ready)"""
+    classifier = processor.intent_classifier
+    return {
+        "intent_model": classifier.nlp is not None or classifier.fast_classifier is not None,
+        "gazetteers": processor.entity_extractor.loaded,
+        # Con las listas de respaldo (la BD no respondió) no está listo
+        "lexicon_from_db": processor.entity_extractor.from_db,
+    }
+
+
+def processor_info(processor) -> dict:
+    """Modelo de intenciones y contadores del cache (lo usa /nlu-info)"""
+    info = processor.intent_classifier.get_model_info()
+    info["cache"] = processor.cache.stats()
+    return info
+
+
+def _init_worker(status_queue=None):
+    global _worker_processor
+    from nlu import NLUProcessor
+    from nlu.lexicon_refresher import LexiconRefresher
+    _worker_processor = NLUProcessor()
+
+    def report():
+        # El proceso principal no ve este NLUProcessor: le avisamos su estado
+        if status_queue is not None:
+            status_queue.put((os.getpid(), processor_status(_worker_processor)))
+
+    # Cada proceso mantiene al día su propio léxico
+    refresher = LexiconRefresher(_worker_processor.entity_extractor, on_refresh=report)
+    refresher.prime()
+    _worker_processor.entity_extractor.load()
+    report()
+    refresher.start()
+
+
+def _worker_process_batch(texts: list) -> list:
+    return _worker_processor.process_batch(texts)
+
+
+def _worker_info() -> dict:
+    info = processor_info(_worker_processor)
+    info["worker_pid"] = os.getpid()
+    return info
+
+
+def fallback_result() -> dict:
+    return {
+        "intent": "desconocido",
+        "confidence": 0.0,
+        "entities": {}
+    }
+
+
+class AsyncNLUProcessor:
+    """
+    Fachada async del NLU: ejecuta la inferencia en un pool de hilos o de
+    procesos para no bloquear el event loop de uvicorn.
+
+    La cola es acotada (max_pending lotes en vuelo) y cada llamada tiene un
+    timeout; en ambos casos se devuelve el resultado de fallback.
+    """
+
+    def __init__(self, processor=None, executor: str = NLU_EXECUTOR,
+                 max_workers: int = NLU_MAX_WORKERS, max_pending: int = NLU_MAX_PENDING,
+                 timeout: float = NLU_TIMEOUT_S):
+        self.executor = executor
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._status_queue = None
+        self._worker_status = {}
+
+        if executor == "process":
+            # Cada proceso carga modelo_intenciones en su initializer y reporta su estado por la cola
+            context = multiprocessing.get_context()
+            self._status_queue = context.Queue()
+            self._pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=context,
+                                             initializer=_init_worker, initargs=(self._status_queue,))
+            self._process_batch = _worker_process_batch
+            self._info = _worker_info
+        elif executor == "thread":
+            if processor is None:
+                raise ValueError("El executor 'thread' necesita un NLUProcessor")
+            self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="nlu")
+            self._process_batch = processor.process_batch
+            self._info = functools.partial(processor_info, processor)
+        else:
+            raise ValueError(f"Executor NLU desconocido: {executor}")
+
+    async def process(self, text: str) -> dict:
+        results = await self.process_batch([text])
+        return results[0]
+
+    async def process_batch(self, texts: list) -> list:
+        if not self._acquire():
+            logger.warning(f"Cola NLU llena ({self.max_pending}); usando fallback")
+            return [fallback_result() for _ in texts]
+
+        try:
+            future = self._pool.submit(self._process_batch, list(texts))
+        except Exception:
+            self._release()
+            raise
+        # El slot se libera cuando el worker termina de verdad, no al expirar el timeout
+        future.add_done_callback(lambda _: self._release())
+
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"NLU excedió {self.timeout}s para {len(texts)} mensajes; usando fallback")
+            return [fallback_result() for _ in texts]
+        except Exception as e:
+            logger.error(f"Error en worker NLU: {e}")
+            return [fallback_result() for _ in texts]
+
+    async def info(self) -> dict:
+        """Info del NLU; en modo process, la del worker que atienda la consulta (cada uno tiene su cache)"""
+        future = self._pool.submit(self._info)
+        return await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+
+    def warmup(self, texts: list):
+        """Bloqueante: pasa un lote por cada worker para que carguen el modelo"""
+        futures = [self._pool.submit(self._process_batch, list(texts)) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result()
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def worker_status(self) -> dict:
+        """{pid: processor_status} de los workers de proceso que ya terminaron su initializer"""
+        if self._status_queue is not None:
+            while True:
+                try:
+                    pid, status = self._status_queue.get_nowait()
+                except queue.Empty:
+                    break
+                self._worker_status[pid] = status
+        return dict(self._worker_status)
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+        if self._status_queue is not None:
+            self._status_queue.close()
+
+    def _acquire(self) -> bool:
+        with self._lock:
+            if self._pending >= self.max_pending:
+                return False
+            self._pending += 1
+            return True
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
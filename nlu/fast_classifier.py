@@ -0,0 +1,100 @@
+import re
+import unicodedata
+import zlib
+import numpy as np
+
+
+def _normalize(text: str) -> str:
+    text = text.lower()
+    text = unicodedata.normalize('NFD', text)
+    text = ''.join(c for c in text if unicodedata.category(c) != 'Mn')
+    return re.sub(r'[^\w\s]', ' ', text)
+
+
+class HashedNgramClassifier:
+    """
+    Clasificador lineal de intenciones sobre n-gramas hasheados.
+
+    Rasgos: palabras, bigramas de palabras y n-gramas de caracteres (3-5)
+    hasheados a n_features columnas; el puntaje es la suma de las filas de
+    una matriz NumPy + softmax. Es el primer nivel de la cascada: solo
+    responde cuando está muy seguro, el resto va a spaCy.
+    """
+
+    def __init__(self, labels: list, n_features: int = 2 ** 16, weights=None, bias=None):
+        self.labels = list(labels)
+        self.n_features = n_features
+        n_labels = len(self.labels)
+        self.weights = weights if weights is not None else np.zeros((n_features, n_labels), dtype=np.float32)
+        self.bias = bias if bias is not None else np.zeros(n_labels, dtype=np.float32)
+
+    def featurize(self, text: str) -> np.ndarray:
+        words = _normalize(text).split()
+        features = [f"w:{w}" for w in words]
+        features += [f"b:{a} {b}" for a, b in zip(words, words[1:])]
+        for w in words:
+            padded = f"<{w}>"
+            for n in (3, 4, 5):
+                features += [padded[i:i + n] for i in range(len(padded) - n + 1)]
+        if not features:
+            return np.empty(0, dtype=np.int64)
+        indices = [zlib.crc32(f.encode("utf-8")) % self.n_features for f in features]
+        return np.unique(np.array(indices, dtype=np.int64))
+
+    def _softmax(self, scores: np.ndarray) -> np.ndarray:
+        scores = scores - scores.max()
+        exp = np.exp(scores)
+        return exp / exp.sum()
+
+    def predict_proba(self, text: str) -> np.ndarray:
+        indices = self.featurize(text)
+        return self._softmax(self.weights[indices].sum(axis=0) + self.bias)
+
+    def predict(self, text: str) -> tuple:
+        probs = self.predict_proba(text)
+        best = int(probs.argmax())
+        return (self.labels[best], float(probs[best]))
+
+    def fit(self, texts: list, targets: np.ndarray, epochs: int = 30, learning_rate: float = 0.2,
+            l2: float = 1e-5, seed: int = 0):
+        """
+        Regresión logística multinomial con SGD.
+
+        targets es una matriz (n_textos, n_labels) con distribuciones: one-hot
+        para datos etiquetados o doc.cats del textcat de spaCy (distilación).
+        """
+        rng = np.random.default_rng(seed)
+        featurized = [self.featurize(t) for t in texts]
+        targets = np.asarray(targets, dtype=np.float32)
+        order = np.arange(len(texts))
+        for epoch in range(epochs):
+            rng.shuffle(order)
+            lr = learning_rate / (1 + epoch * 0.1)
+            for i in order:
+                indices = featurized[i]
+                probs = self._softmax(self.weights[indices].sum(axis=0) + self.bias)
+                grad = probs - targets[i]
+                if l2:
+                    self.weights[indices] *= (1 - lr * l2)
+                self.weights[indices] -= lr * grad
+                self.bias -= lr * grad
+        return self
+
+    def save(self, path: str):
+        np.savez_compressed(
+            path,
+            weights=self.weights,
+            bias=self.bias,
+            labels=np.array(self.labels),
+            n_features=np.array(self.n_features),
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "HashedNgramClassifier":
+        data = np.load(path, allow_pickle=False)
+        return cls(
+            labels=[str(label) for label in data["labels"]],
+            n_features=int(data["n_features"]),
+            weights=data["weights"].astype(np.float32),
+            bias=data["bias"].astype(np.float32),
+        )
@@ -0,0 +1,130 @@
+from collections import defaultdict
+from typing import Optional, Tuple
+
+
+def _deletes(term: str, max_distance: int) -> set:
+    """Todas las variantes de term con hasta max_distance caracteres borrados"""
+    result = {term}
+    frontier = {term}
+    for _ in range(max_distance):
+        next_frontier = set()
+        for word in frontier:
+            if len(word) <= 1:
+                continue
+            for i in range(len(word)):
+                next_frontier.add(word[:i] + word[i + 1:])
+        next_frontier -= result
+        result |= next_frontier
+        frontier = next_frontier
+    return result
+
+
+def bounded_distance(a: str, b: str, max_distance: int) -> int:
+    """
+    Distancia de edición con transposiciones (OSA), cortando apenas supera
+    max_distance; en ese caso devuelve max_distance + 1.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return max_distance + 1
+    if a == b:
+        return 0
+    prev_prev = None
+    prev = list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        row_min = i
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            value = min(prev[j] + 1, current[j - 1] + 1, prev[j - 1] + cost)
+            if (prev_prev is not None and i > 1 and j > 1
+                    and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]):
+                value = min(value, prev_prev[j - 2] + 1)
+            current[j] = value
+            row_min = min(row_min, value)
+        if row_min > max_distance:
+            return max_distance + 1
+        prev_prev, prev = prev, current
+    return prev[-1]
+
+
+class FuzzyIndex:
+    """
+    Búsqueda tolerante a errores de tipeo ("samsumg", "lenobo", "celulres")
+    al estilo SymSpell.
+
+    Al construirlo se precalculan las variantes por borrado de cada término;
+    una consulta genera los borrados de la palabra, los busca en el índice y
+    solo verifica la distancia real contra esos pocos candidatos. Así el
+    costo depende del largo de la palabra y no de la cantidad de marcas.
+
+    La distancia permitida crece con el largo: los términos cortos ("lg",
+    "hp") solo matchean exacto para no confundirse con palabras comunes.
+    Para lo mismo, un error de tipeo nunca cambia la primera letra ("hacer"
+    no es "acer") y las palabras de ignore (verbos y palabras comunes del
+    chat) solo matchean exacto.
+    Igual que Gazetteer, es inmutable y acepta lista o dict {normalizado: valor}.
+    """
+
+    def __init__(self, terms, max_distance: int = 2, min_length: int = 4, ignore=()):
+        if not isinstance(terms, dict):
+            terms = {t: t for t in terms}
+        self.max_distance = max_distance
+        self.min_length = min_length
+        self.ignore = frozenset(ignore)
+        self._values = {t: v for t, v in terms.items() if t}
+        # Términos de varias palabras: se prueban grupos de palabras seguidas
+        self.max_words = min(3, max((len(t.split()) for t in self._values), default=1))
+        self._index = defaultdict(list)
+        for term in sorted(self._values):
+            for variant in _deletes(term, self.allowed_distance(term)):
+                self._index[variant].append(term)
+
+    def __len__(self) -> int:
+        return len(self._values)
+
+    def __contains__(self, word: str) -> bool:
+        return word in self._values
+
+    def allowed_distance(self, word: str) -> int:
+        if len(word) < self.min_length:
+            return 0
+        if len(word) < 2 * self.min_length - 1:
+            return min(1, self.max_distance)
+        return self.max_distance
+
+    def lookup(self, word: str) -> Optional[Tuple[str, int]]:
+        """Término más cercano a word como (valor, distancia), o None"""
+        if word in self._values:
+            return self._values[word], 0
+        max_distance = self.allowed_distance(word)
+        if max_distance == 0 or word in self.ignore:
+            return None
+        best = None
+        seen = set()
+        for variant in _deletes(word, max_distance):
+            for term in self._index.get(variant, ()):
+                if term in seen or term[0] != word[0]:
+                    continue
+                seen.add(term)
+                # La tolerancia la fija el más corto de los dos
+                limit = min(max_distance, self.allowed_distance(term))
+                distance = bounded_distance(word, term, limit)
+                if distance <= limit and (best is None or (distance, term) < best):
+                    best = (distance, term)
+        if best is None:
+            return None
+        return self._values[best[1]], best[0]
+
+    def best_match(self, words: list) -> Optional[str]:
+        """
+        Mejor coincidencia entre las palabras del mensaje (también grupos de
+        palabras seguidas, para términos como "samsung galaxy").
+        """
+        best = None
+        for size in range(1, self.max_words + 1):
+            for i in range(len(words) - size + 1):
+                found = self.lookup(" ".join(words[i:i + size]))
+                # Menor distancia; a igual distancia, el grupo más largo
+                if found and (best is None or found[1] <= best[1]):
+                    best = found
+        return best[0] if best else None
@@ -0,0 +1,92 @@
+from collections import deque
+from typing import Optional
+
+
+def _is_word_char(c: str) -> bool:
+    return c.isalnum() or c == "_"
+
+
+class Gazetteer:
+    """
+    Autómata Aho-Corasick sobre términos ya normalizados (marcas, categorías).
+
+    Recorre el texto una sola vez, así que el costo depende del largo del
+    mensaje y no del tamaño del catálogo. Solo acepta coincidencias que
+    empiezan y terminan en límite de palabra ("lg" no matchea en "algo").
+    Es inmutable: para actualizarlo se construye uno nuevo y se reemplaza.
+
+    Acepta una lista de términos o un dict {término normalizado: valor};
+    longest_match devuelve el valor (p. ej. la marca tal como está en la BD).
+    """
+
+    def __init__(self, terms):
+        if not isinstance(terms, dict):
+            terms = {t: t for t in terms}
+        self._values = {t: v for t, v in terms.items() if t}
+        self.terms = sorted(self._values)
+        # Estado 0 = raíz
+        self._goto = [{}]
+        self._fail = [0]
+        self._term = [None]        # término que termina exactamente en el estado
+        self._dict_link = [0]      # siguiente estado con término en la cadena de fallos
+        for term in self.terms:
+            self._add(term)
+        self._build_links()
+
+    def __len__(self) -> int:
+        return len(self.terms)
+
+    def _add(self, term: str):
+        state = 0
+        for ch in term:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._term.append(None)
+                self._dict_link.append(0)
+            state = nxt
+        self._term[state] = term
+
+    def _build_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                fail = self._goto[fail].get(ch, 0)
+                self._fail[nxt] = fail
+                self._dict_link[nxt] = fail if self._term[fail] else self._dict_link[fail]
+
+    def find_all(self, text: str) -> list:
+        """Todas las coincidencias con límite de palabra como (inicio, fin, término)"""
+        matches = []
+        goto, fail, terms, dict_link = self._goto, self._fail, self._term, self._dict_link
+        state = 0
+        n = len(text)
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            out = state if terms[state] else dict_link[state]
+            while out:
+                term = terms[out]
+                start = i - len(term) + 1
+                if (start == 0 or not _is_word_char(text[start - 1])) and \
+                        (i + 1 == n or not _is_word_char(text[i + 1])):
+                    matches.append((start, i + 1, term))
+                out = dict_link[out]
+        return matches
+
+    def longest_match(self, text: str) -> Optional[str]:
+        """Término más largo encontrado (a igual largo, el que aparece primero)"""
+        best = None
+        for start, end, term in self.find_all(text):
+            if best is None or (end - start, -start) > (best[1] - best[0], -best[0]):
+                best = (start, end, term)
+        return self._values[best[2]] if best else None
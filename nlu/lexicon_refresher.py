@@ -0,0 +1,134 @@
+import logging
+import threading
+from database.catalog_snapshot import catalog_snapshot
+from database.product_embeddings import product_embeddings
+from database.product_ranking import product_ranking
+from database.catalog_watermark import (
+    CatalogWatermark, categorias_changed, only_inserts, productos_changed, read_watermark, shared_watermark,
+)
+from database.category_cache import categoria_cache
+from database.connection import session_scope
+from models.database import Producto
+from nlu.config import LEXICON_REFRESH_INTERVAL_S, LEXICON_FULL_RELOAD_EVERY
+
+logger = logging.getLogger("nlu")
+
+
+def load_new_marcas(db, after_id: int) -> list:
+    """Marcas de los productos insertados después de after_id"""
+    marcas = db.query(Producto.marca).filter(
+        Producto.id > after_id,
+        Producto.marca.isnot(None),
+        Producto.activo == True
+    ).distinct().all()
+    return [marca[0].lower() for marca in marcas if marca[0]]
+
+
+class LexiconRefresher:
+    """
+    Hilo en segundo plano que mantiene al día las marcas/categorías de un
+    EntityExtractor.
+
+    Cada intervalo lee un watermark (max id, conteos y última
+    fecha_actualizacion) y solo si cambió vuelve a la BD: si únicamente se
+    agregaron productos, trae las marcas de las filas nuevas; si hubo bajas o
+    ediciones, recarga esa lista. Esa misma lectura se publica en
+    shared_watermark y se pasa a la foto, al ranking y a los embeddings, así
+    que ninguno lee la suya. Cada LEXICON_FULL_RELOAD_EVERY ciclos se recarga
+    todo (cubre ediciones de transacciones largas que confirman con una fecha
+    anterior al último watermark). El léxico nuevo se publica con
+    update_lexicon, sin bloquear las extracciones en curso. Si la BD falla a
+    mitad de un ciclo no se publica nada ni se avanza el watermark: sigue el
+    léxico anterior y el próximo ciclo reintenta.
+    """
+
+    def __init__(self, extractor, interval_s: float = LEXICON_REFRESH_INTERVAL_S,
+                 full_reload_every: int = LEXICON_FULL_RELOAD_EVERY, on_refresh=None):
+        self.extractor = extractor
+        self.interval_s = interval_s
+        self.full_reload_every = full_reload_every
+        # Se llama después de publicar un léxico nuevo (los workers de proceso reportan su estado)
+        self.on_refresh = on_refresh
+        self.watermark = None
+        self.cycles = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def prime(self):
+        """Leer el watermark inicial; llamar antes de la primera carga del léxico"""
+        try:
+            with session_scope() as db:
+                self.watermark = read_watermark(db)
+            shared_watermark.publish(self.watermark)
+        except Exception as e:
+            logger.warning(f"No se pudo leer el watermark del catálogo: {e}")
+
+    def start(self):
+        if self.interval_s <= 0 or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="lexicon-refresher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            try:
+                self.refresh_once()
+            except Exception as e:
+                logger.error(f"Error refrescando léxico del catálogo: {e}")
+
+    def refresh_once(self) -> bool:
+        """Un ciclo de refresco; devuelve True si se publicó un léxico nuevo"""
+        self.cycles += 1
+        with session_scope() as db:
+            current = read_watermark(db)
+            shared_watermark.publish(current)
+            previous = self.watermark
+            # Con las listas de respaldo (la BD falló al arrancar) se recarga todo hasta lograrlo
+            full = bool(previous is None or not self.extractor.from_db
+                        or (self.full_reload_every and self.cycles % self.full_reload_every == 0))
+            # Las fotos reciben la lectura del ciclo aunque no haya cambios: así no vencen por TTL
+            for store in (catalog_snapshot, product_ranking, product_embeddings):
+                store.refresh(db, watermark=current, full=full)
+            if not full and current == previous:
+                return False
+
+            marcas = categorias = None
+            if full:
+                marcas = self.extractor._load_marcas_from_db()
+                categorias = self.extractor._load_categorias_from_db()
+            else:
+                if categorias_changed(previous, current):
+                    categorias = self.extractor._load_categorias_from_db()
+                if productos_changed(previous, current):
+                    marcas = self._marcas_delta(db, previous, current)
+            if categorias is not None:
+                # Mismo aviso para el cache nombre ↔ id de categorías
+                categoria_cache.refresh(db)
+
+        self.watermark = current
+        if marcas is None and categorias is None:
+            return False
+        self.extractor.update_lexicon(marcas=marcas, categorias=categorias)
+        logger.info(
+            f"Léxico actualizado: {len(self.extractor.marcas)} marcas, "
+            f"{len(self.extractor.categorias)} categorías"
+        )
+        if self.on_refresh is not None:
+            self.on_refresh()
+        return True
+
+    def _marcas_delta(self, db, previous: CatalogWatermark, current: CatalogWatermark):
+        if not only_inserts(previous, current, db):
+            # Bajas, desactivaciones o ediciones: la lista se arma de nuevo
+            return self.extractor._load_marcas_from_db()
+        conocidas = set(self.extractor.marcas)
+        nuevas = [m for m in load_new_marcas(db, previous.productos_max_id) if m not in conocidas]
+        if not nuevas:
+            return None
+        return self.extractor.marcas + nuevas
@@ -0,0 +1,65 @@
+import os
+from pathlib import Path
+import spacy
+from spacy.util import load_config
+from nlu.config import MODEL_PATH, PIPELINE_PROFILE, PIPELINE_PROFILES, SHARED_VECTORS_PATH
+from nlu.vectors import install_shared_vectors
+
+
+def _find_upstreams(node) -> set:
+    """Buscar referencias 'upstream' (Tok2VecListener) dentro de un bloque del config"""
+    upstreams = set()
+    if isinstance(node, dict):
+        for key, value in node.items():
+            if key == "upstream" and isinstance(value, str):
+                upstreams.add(value)
+            else:
+                upstreams |= _find_upstreams(value)
+    return upstreams
+
+
+def resolve_profile_components(model_path: str = MODEL_PATH, profile: str = PIPELINE_PROFILE):
+    """Componentes del pipeline necesarios para un perfil (None = todos)"""
+    if profile not in PIPELINE_PROFILES:
+        raise ValueError(f"Perfil de pipeline desconocido: {profile}")
+    targets = PIPELINE_PROFILES[profile]
+    if targets is None:
+        return None
+
+    config = load_config(Path(model_path) / "config.cfg", interpolate=False)
+    components_cfg = config["components"]
+    pipeline = config["nlp"]["pipeline"]
+
+    required = set()
+    pending = [name for name in targets if name in pipeline]
+    while pending:
+        name = pending.pop()
+        if name in required:
+            continue
+        required.add(name)
+        for upstream in _find_upstreams(components_cfg.get(name, {})):
+            if upstream == "*":
+                # Listener comodín: escucha a cualquier tok2vec previo
+                pending.extend(
+                    p for p in pipeline
+                    if components_cfg.get(p, {}).get("factory") == "tok2vec"
+                )
+            else:
+                pending.append(upstream)
+    return required
+
+
+def load_pipeline(model_path: str = MODEL_PATH, profile: str = PIPELINE_PROFILE,
+                  vectors_path: str = SHARED_VECTORS_PATH):
+    """Cargar el modelo excluyendo los componentes que el perfil no usa"""
+    required = resolve_profile_components(model_path, profile)
+    if required is None:
+        nlp = spacy.load(model_path)
+    else:
+        config = load_config(Path(model_path) / "config.cfg", interpolate=False)
+        exclude = [name for name in config["nlp"]["pipeline"] if name not in required]
+        nlp = spacy.load(model_path, exclude=exclude)
+    if vectors_path and os.path.isdir(vectors_path):
+        # La tabla privada se libera; queda la compartida por mmap
+        install_shared_vectors(nlp, vectors_path)
+    return nlp
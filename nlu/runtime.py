@@ -0,0 +1,109 @@
+import logging
+import threading
+from nlu import NLUProcessor
+from nlu.batching import NLUBatchScheduler
+from nlu.config import NLU_EXECUTOR
+from nlu.executor import AsyncNLUProcessor, processor_status
+from nlu.lexicon_refresher import LexiconRefresher
+from nlu.vectors import word_vector_source
+
+logger = logging.getLogger("nlu")
+
+# Mensajes de calentamiento: fuerzan la carga perezosa de spaCy/thinc
+WARMUP_TEXTS = ["hola", "busco laptops lenovo baratas"]
+
+
+class NLURuntime:
+    """
+    Única instancia del NLU para toda la app.
+
+    start() (desde el lifespan de FastAPI) carga el modelo y el léxico de
+    marcas/categorías una sola vez, hace una inferencia de calentamiento y
+    recién entonces marca la app como lista. Los endpoints pasan por process()
+    e info(), que van al pool: en modo process el proceso principal nunca
+    carga un NLUProcessor propio.
+    """
+
+    def __init__(self, executor: str = NLU_EXECUTOR):
+        self.executor = executor
+        self.processor = None
+        self.async_processor = None
+        self.batcher = None
+        self.refresher = None
+        self.started = False
+        self._lock = threading.Lock()
+
+    def get_processor(self) -> NLUProcessor:
+        if self.processor is None:
+            with self._lock:
+                if self.processor is None:
+                    self.processor = NLUProcessor()
+        return self.processor
+
+    def start(self):
+        """Cargar modelos y léxico, calentar y dejar listo el pool (bloqueante)"""
+        processor = None
+        if self.executor == "thread":
+            processor = self.get_processor()
+            # Watermark antes de la carga: lo que entre después se ve en el próximo ciclo
+            self.refresher = LexiconRefresher(processor.entity_extractor)
+            self.refresher.prime()
+            processor.entity_extractor.load()
+            self._warmup(processor)
+            self.refresher.start()
+        self.async_processor = AsyncNLUProcessor(processor, executor=self.executor)
+        if self.executor == "process":
+            # Cada worker carga su modelo en el initializer; esperamos a que termine
+            self.async_processor.warmup(WARMUP_TEXTS)
+        # Un lote en vuelo por worker del pool
+        self.batcher = NLUBatchScheduler(self.async_processor.process_batch,
+                                         max_concurrency=self.async_processor.max_workers)
+        self.started = True
+        logger.info(f"NLU listo (executor={self.executor})")
+
+    def word_vectors(self):
+        """Vectores de palabras para la búsqueda semántica de productos (None si no hay)"""
+        processor = self.processor
+        nlp = processor.intent_classifier.nlp if processor is not None else None
+        return word_vector_source(nlp)
+
+    def _warmup(self, processor: NLUProcessor):
+        # Directo al clasificador y al extractor para no ensuciar el cache
+        processor.intent_classifier.classify_batch(WARMUP_TEXTS)
+        for text in WARMUP_TEXTS:
+            processor.entity_extractor.extract(text)
+
+    @property
+    def ready(self) -> bool:
+        return self.started and all(self.readiness().values())
+
+    def readiness(self) -> dict:
+        if self.executor == "process":
+            return self._workers_readiness()
+        processor = self.processor
+        if processor is None:
+            return {"intent_model": False, "gazetteers": False, "lexicon_from_db": False}
+        return processor_status(processor)
+
+    def _workers_readiness(self) -> dict:
+        # Solo atienden los workers que terminaron su initializer, y todos reportan al terminarlo
+        statuses = list(self.async_processor.worker_status().values()) if self.async_processor else []
+        checks = {"nlu_workers": self.started and bool(statuses)}
+        for check in ("intent_model", "gazetteers", "lexicon_from_db"):
+            checks[check] = bool(statuses) and all(status[check] for status in statuses)
+        return checks
+
+    async def process(self, text: str) -> dict:
+        return await self.batcher.process(text)
+
+    async def info(self) -> dict:
+        return await self.async_processor.info()
+
+    async def shutdown(self):
+        if self.refresher:
+            self.refresher.stop()
+        if self.batcher:
+            await self.batcher.close()
+        if self.async_processor:
+            self.async_processor.shutdown()
+        self.started = False
@@ -1,53 +1,150 @@
 import re
+import threading
 import unicodedata
-from database.connection import get_db
+from collections import namedtuple
+from database.category_cache import categoria_variantes
+from database.connection import session_scope
 from models.database import Categoria, Producto
+from nlu.config import FUZZY_COMMON_WORDS, FUZZY_MAX_DISTANCE, FUZZY_MIN_LENGTH
+from nlu.fuzzy_index import FuzzyIndex
+from nlu.gazetteer import Gazetteer
+
+# Listas + autómatas + índices de tipeo; se reemplazan juntos en una sola asignación
+# (from_db = False si son las listas básicas de respaldo)
+Lexicon = namedtuple("Lexicon", [
+    "marcas", "categorias", "marcas_matcher", "categorias_matcher", "marcas_fuzzy", "categorias_fuzzy",
+    "from_db",
+])
+
+# Listas básicas para el primer arranque si la BD no responde
+FALLBACK_MARCAS = ["lenovo", "samsung", "apple", "xiaomi"]
+FALLBACK_CATEGORIAS = ["electronica", "ropa", "deporte", "libros", "belleza"]
 
 class EntityExtractor:
     def __init__(self):
-        # Cargar listas dinámicamente desde la BD
-        self.marcas = self._load_marcas_from_db()
-        self.categorias = self._load_categorias_from_db()
+        # Las listas se cargan desde la BD en el primer uso (o con load())
+        self._lexicon = None
+        self._load_lock = threading.Lock()
+        # Se incrementa en cada recarga (invalida caches que dependen del léxico)
+        self.version = 0
+
+    @property
+    def lexicon(self) -> Lexicon:
+        lexicon = self._lexicon
+        if lexicon is None:
+            self.load()
+            lexicon = self._lexicon
+        return lexicon
+
+    @property
+    def loaded(self) -> bool:
+        return self._lexicon is not None
+
+    @property
+    def marcas(self) -> list:
+        return self.lexicon.marcas
+
+    @property
+    def categorias(self) -> list:
+        return self.lexicon.categorias
+
+    def load(self):
+        """Cargar las listas si todavía no se cargaron"""
+        with self._load_lock:
+            if self._lexicon is None:
+                self.refresh_entities()
+
+    @property
+    def from_db(self) -> bool:
+        """¿El léxico vigente salió de la BD (y no de las listas de respaldo)?"""
+        lexicon = self._lexicon
+        return lexicon is not None and lexicon.from_db
 
     def _load_marcas_from_db(self) -> list:
-        """Cargar marcas únicas desde la BD"""
-        try:
-            db = next(get_db())
+        """Cargar marcas únicas desde la BD (los errores los maneja quien llama)"""
+        with session_scope() as db:
             marcas = db.query(Producto.marca).filter(
                 Producto.marca.isnot(None),
                 Producto.activo == True
             ).distinct().all()
-            return [marca[0].lower() for marca in marcas if marca[0]]
-        except Exception as e:
-            print(f"Error cargando marcas: {e}")
-            # Fallback a lista básica
-            return ["lenovo", "samsung", "apple", "xiaomi"]
+        return [marca[0].lower() for marca in marcas if marca[0]]
 
     def _load_categorias_from_db(self) -> list:
-        """Cargar categorías desde la BD"""
-        try:
-            db = next(get_db())
+        """Cargar categorías desde la BD (los errores los maneja quien llama)"""
+        with session_scope() as db:
             categorias = db.query(Categoria.nombre).filter(
                 Categoria.activo == True
             ).all()
-            # Incluir variantes comunes
-            categorias_list = []
-            for cat in categorias:
-                nombre = cat[0].lower()
-                categorias_list.append(nombre)
-                # Agregar variantes comunes
-                if "electronica" in nombre:
-                    categorias_list.extend(["laptop", "laptops", "celular", "celulares", "tablet", "tablets"])
-            return list(set(categorias_list))
-        except Exception as e:
-            print(f"Error cargando categorías: {e}")
-            # Fallback a lista básica
-            return ["electronica", "ropa", "deporte", "libros", "belleza"]
+        # Cada nombre en singular y plural; CategoryCache resuelve cualquiera
+        # de las formas a la categoría real (y esta a su subárbol)
+        categorias_list = set()
+        for cat in categorias:
+            categorias_list.add(cat[0].lower())
+            categorias_list.update(categoria_variantes(cat[0]))
+        return list(categorias_list)
 
     def refresh_entities(self):
         """Refrescar listas desde la BD (útil para actualizaciones)"""
-        self.marcas = self._load_marcas_from_db()
-        self.categorias = self._load_categorias_from_db()
+        try:
+            marcas, categorias = self._load_marcas_from_db(), self._load_categorias_from_db()
+            from_db = True
+        except Exception as e:
+            print(f"Error cargando marcas/categorías: {e}")
+            if self._lexicon is not None:
+                # Se conserva el léxico vigente; el próximo refresco reintenta
+                return
+            # Primera carga: listas básicas de respaldo
+            marcas, categorias = list(FALLBACK_MARCAS), list(FALLBACK_CATEGORIAS)
+            from_db = False
+        # Se compila fuera y se publica de golpe: las extracciones en curso
+        # siguen usando el léxico anterior hasta terminar
+        self._lexicon = self._build_lexicon(marcas, categorias, from_db)
+        self.version += 1
+
+    def update_lexicon(self, marcas: list = None, categorias: list = None):
+        """Publicar un léxico nuevo reemplazando solo las listas indicadas"""
+        current = self.lexicon
+        marcas_matcher, marcas_fuzzy = (
+            self._compile(marcas) if marcas is not None
+            else (current.marcas_matcher, current.marcas_fuzzy)
+        )
+        categorias_matcher, categorias_fuzzy = (
+            self._compile(categorias) if categorias is not None
+            else (current.categorias_matcher, current.categorias_fuzzy)
+        )
+        self._lexicon = Lexicon(
+            marcas=marcas if marcas is not None else current.marcas,
+            categorias=categorias if categorias is not None else current.categorias,
+            marcas_matcher=marcas_matcher,
+            categorias_matcher=categorias_matcher,
+            marcas_fuzzy=marcas_fuzzy,
+            categorias_fuzzy=categorias_fuzzy,
+            # Las dos listas nuevas vienen de la BD: ya no quedan las de respaldo
+            from_db=current.from_db or (marcas is not None and categorias is not None),
+        )
+        self.version += 1
+
+    def _build_lexicon(self, marcas: list, categorias: list, from_db: bool = True) -> Lexicon:
+        marcas_matcher, marcas_fuzzy = self._compile(marcas)
+        categorias_matcher, categorias_fuzzy = self._compile(categorias)
+        return Lexicon(
+            marcas=marcas,
+            categorias=categorias,
+            marcas_matcher=marcas_matcher,
+            categorias_matcher=categorias_matcher,
+            marcas_fuzzy=marcas_fuzzy,
+            categorias_fuzzy=categorias_fuzzy,
+            from_db=from_db,
+        )
+
+    def _compile(self, terms: list) -> tuple:
+        """Autómata exacto + índice tolerante a errores de tipeo"""
+        normalized = {self.normalize(t): t for t in terms}
+        return (
+            Gazetteer(normalized),
+            FuzzyIndex(normalized, max_distance=FUZZY_MAX_DISTANCE, min_length=FUZZY_MIN_LENGTH,
+                       ignore=FUZZY_COMMON_WORDS),
+        )
 
     def normalize(self, text: str) -> str:
         text = text.lower()
@@ -59,18 +156,29 @@ class EntityExtractor:
     def extract(self, text: str) -> dict:
         text_norm = self.normalize(text)
         entidades = {}
+        lexicon = self.lexicon
 
         # Marca (desde BD)
-        for marca in self.marcas:
-            if marca in text_norm:
-                entidades["marca"] = marca
-                break
+        marca = lexicon.marcas_matcher.longest_match(text_norm)
 
         # Categoría (desde BD + variantes)
-        for categoria in self.categorias:
-            if categoria in text_norm:
-                entidades["categoria"] = categoria
-                break
+        categoria = lexicon.categorias_matcher.longest_match(text_norm)
+
+        # Sin coincidencia exacta: probar con errores de tipeo ("samsumg"),
+        # sin reutilizar las palabras que ya son una entidad exacta
+        if marca is None or categoria is None:
+            words = [w for w in text_norm.split() if not w.isdigit()]
+            if marca is None:
+                marca = lexicon.marcas_fuzzy.best_match(
+                    [w for w in words if w not in lexicon.categorias_fuzzy])
+            if categoria is None:
+                categoria = lexicon.categorias_fuzzy.best_match(
+                    [w for w in words if w not in lexicon.marcas_fuzzy])
+
+        if marca:
+            entidades["marca"] = marca
+        if categoria:
+            entidades["categoria"] = categoria
 
         # Rango de precio (mantienes la lógica actual)
         rango_precio = re.search(r'(\d{2,6})\s*(a|hasta|-|y)\s*(\d{2,6})', text_norm)
@@ -1,28 +1,83 @@
-import spacy
-from nlu.config import MODEL_PATH, INTENT_THRESHOLD
+import os
+from nlu.config import (MODEL_PATH, INTENT_THRESHOLD, PIPELINE_PROFILE, NLU_BATCH_MAX_SIZE,
+                        FAST_CLASSIFIER_PATH, FAST_INTENT_THRESHOLD)
+from nlu.fast_classifier import HashedNgramClassifier
+from nlu.pipeline import load_pipeline
 
 class MLIntentClassifier:
-    def __init__(self, model_path=MODEL_PATH, threshold=INTENT_THRESHOLD):
+    def __init__(self, model_path=MODEL_PATH, threshold=INTENT_THRESHOLD, profile=PIPELINE_PROFILE,
+                 fast_classifier_path=FAST_CLASSIFIER_PATH, fast_threshold=FAST_INTENT_THRESHOLD):
         self.nlp = None
+        self.fast_classifier = None
         self.model_path = model_path
+        self.profile = profile
+        self.fast_classifier_path = fast_classifier_path
+        self.fast_threshold = fast_threshold
         self.threshold = 0.7
+        self.version = 0
+        # Cuántas veces respondió cada nivel de la cascada
+        self.fast_hits = 0
+        self.spacy_calls = 0
         self.load_model()
 
     def load_model(self):
         try:
-            self.nlp = spacy.load(self.model_path)
+            self.nlp = load_pipeline(self.model_path, self.profile)
         except Exception as e:
             print(f"❌ Error cargando modelo spaCy: {e}")
             self.nlp = None
+        self.fast_classifier = self._load_fast_classifier()
+        self.version += 1
+
+    def _load_fast_classifier(self):
+        if not self.fast_classifier_path or not os.path.exists(self.fast_classifier_path):
+            return None
+        try:
+            return HashedNgramClassifier.load(self.fast_classifier_path)
+        except Exception as e:
+            print(f"❌ Error cargando clasificador rápido: {e}")
+            return None
+
+    def _fast_classify(self, text: str):
+        """Primer nivel de la cascada: None si no está lo bastante seguro"""
+        if not self.fast_classifier:
+            return None
+        intent, confidence = self.fast_classifier.predict(text)
+        if confidence >= self.fast_threshold:
+            self.fast_hits += 1
+            return (intent, confidence)
+        return None
 
     def classify(self, text: str) -> tuple:
+        fast = self._fast_classify(text)
+        if fast:
+            return fast
         if not self.nlp:
             return ("desconocido", 0.0)
+        self.spacy_calls += 1
         doc = self.nlp(text)
-        if not doc.cats:
+        return self._intent_from_cats(doc.cats)
+
+    def classify_batch(self, texts: list, batch_size: int = NLU_BATCH_MAX_SIZE) -> list:
+        results = [self._fast_classify(text) for text in texts]
+        pending = [i for i, result in enumerate(results) if result is None]
+        if not pending:
+            return results
+        if not self.nlp:
+            for i in pending:
+                results[i] = ("desconocido", 0.0)
+            return results
+        self.spacy_calls += len(pending)
+        docs = self.nlp.pipe((texts[i] for i in pending), batch_size=batch_size)
+        for i, doc in zip(pending, docs):
+            results[i] = self._intent_from_cats(doc.cats)
+        return results
+
+    def _intent_from_cats(self, cats: dict) -> tuple:
+        if not cats:
             return ("desconocido", 0.0)
-        intent = max(doc.cats, key=doc.cats.get)
-        confidence = doc.cats[intent]
+        intent = max(cats, key=cats.get)
+        confidence = cats[intent]
         if confidence >= self.threshold:
             return (intent, confidence)
         else:
@@ -33,3 +88,16 @@ class MLIntentClassifier:
             return {}
         doc = self.nlp(text)
         return dict(doc.cats) if doc.cats else {}
+
+    def get_model_info(self) -> dict:
+        return {
+            "model_path": self.model_path,
+            "profile": self.profile,
+            "loaded": self.nlp is not None,
+            "pipeline": list(self.nlp.pipe_names) if self.nlp else [],
+            "threshold": self.threshold,
+            "fast_classifier": self.fast_classifier is not None,
+            "fast_threshold": self.fast_threshold,
+            "fast_hits": self.fast_hits,
+            "spacy_calls": self.spacy_calls,
+        }
@@ -0,0 +1,46 @@
+import json
+import sys
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+import spacy
+from nlu.config import MODEL_PATH, SHARED_VECTORS_PATH
+from nlu.vectors import export_vectors
+
+TRAIN_DATA_PATH = "nlu/training/training_data.json"
+
+
+def training_texts() -> list:
+    with open(TRAIN_DATA_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [text for texts in data["intents"].values() for text in texts]
+
+
+def catalog_texts() -> list:
+    """Nombres, marcas y descripciones del catálogo + mensajes reales guardados"""
+    try:
+        from database.connection import session_scope
+        from models.database import Producto, Categoria, Conversacion
+        with session_scope() as db:
+            texts = []
+            for nombre, marca, descripcion in db.query(Producto.nombre, Producto.marca, Producto.descripcion):
+                texts.extend(t for t in (nombre, marca, descripcion) if t)
+            texts.extend(nombre for (nombre,) in db.query(Categoria.nombre) if nombre)
+            texts.extend(m for (m,) in db.query(Conversacion.mensaje_usuario) if m)
+            return texts
+    except Exception as e:
+        print(f"⚠️  No se pudo leer el catálogo ({e}); solo datos de entrenamiento")
+        return []
+
+
+def main():
+    dtype = "float16" if "--float16" in sys.argv else "float32"
+    # Sin componentes: solo interesan el tokenizer y los vectores
+    nlp = spacy.load(MODEL_PATH, exclude=spacy.util.load_config(Path(MODEL_PATH) / "config.cfg")["nlp"]["pipeline"])
+    texts = training_texts() + catalog_texts()
+    meta = export_vectors(nlp, texts, SHARED_VECTORS_PATH, dtype=dtype)
+    print(f"✅ {meta['rows']} de {meta['original_rows']} vectores ({dtype}) guardados en {SHARED_VECTORS_PATH}")
+
+
+if __name__ == "__main__":
+    main()
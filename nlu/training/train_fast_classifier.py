@@ -0,0 +1,86 @@
+import json
+import sys
+from pathlib import Path
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[2]))
+from nlu.config import MODEL_PATH, FAST_CLASSIFIER_PATH
+from nlu.fast_classifier import HashedNgramClassifier
+from nlu.pipeline import load_pipeline
+
+TRAIN_DATA_PATH = "nlu/training/training_data.json"
+# Mensajes sin etiqueta (uno por línea) que se etiquetan con el textcat de spaCy
+UNLABELED_PATH = "nlu/training/unlabeled_messages.txt"
+# Peso de la etiqueta real frente a la predicción de spaCy
+GOLD_WEIGHT = 0.7
+
+
+def load_training_data():
+    with open(TRAIN_DATA_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [(text, intent) for intent, texts in data["intents"].items() for text in texts]
+
+
+def variations(text: str) -> list:
+    """Variantes simples como las que escriben los usuarios"""
+    base = text.strip()
+    return list({base.lower(), base.replace("?", "").replace("¿", ""), base.rstrip(".!?") + "?"} - {base})
+
+
+def load_teacher():
+    try:
+        return load_pipeline(MODEL_PATH, "intent-only")
+    except Exception as e:
+        print(f"⚠️  Sin modelo spaCy para distilar ({e}); se entrena solo con etiquetas")
+        return None
+
+
+def teacher_targets(nlp, texts: list, labels: list) -> np.ndarray:
+    targets = np.zeros((len(texts), len(labels)), dtype=np.float32)
+    for i, doc in enumerate(nlp.pipe(texts, batch_size=256)):
+        for j, label in enumerate(labels):
+            targets[i, j] = doc.cats.get(label, 0.0)
+    sums = targets.sum(axis=1, keepdims=True)
+    return np.divide(targets, sums, out=np.full_like(targets, 1 / len(labels)), where=sums > 0)
+
+
+def main():
+    gold = load_training_data()
+    labels = sorted({intent for _, intent in gold})
+    teacher = load_teacher()
+
+    texts = [text for text, _ in gold]
+    targets = np.zeros((len(texts), len(labels)), dtype=np.float32)
+    for i, (_, intent) in enumerate(gold):
+        targets[i, labels.index(intent)] = 1.0
+
+    # Variantes de los ejemplos etiquetados, con la misma etiqueta
+    extra = [(var, intent) for text, intent in gold for var in variations(text)]
+    texts += [text for text, _ in extra]
+    extra_targets = np.zeros((len(extra), len(labels)), dtype=np.float32)
+    for i, (_, intent) in enumerate(extra):
+        extra_targets[i, labels.index(intent)] = 1.0
+    targets = np.vstack([targets, extra_targets])
+
+    if teacher is not None:
+        # Distilación: mezclamos la etiqueta real con lo que predice spaCy
+        targets = GOLD_WEIGHT * targets + (1 - GOLD_WEIGHT) * teacher_targets(teacher, texts, labels)
+        if Path(UNLABELED_PATH).exists():
+            unlabeled = [l.strip() for l in Path(UNLABELED_PATH).read_text(encoding="utf-8").splitlines() if l.strip()]
+            texts += unlabeled
+            targets = np.vstack([targets, teacher_targets(teacher, unlabeled, labels)])
+            print(f"📊 Mensajes sin etiqueta (spaCy como profesor): {len(unlabeled)}")
+
+    print(f"📊 Ejemplos de entrenamiento: {len(texts)}")
+    classifier = HashedNgramClassifier(labels).fit(texts, targets)
+
+    correct = sum(classifier.predict(text)[0] == intent for text, intent in gold)
+    print(f"🎯 Precisión sobre los ejemplos etiquetados: {correct / len(gold):.2%}")
+
+    Path(FAST_CLASSIFIER_PATH).parent.mkdir(parents=True, exist_ok=True)
+    classifier.save(FAST_CLASSIFIER_PATH)
+    print(f"✅ Clasificador rápido guardado en: {FAST_CLASSIFIER_PATH}")
+
+
+if __name__ == "__main__":
+    main()
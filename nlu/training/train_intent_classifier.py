@@ -1,6 +1,8 @@
 import spacy
 import json
 import random
+import sys
+import time
 from pathlib import Path
 from spacy.training import Example
 from spacy.util import minibatch, compounding
@@ -12,9 +14,12 @@ TRAIN_DATA_PATH = "nlu/training/training_data.json"
 BASE_MODEL = "es_core_news_md"
 
 class ImprovedIntentTrainer:
-    def __init__(self):
-        self.nlp = spacy.load(BASE_MODEL)
+    def __init__(self, fast=False):
+        # Modo rápido: se parte del modelo ya entrenado y solo se entrena textcat
+        self.fast = fast
+        self.nlp = spacy.load(MODEL_PATH if fast else BASE_MODEL)
         self.training_data = self.load_training_data()
+        self.textcat_is_new = True
         self.textcat = self._setup_textcat()
         
     def load_training_data(self):
@@ -31,6 +36,15 @@ class ImprovedIntentTrainer:
         return examples
     
     def _setup_textcat(self):
+        intents = {intent for _, ann in self.training_data for intent in ann["cats"].keys()}
+
+        # En modo rápido reutilizamos el textcat existente si tiene las mismas labels
+        if self.fast and "textcat" in self.nlp.pipe_names:
+            textcat = self.nlp.get_pipe("textcat")
+            if set(textcat.labels) == intents:
+                self.textcat_is_new = False
+                return textcat
+
         # Limpiamos pipes previos
         if "textcat" in self.nlp.pipe_names:
             self.nlp.remove_pipe("textcat")
@@ -41,7 +55,6 @@ class ImprovedIntentTrainer:
         textcat = self.nlp.add_pipe("textcat", last=True)
         
         # Añadimos todas las labels
-        intents = {intent for _, ann in self.training_data for intent in ann["cats"].keys()}
         for intent in intents:
             textcat.add_label(intent)
         
@@ -119,17 +132,77 @@ class ImprovedIntentTrainer:
         
         return best_accuracy
     
-    def evaluate_silent(self, examples):
-        """Evaluación silenciosa para early stopping"""
-        correct, total = 0, 0
-        for ex in examples:
-            doc = self.nlp(ex.text)
+    def train_textcat_only(self, train_data, val_data, max_iterations=100, patience=5):
+        """
+        Reentrenamiento rápido: todos los componentes menos textcat quedan
+        congelados y fuera del forward/backward.
+
+        El textcat de este modelo tiene su propio tok2vec (no escucha al tok2vec
+        compartido), así que lo único que se puede precalcular es la
+        tokenización: los Examples se arman una vez y se reutilizan en todas
+        las épocas. La validación va en lotes con nlp.pipe.
+        """
+        start = time.perf_counter()
+        train_examples = self.prepare_examples(train_data)
+        val_examples = self.prepare_examples(val_data)
+        frozen = [name for name in self.nlp.pipe_names if name != "textcat"]
+
+        best_accuracy = 0
+        patience_counter = 0
+        best_textcat_state = None
+
+        print(f"🚀 Reentrenamiento rápido (solo textcat, congelados: {', '.join(frozen) or '-'})")
+
+        with self.nlp.select_pipes(disable=frozen):
+            if self.textcat_is_new:
+                self.textcat.initialize(lambda: train_examples, nlp=self.nlp)
+            optimizer = self.nlp.create_optimizer()
+
+            for i in range(max_iterations):
+                random.shuffle(train_examples)
+                losses = {}
+                dropout_rate = max(0.1, 0.5 - (i * 0.01))
+
+                for batch in minibatch(train_examples, size=compounding(4.0, 32.0, 1.001)):
+                    self.nlp.update(batch, drop=dropout_rate, losses=losses, sgd=optimizer)
+
+                val_accuracy = self.evaluate_silent(val_examples)
+
+                print(f"Epoch {i+1:2d}/{max_iterations} | "
+                      f"Loss: {losses.get('textcat', 0):.4f} | "
+                      f"Val Acc: {val_accuracy:.2%}")
+
+                if val_accuracy > best_accuracy:
+                    best_accuracy = val_accuracy
+                    patience_counter = 0
+                    # Solo guardamos los pesos de textcat, el resto no cambia
+                    best_textcat_state = self.textcat.to_bytes()
+                else:
+                    patience_counter += 1
+
+                if patience_counter >= patience:
+                    print(f"⏹️  Early stopping activado. Mejor accuracy: {best_accuracy:.2%}")
+                    break
+
+        if best_textcat_state:
+            self.textcat.from_bytes(best_textcat_state)
+            print("🔄 textcat restaurado al mejor estado")
+
+        print(f"⏱️  Reentrenamiento completado en {time.perf_counter() - start:.1f}s")
+        return best_accuracy
+
+    def evaluate_silent(self, examples, batch_size=256):
+        """Evaluación silenciosa para early stopping (en lotes)"""
+        if not examples:
+            return 0
+        texts = [ex.text for ex in examples]
+        correct = 0
+        for ex, doc in zip(examples, self.nlp.pipe(texts, batch_size=batch_size)):
             pred = max(doc.cats, key=doc.cats.get)
             gold = max(ex.reference.cats, key=ex.reference.cats.get)
             if pred == gold:
                 correct += 1
-            total += 1
-        return correct / total if total else 0
+        return correct / len(examples)
     
     def evaluate_detailed(self, val_data):
         """Evaluación detallada con métricas por clase"""
@@ -232,7 +305,9 @@ class ImprovedIntentTrainer:
 
 
 def main():
-    trainer = ImprovedIntentTrainer()
+    # --fast: reentrenar solo textcat sobre el modelo actual (segundos en vez de minutos)
+    fast = "--fast" in sys.argv
+    trainer = ImprovedIntentTrainer(fast=fast)
     
     # Preparamos datos
     all_data = trainer.training_data
@@ -263,7 +338,8 @@ def main():
     print(f"🎯 Datos de validación: {len(val_data)}")
     
     # Entrenamiento con early stopping
-    best_accuracy = trainer.train_model_with_early_stopping(
+    train = trainer.train_textcat_only if fast else trainer.train_model_with_early_stopping
+    best_accuracy = train(
         train_data, 
         val_data, 
         max_iterations=50, 
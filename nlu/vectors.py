@@ -0,0 +1,136 @@
+import json
+import logging
+import os
+from pathlib import Path
+import numpy as np
+from spacy.strings import hash_string
+from spacy.vectors import Vectors
+from nlu.config import SHARED_VECTORS_PATH
+
+logger = logging.getLogger("nlu")
+
+KEYS_FILE = "keys.npy"
+TABLE_FILE = "vectors.npy"
+META_FILE = "meta.json"
+
+
+def export_vectors(nlp, texts, output_dir: str, dtype: str = "float32") -> dict:
+    """
+    Exportar solo los vectores de las palabras que aparecen en texts.
+
+    Se guardan como .npy sin comprimir (claves uint64 + tabla) para poder
+    abrirlos con mmap; dtype="float16" reduce el archivo a la mitad.
+    """
+    vectors = nlp.vocab.vectors
+    keys = set()
+    for doc in nlp.tokenizer.pipe(texts, batch_size=1000):
+        for token in doc:
+            for key in (token.orth, token.lower, token.norm):
+                if key in vectors:
+                    keys.add(key)
+
+    keys = np.array(sorted(keys), dtype=np.uint64)
+    table = np.zeros((len(keys), vectors.shape[1]), dtype=dtype)
+    for i, key in enumerate(keys):
+        table[i] = vectors[int(key)]
+
+    output = Path(output_dir)
+    output.mkdir(parents=True, exist_ok=True)
+    np.save(output / KEYS_FILE, keys)
+    np.save(output / TABLE_FILE, np.ascontiguousarray(table))
+    meta = {
+        "rows": int(len(keys)),
+        "width": int(vectors.shape[1]),
+        "dtype": dtype,
+        "original_rows": int(vectors.shape[0]),
+    }
+    (output / META_FILE).write_text(json.dumps(meta, indent=2), encoding="utf-8")
+    return meta
+
+
+class SharedVectors:
+    """
+    Tabla de vectores abierta con mmap en solo lectura: todos los workers
+    de uvicorn que abren el mismo archivo comparten las mismas páginas.
+    """
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.keys = np.load(self.path / KEYS_FILE)
+        self.table = np.load(self.path / TABLE_FILE, mmap_mode="r")
+        self._rows = {int(key): row for row, key in enumerate(self.keys)}
+
+    @property
+    def dtype(self):
+        return self.table.dtype
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._rows
+
+    def get(self, key: int):
+        row = self._rows.get(key)
+        return None if row is None else self.table[row]
+
+    def to_spacy(self) -> Vectors:
+        return Vectors(data=self.table, keys=self.keys)
+
+
+def _uses_static_vectors(nlp) -> bool:
+    """¿Algún componente activo usa include_static_vectors?"""
+    def search(node):
+        if isinstance(node, dict):
+            if node.get("include_static_vectors") is True:
+                return True
+            return any(search(value) for value in node.values())
+        return False
+    components = nlp.config.get("components", {})
+    return any(search(components.get(name, {})) for name in nlp.pipe_names)
+
+
+def install_shared_vectors(nlp, path: str):
+    """Reemplazar los vectores privados del modelo por la tabla compartida"""
+    shared = SharedVectors(path)
+    if shared.dtype != np.float32 and _uses_static_vectors(nlp):
+        # Los componentes de spaCy calculan en float32: hay que convertir y
+        # esa copia ya no se comparte entre procesos
+        logger.warning(f"Vectores {shared.dtype} convertidos a float32 para el pipeline (sin mmap)")
+        nlp.vocab.vectors = Vectors(data=np.asarray(shared.table, dtype=np.float32), keys=shared.keys)
+    else:
+        nlp.vocab.vectors = shared.to_spacy()
+    return shared
+
+
+class WordVectorSource:
+    """
+    Vector de una palabra, leído de los vectores del modelo de spaCy o de la
+    tabla compartida por mmap (sin copiar la tabla).
+    """
+
+    def __init__(self, key2row: dict, table):
+        self.key2row = key2row
+        self.table = table
+
+    @classmethod
+    def from_spacy(cls, vectors: Vectors) -> "WordVectorSource":
+        return cls(vectors.key2row, vectors.data)
+
+    @classmethod
+    def from_shared(cls, shared: SharedVectors) -> "WordVectorSource":
+        return cls(shared._rows, shared.table)
+
+    @property
+    def width(self) -> int:
+        return int(self.table.shape[1])
+
+    def get(self, word: str):
+        row = self.key2row.get(hash_string(word))
+        return None if row is None else self.table[row]
+
+
+def word_vector_source(nlp=None, path: str = SHARED_VECTORS_PATH):
+    """Vectores del modelo cargado; si no hay, la tabla exportada; si tampoco, None"""
+    if nlp is not None and nlp.vocab.vectors.shape[0]:
+        return WordVectorSource.from_spacy(nlp.vocab.vectors)
+    if path and os.path.isdir(path):
+        return WordVectorSource.from_shared(SharedVectors(path))
+    return None
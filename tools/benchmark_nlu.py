@@ -0,0 +1,219 @@
+"""
+Benchmark del NLU: latencia por etapa (p50/p95/p99), mensajes por segundo
+en modo individual y por lotes, y memoria pico.
+
+Uso:
+    python tools/benchmark_nlu.py --synthetic 100000
+    python tools/benchmark_nlu.py --synthetic 5000 --offline --compare benchmarks/results/anterior.json
+
+Los resultados se guardan en JSON (con el commit actual) para comparar
+corridas entre commits.
+"""
+import argparse
+import json
+import logging
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+from pathlib import Path
+import numpy as np
+
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+TRAIN_DATA_PATH = "nlu/training/training_data.json"
+RESULTS_DIR = "benchmarks/results"
+
+PLANTILLAS = [
+    "busco {categoria} {marca}",
+    "quiero ver {categoria} de {marca} entre {min} y {max}",
+    "recomiendame {categoria} baratos",
+    "cuanto cuesta un {categoria} {marca} en mercadolibre",
+    "compara precios de {categoria} {marca}",
+    "necesito {categoria} con pantalla grande menos de {max}",
+    "hola, que {categoria} tienen?",
+    "info del {categoria} {marca} por favor",
+]
+MARCAS = ["lenovo", "samsung", "apple", "xiaomi", "hp", "lg", "sony", "huawei", "asus", "motorola"]
+CATEGORIAS = ["laptops", "celulares", "tablets", "televisores", "audifonos", "camaras", "relojes"]
+
+
+def training_texts() -> list:
+    with open(TRAIN_DATA_PATH, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    return [text for texts in data["intents"].values() for text in texts]
+
+
+def synthetic_corpus(size: int, seed: int = 42) -> list:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(size):
+        low = rng.randrange(100, 3000, 50)
+        corpus.append(rng.choice(PLANTILLAS).format(
+            categoria=rng.choice(CATEGORIAS),
+            marca=rng.choice(MARCAS),
+            min=low,
+            max=low + rng.randrange(100, 2000, 50),
+        ))
+    return corpus
+
+
+def synthetic_lexicon(n_marcas: int) -> tuple:
+    marcas = MARCAS + [f"marca{i}" for i in range(max(0, n_marcas - len(MARCAS)))]
+    return marcas, CATEGORIAS + ["electronica", "ropa", "deporte", "libros", "belleza"]
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss está en KB en Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def summarize(latencies_ns: list, n_messages: int, elapsed_s: float, traced_peak: int) -> dict:
+    lat_ms = np.array(latencies_ns, dtype=np.float64) / 1e6
+    return {
+        "messages": n_messages,
+        "calls": len(latencies_ns),
+        "p50_ms": float(np.percentile(lat_ms, 50)),
+        "p95_ms": float(np.percentile(lat_ms, 95)),
+        "p99_ms": float(np.percentile(lat_ms, 99)),
+        "mean_ms": float(lat_ms.mean()),
+        "messages_per_s": n_messages / elapsed_s if elapsed_s else 0.0,
+        "peak_traced_mb": traced_peak / (1024 * 1024) if traced_peak else None,
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def run_single(fn, texts: list, trace: bool) -> dict:
+    if trace:
+        tracemalloc.start()
+    latencies = []
+    start = time.perf_counter()
+    for text in texts:
+        t0 = time.perf_counter_ns()
+        fn(text)
+        latencies.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - start
+    traced_peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    if trace:
+        tracemalloc.stop()
+    return summarize(latencies, len(texts), elapsed, traced_peak)
+
+
+def run_batched(fn, texts: list, batch_size: int, trace: bool) -> dict:
+    if trace:
+        tracemalloc.start()
+    latencies = []
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        t0 = time.perf_counter_ns()
+        fn(texts[i:i + batch_size])
+        latencies.append(time.perf_counter_ns() - t0)
+    elapsed = time.perf_counter() - start
+    traced_peak = tracemalloc.get_traced_memory()[1] if trace else 0
+    if trace:
+        tracemalloc.stop()
+    result = summarize(latencies, len(texts), elapsed, traced_peak)
+    result["batch_size"] = batch_size
+    return result
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except Exception:
+        return "desconocido"
+
+
+def compare(current: dict, previous_path: str):
+    with open(previous_path, "r", encoding="utf-8") as f:
+        previous = json.load(f)
+    print(f"\n📊 Comparación con {previous.get('commit')} ({previous_path})")
+    print(f"{'Etapa':<28} {'p50 ms':>18} {'p95 ms':>18} {'msg/s':>22}")
+    for stage, stats in current["stages"].items():
+        before = previous.get("stages", {}).get(stage)
+        if not before:
+            continue
+        row = [f"{before[k]:.3f}→{stats[k]:.3f}" for k in ("p50_ms", "p95_ms")]
+        row.append(f"{before['messages_per_s']:.0f}→{stats['messages_per_s']:.0f}")
+        print(f"{stage:<28} {row[0]:>18} {row[1]:>18} {row[2]:>22}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del NLU")
+    parser.add_argument("--synthetic", type=int, default=100000, help="mensajes sintéticos a generar")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--offline", action="store_true", help="léxico sintético, sin consultar la BD")
+    parser.add_argument("--brands", type=int, default=2000, help="marcas del léxico sintético (--offline)")
+    parser.add_argument("--no-cache", action="store_true", help="desactivar el cache de NLUProcessor")
+    parser.add_argument("--tracemalloc", action="store_true", help="medir memoria pico por etapa (más lento)")
+    parser.add_argument("--output", help="ruta del JSON de resultados")
+    parser.add_argument("--compare", help="JSON de una corrida anterior")
+    args = parser.parse_args()
+
+    from nlu import NLUProcessor
+    processor = NLUProcessor()
+    # Un log por mensaje distorsiona todo (NLUProcessor lo deja en INFO)
+    logging.getLogger("nlu").setLevel(logging.ERROR)
+    if args.offline:
+        # Léxico fijo: no depende de la BD y simula un catálogo grande
+        extractor = processor.entity_extractor
+        extractor._lexicon = extractor._build_lexicon(*synthetic_lexicon(args.brands))
+        extractor.version += 1
+    if args.no_cache:
+        processor.cache.max_entries = 0
+
+    corpora = {
+        "training": training_texts(),
+        "synthetic": synthetic_corpus(args.synthetic),
+    }
+    classifier = processor.intent_classifier
+    extractor = processor.entity_extractor
+
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "synthetic": args.synthetic,
+            "batch_size": args.batch_size,
+            "offline": args.offline,
+            "cache": not args.no_cache,
+            "model": classifier.get_model_info(),
+            "marcas": len(extractor.marcas),
+            "categorias": len(extractor.categorias),
+        },
+        "stages": {},
+    }
+
+    for corpus_name, texts in corpora.items():
+        print(f"▶️  Corpus {corpus_name}: {len(texts)} mensajes")
+        stages = {
+            "classify": lambda: run_single(classifier.classify, texts, args.tracemalloc),
+            "classify_batch": lambda: run_batched(classifier.classify_batch, texts, args.batch_size, args.tracemalloc),
+            "extract": lambda: run_single(extractor.extract, texts, args.tracemalloc),
+            "process": lambda: run_single(processor.process, texts, args.tracemalloc),
+            "process_batch": lambda: run_batched(processor.process_batch, texts, args.batch_size, args.tracemalloc),
+        }
+        for stage, run in stages.items():
+            processor.cache.clear()
+            stats = run()
+            results["stages"][f"{corpus_name}/{stage}"] = stats
+            print(f"   {stage:<15} p50={stats['p50_ms']:.3f}ms p95={stats['p95_ms']:.3f}ms "
+                  f"p99={stats['p99_ms']:.3f}ms {stats['messages_per_s']:.0f} msg/s")
+
+    results["cache"] = processor.cache.stats()
+
+    output = Path(args.output) if args.output else \
+        Path(RESULTS_DIR) / f"nlu_{datetime.now().strftime('%Y%m%d_%H%M%S')}_{results['commit']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(results, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"✅ Resultados guardados en {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,27 @@
 from fastapi import WebSocket
 
 class ConnectionManager:
-    def __init__(self):
+    def __init__(self, tracker=None):
         self.active_connections: dict[str, list[WebSocket]] = {}
+        # SessionActivityTracker opcional: registra conexiones y último acceso
+        self.tracker = tracker
 
     async def connect(self, websocket: WebSocket, session_id: str):
         await websocket.accept()
         if session_id not in self.active_connections:
             self.active_connections[session_id] = []
         self.active_connections[session_id].append(websocket)
+        if self.tracker is not None:
+            client = websocket.client
+            self.tracker.connected(session_id, client.host if client else None, websocket.headers.get("user-agent"))
 
     def disconnect(self, websocket: WebSocket, session_id: str):
         if session_id in self.active_connections:
             self.active_connections[session_id].remove(websocket)
             if not self.active_connections[session_id]:
                 del self.active_connections[session_id]
+            if self.tracker is not None:
+                self.tracker.disconnected(session_id)
 
     async def send_message(self, message: str, session_id: str):
         if session_id in self.active_connections: